@@ -1,22 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Cookie
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Cookie
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from app.models.request import ChatRequest
 from app.models.response import ChatResponse, ApiResponse
 from app.services.rag import RAGService
-from app.dependencies import get_rag_service
+from app.dependencies import get_rag_service, admit_chat_request
+from app.services.admission import AdmissionSlot
 from app.utils.response_formatter import format_rag_response
 from app.exceptions import RAGServiceError, DocumentNotFoundError, LLMServiceError, RateLimitError
-from app.session_memory import SESSION_MEMORY, SESSION_COOKIE_NAME
+from app.session_memory import SESSION_STORE, SESSION_COOKIE_NAME
+import json
 import logging
-from typing import Optional
+import uuid
+from typing import Optional, AsyncIterator, Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 형식의 메시지 생성"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+def _resolve_session_id(rag_session_id: Optional[str], fastapi_request: Optional[Request]) -> Tuple[str, bool]:
+    """세션 ID 확인, 없으면 새로 발급 (세션 ID, 신규 발급 여부) 반환"""
+    if not rag_session_id and fastapi_request is not None:
+        rag_session_id = fastapi_request.cookies.get(SESSION_COOKIE_NAME)
+    if rag_session_id:
+        return rag_session_id, False
+    return str(uuid.uuid4()), True
+
+async def _load_session_history(session_id: str, request: ChatRequest) -> List[Dict[str, str]]:
+    """세션 대화 내역 조회 (클라이언트가 내역을 보내면 그 내역으로 교체)"""
+    if request.history:
+        await SESSION_STORE.set_history(session_id, request.history)
+    return await SESSION_STORE.get_history(session_id)
+
+def _streaming_response(stream: AsyncIterator[str], slot: Optional[AdmissionSlot]) -> StreamingResponse:
+    """SSE 응답 생성, 처리 슬롯은 스트림이 끝날 때 반환"""
+    if slot is None:
+        return StreamingResponse(stream, media_type="text/event-stream")
+
+    slot.streaming = True
+
+    async def release_when_done() -> AsyncIterator[str]:
+        try:
+            async for message in stream:
+                yield message
+        finally:
+            slot.release()
+
+    # 스트림이 시작되기 전에 연결이 끊긴 경우에도 슬롯 반환
+    return StreamingResponse(release_when_done(), media_type="text/event-stream",
+                             background=BackgroundTask(slot.release))
+
+def _sse_error(e: Exception) -> str:
+    """예외를 SSE 오류 이벤트로 변환"""
+    if isinstance(e, RAGServiceError):
+        error = {
+            "type": type(e).__name__,
+            "message": str(e),
+            "status_code": e.status_code
+        }
+    else:
+        error = {
+            "type": "InternalServerError",
+            "message": "서버 내부 오류가 발생했습니다",
+            "status_code": 500
+        }
+    return _sse_event("error", error)
+
 @router.post("/", response_model=ApiResponse[ChatResponse])
 async def chat(
     request: ChatRequest,
     rag_service: RAGService = Depends(get_rag_service),
+    slot: Optional[AdmissionSlot] = Depends(admit_chat_request),
     evaluate_quality: bool = Query(False, description="답변 품질 평가 활성화")
 ):
     """
@@ -42,7 +101,10 @@ async def chat(
         # 메타데이터 준비
         meta_info = {
             "query": request.query,
-            "total_sources": len(response_data["sources"])
+            "total_sources": len(response_data["sources"]),
+            "timings": rag_result.get("timings", {}),
+            "context": rag_result.get("context"),
+            "answer_cache": rag_result.get("cache")
         }
         
         logger.info(f"채팅 응답 생성 완료: 소스 {len(response_data['sources'])}개, 처리 시간 {response_data['processing_time']:.2f}초")
@@ -105,7 +167,9 @@ async def chat(
 @router.post("/conversation", response_model=ApiResponse[ChatResponse])
 async def conversation(
     request: ChatRequest,
+    response: Response,
     rag_service: RAGService = Depends(get_rag_service),
+    slot: Optional[AdmissionSlot] = Depends(admit_chat_request),
     evaluate_quality: bool = Query(False, description="답변 품질 평가 활성화"),
     fastapi_request: Request = None,
     rag_session_id: str = Cookie(default=None)
@@ -118,26 +182,25 @@ async def conversation(
     - **evaluate_quality**: (선택 사항) 답변 품질 평가 활성화
     """
     try:
-        ####메모리 관련 수정#####
-        # 세션별 메모리 사용
-        if not rag_session_id:
-            rag_session_id = fastapi_request.cookies.get(SESSION_COOKIE_NAME)
-        if not rag_session_id:
-            import uuid
-            rag_session_id = str(uuid.uuid4())
-        # 세션별 대화 내역 가져오기
-        session_history = SESSION_MEMORY.get(rag_session_id, [])
-        # 새 질문 추가
-        if request.history:
-            session_history = request.history
-        ####################
-        logger.info(f"대화 요청 처리 중: {request.query}, 대화 내역 길이: {len(session_history)}")
+        # 세션별 메모리 사용 (세션 ID가 없으면 새로 발급)
+        rag_session_id, is_new_session = _resolve_session_id(rag_session_id, fastapi_request)
+        if is_new_session:
+            response.set_cookie(key=SESSION_COOKIE_NAME, value=rag_session_id, httponly=True)
         
-        # RAG 서비스에서 대화 응답 생성
-        rag_result = await rag_service.get_conversation_response(
-            query=request.query,
-            chat_history=session_history
-        )
+        # 같은 세션의 요청은 순서대로 처리
+        async with SESSION_STORE.lock(rag_session_id):
+            # 세션별 대화 내역 가져오기
+            session_history = await _load_session_history(rag_session_id, request)
+            logger.info(f"대화 요청 처리 중: {request.query}, 대화 내역 길이: {len(session_history)}")
+            
+            # RAG 서비스에서 대화 응답 생성
+            rag_result = await rag_service.get_conversation_response(
+                query=request.query,
+                chat_history=session_history
+            )
+            
+            # 세션별 메모리 갱신 (턴 수/토큰 예산을 넘으면 오래된 턴 제거)
+            await SESSION_STORE.append_turn(rag_session_id, request.query, rag_result["answer"])
         
         # 응답 포맷팅
         response_data = format_rag_response(
@@ -150,14 +213,11 @@ async def conversation(
         meta_info = {
             "query": request.query,
             "total_sources": len(response_data["sources"]),
-            "history_length": len(session_history)
+            "history_length": len(session_history),
+            "timings": rag_result.get("timings", {}),
+            "context": rag_result.get("context")
         }
         
-        # 세션별 메모리 갱신
-        ####메모리 관련 수정#####
-        session_history.append({"human": request.query, "ai": rag_result["answer"]})
-        SESSION_MEMORY[rag_session_id] = session_history
-        ####################
         logger.info(f"대화 응답 생성 완료: 소스 {len(response_data['sources'])}개, 처리 시간 {response_data['processing_time']:.2f}초")
         
         # 성공 응답 반환
@@ -178,4 +238,106 @@ async def conversation(
                 "status_code": getattr(e, "status_code", 500)
             },
             meta={"query": request.query}
-        )
\ No newline at end of file
+        )
+
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service),
+    slot: Optional[AdmissionSlot] = Depends(admit_chat_request),
+    evaluate_quality: bool = Query(False, description="답변 품질 평가 활성화")
+):
+    """
+    RAG 답변을 Server-Sent Events로 스트리밍합니다.
+    
+    - `token` 이벤트: 생성된 토큰 조각 (`delta`)
+    - `final` 이벤트: 소스, 인용, 토큰 수, 단계별 처리 시간을 포함한 최종 응답
+    - `error` 이벤트: 처리 중 발생한 오류
+    """
+    logger.info(f"스트리밍 채팅 요청 처리 중: {request.query}")
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in rag_service.stream_answer_with_sources(request.query):
+                if event["event"] == "token":
+                    yield _sse_event("token", event["data"])
+                    continue
+
+                rag_result = event["data"]
+                response_data = format_rag_response(
+                    rag_result,
+                    enhance=True,
+                    evaluate_quality=evaluate_quality
+                )
+                meta_info = {
+                    "query": request.query,
+                    "total_sources": len(response_data["sources"]),
+                    "timings": rag_result.get("timings", {}),
+                    "context": rag_result.get("context"),
+                    "answer_cache": rag_result.get("cache")
+                }
+                logger.info(f"스트리밍 채팅 응답 완료: 첫 토큰까지 {rag_result['timings'].get('time_to_first_token', 0.0):.2f}초")
+                yield _sse_event("final", {"data": response_data, "meta": meta_info})
+        except Exception as e:
+            logger.error(f"스트리밍 채팅 처리 중 오류: {e}")
+            yield _sse_error(e)
+
+    return _streaming_response(event_stream(), slot)
+
+@router.post("/conversation/stream")
+async def conversation_stream(
+    request: ChatRequest,
+    rag_service: RAGService = Depends(get_rag_service),
+    slot: Optional[AdmissionSlot] = Depends(admit_chat_request),
+    evaluate_quality: bool = Query(False, description="답변 품질 평가 활성화"),
+    fastapi_request: Request = None,
+    rag_session_id: str = Cookie(default=None)
+):
+    """
+    대화 내역을 고려한 RAG 답변을 Server-Sent Events로 스트리밍합니다.
+    
+    이벤트 형식은 `/chat/stream`과 동일합니다.
+    """
+    rag_session_id, is_new_session = _resolve_session_id(rag_session_id, fastapi_request)
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            # 같은 세션의 요청은 순서대로 처리
+            async with SESSION_STORE.lock(rag_session_id):
+                session_history = await _load_session_history(rag_session_id, request)
+                logger.info(f"스트리밍 대화 요청 처리 중: {request.query}, 대화 내역 길이: {len(session_history)}")
+
+                async for event in rag_service.stream_conversation_response(
+                    query=request.query,
+                    chat_history=session_history
+                ):
+                    if event["event"] == "token":
+                        yield _sse_event("token", event["data"])
+                        continue
+
+                    rag_result = event["data"]
+                    response_data = format_rag_response(
+                        rag_result,
+                        enhance=True,
+                        evaluate_quality=evaluate_quality
+                    )
+                    meta_info = {
+                        "query": request.query,
+                        "total_sources": len(response_data["sources"]),
+                        "history_length": len(session_history),
+                        "timings": rag_result.get("timings", {}),
+                        "context": rag_result.get("context")
+                    }
+
+                    # 세션별 메모리 갱신
+                    await SESSION_STORE.append_turn(rag_session_id, request.query, rag_result["answer"])
+
+                    yield _sse_event("final", {"data": response_data, "meta": meta_info})
+        except Exception as e:
+            logger.error(f"스트리밍 대화 처리 중 오류: {e}")
+            yield _sse_error(e)
+
+    streaming_response = _streaming_response(event_stream(), slot)
+    if is_new_session:
+        streaming_response.set_cookie(key=SESSION_COOKIE_NAME, value=rag_session_id, httponly=True)
+    return streaming_response
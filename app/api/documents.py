@@ -1,79 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import JSONResponse
-from app.models.request import DeleteDocumentRequest, DocumentUploadRequest
-from app.models.response import DocumentInfo, ApiResponse
-from app.services.document_service import DocumentService
-from app.exceptions import DocumentProcessingError, InvalidFileFormatError
-import shutil
-import os
-import tempfile
+from fastapi import APIRouter, Depends, Query, Request
+from app.models.request import DeleteDocumentRequest, DeleteDocumentsByFilterRequest
+from app.models.response import DocumentInfo, DocumentUpdateResult, IngestionJobInfo, ApiResponse
+from app.services.document_service import DocumentService, get_document_service
+from app.services.ingestion_jobs import IngestionJobQueue, get_ingestion_queue
+from app.core.config import settings
+from app.exceptions import DocumentNotFoundError, FileTooLargeError, InvalidFileFormatError, MalformedUploadError
+from app.utils.multipart_stream import StreamingMultipartForm
 import json
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-# DocumentService 의존성
-def get_document_service():
-    return DocumentService()
+# 업로드 엔드포인트의 요청 본문 스키마 (본문을 직접 스트리밍으로 읽으므로 OpenAPI 문서용으로만 사용)
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "description": {"type": "string"},
+                        "metadata": {"type": "string", "description": "JSON 문자열"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+def check_content_length(request: Request) -> None:
+    """Content-Length로 확인 가능한 경우 본문을 읽기 전에 최대 크기 초과 요청 거부"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_SIZE:
+        raise FileTooLargeError(f"업로드 파일이 최대 크기({settings.MAX_UPLOAD_SIZE} bytes)를 초과했습니다.")
 
-@router.post("/upload", response_model=ApiResponse[DocumentInfo])
+async def receive_upload(
+    request: Request,
+    save: Callable[[StreamingMultipartForm, str], Awaitable[Dict[str, Any]]]
+) -> Tuple[Dict[str, Any], str, Dict[str, str]]:
+    """업로드 요청 본문을 스트리밍으로 읽어 파일 파트를 save(form, filename)로 저장
+    
+    본문을 임시 파일에 받아 두지 않고 읽는 즉시 저장하며, 최대 크기를 넘으면 읽는 도중 413으로 중단합니다.
+    
+    Returns:
+        (save 결과, 파일명, 폼 필드)
+    """
+    check_content_length(request)
+    form = await StreamingMultipartForm.open(request, max_body_size=settings.MAX_UPLOAD_SIZE)
+    saved = await save(form, form.filename)
+    try:
+        fields = await form.finish()
+    except BaseException:
+        DocumentService.discard_upload(saved)
+        raise
+    return saved, form.filename, fields
+
+def parse_metadata_field(metadata: Optional[str]) -> Optional[Dict[str, Any]]:
+    """메타데이터 폼 필드(JSON 문자열) 파싱, 형식이 잘못되면 None"""
+    if not metadata:
+        return {}
+    try:
+        return json.loads(metadata)
+    except json.JSONDecodeError:
+        return None
+
+@router.post("/upload", response_model=ApiResponse[IngestionJobInfo], openapi_extra=UPLOAD_FORM_SCHEMA)
 async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    description: Optional[str] = Form(None),
-    metadata: Optional[str] = Form(None),
-    document_service: DocumentService = Depends(get_document_service)
+    request: Request,
+    ingestion_queue: IngestionJobQueue = Depends(get_ingestion_queue)
 ):
     """
-    문서를 업로드하고 RAG 시스템의 Vector Store에 추가합니다.
+    문서를 업로드하고 RAG 시스템의 Vector Store 추가 작업을 등록합니다.
+    
+    문서 처리(파싱, 분할, 임베딩)는 백그라운드 작업으로 수행되며,
+    응답으로 받은 작업 ID로 `GET /documents/jobs/{job_id}`에서 진행 상황을 조회할 수 있습니다.
     
     - **file**: 업로드할 문서 파일 (PDF, TXT, CSV, HTML 형식 지원)
     - **description**: (선택 사항) 문서 설명
     - **metadata**: (선택 사항) 문서 메타데이터 (JSON 문자열)
     """
-    # 메타데이터 파싱
-    doc_metadata = {}
-    if metadata:
-        try:
-            doc_metadata = json.loads(metadata)
-        except json.JSONDecodeError:
+    try:
+        # 업로드 파일을 문서 저장 위치로 바로 스트리밍 저장 (형식 확인, SHA-256 계산)
+        saved, filename, fields = await receive_upload(request, ingestion_queue.document_service.save_upload)
+        
+        # 메타데이터 파싱
+        doc_metadata = parse_metadata_field(fields.get("metadata"))
+        if doc_metadata is None:
+            DocumentService.discard_upload(saved)
             return ApiResponse(
                 success=False,
                 error={"message": "잘못된 메타데이터 형식입니다. 유효한 JSON 문자열이어야 합니다."}
             )
-    
-    try:
-        # 임시 파일 생성
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            # 업로드된 파일 내용 읽기
-            contents = await file.read()
-            # 임시 파일에 쓰기
-            temp_file.write(contents)
-            temp_file_path = temp_file.name
-        
-        # 백그라운드에서 문서 처리 (비동기)
-        result = await document_service.process_document(
-            file_path=temp_file_path,
-            original_filename=file.filename,
-            description=description,
-            metadata=doc_metadata
-        )
+        doc_metadata.update({
+            "sha256": saved["sha256"],
+            "size_bytes": saved["size_bytes"]
+        })
         
-        # 임시 파일 삭제
+        # 백그라운드 수집 작업 등록
         try:
-            os.unlink(temp_file_path)
-        except Exception as e:
-            logger.warning(f"임시 파일 삭제 중 오류: {e}")
+            job = await ingestion_queue.submit(
+                file_path=saved["file_path"],
+                original_filename=filename,
+                description=fields.get("description"),
+                metadata=doc_metadata,
+                document_id=saved["document_id"]
+            )
+        except Exception:
+            DocumentService.discard_upload(saved)
+            raise
         
         return ApiResponse(
             success=True,
-            data=result,
-            meta={"filename": file.filename}
+            data=job,
+            meta={"filename": filename, "sha256": saved["sha256"], "size_bytes": saved["size_bytes"]}
         )
         
+    except (FileTooLargeError, MalformedUploadError):
+        raise
+        
     except InvalidFileFormatError as e:
         return ApiResponse(
             success=False,
@@ -84,41 +135,163 @@ async def upload_document(
             }
         )
         
-    except DocumentProcessingError as e:
+    except Exception as e:
+        logger.error(f"문서 업로드 중 오류: {e}")
         return ApiResponse(
             success=False,
             error={
-                "type": "DocumentProcessingError",
-                "message": str(e),
+                "type": "InternalServerError",
+                "message": f"문서 업로드 중 오류 발생: {str(e)}",
                 "status_code": 500
             }
         )
+
+@router.get("/jobs/{job_id}", response_model=ApiResponse[IngestionJobInfo])
+async def get_ingestion_job(
+    job_id: str,
+    ingestion_queue: IngestionJobQueue = Depends(get_ingestion_queue)
+):
+    """
+    문서 수집 작업의 진행 상황을 조회합니다.
+    
+    - **job_id**: 업로드 시 받은 작업 ID
+    """
+    job = await ingestion_queue.get(job_id)
+    if job is None:
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "JobNotFoundError",
+                "message": f"작업 ID {job_id}를 찾을 수 없습니다.",
+                "status_code": 404
+            }
+        )
+    
+    return ApiResponse(
+        success=True,
+        data=job,
+        meta={"job_id": job_id}
+    )
+
+@router.put("/{document_id}", response_model=ApiResponse[DocumentUpdateResult], openapi_extra=UPLOAD_FORM_SCHEMA)
+async def update_document(
+    document_id: str,
+    request: Request,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    문서를 새 파일로 갱신합니다.
+    
+    기존 청크와 내용 해시를 비교하여 새로 생기거나 바뀐 청크만 다시 임베딩하고,
+    사라진 청크는 삭제합니다.
+    
+    - **document_id**: 갱신할 문서 ID
+    - **file**: 새 문서 파일
+    - **description**: (선택 사항) 문서 설명, 생략하면 기존 설명 유지
+    - **metadata**: (선택 사항) 문서 메타데이터 (JSON 문자열)
+    """
+    try:
+        # 새 파일을 임시 위치로 스트리밍 저장 (갱신이 끝나면 문서 디렉토리로 이동)
+        staged, filename, fields = await receive_upload(request, document_service.stage_upload)
+        
+        # 메타데이터 파싱
+        doc_metadata = parse_metadata_field(fields.get("metadata"))
+        if doc_metadata is None:
+            DocumentService.discard_upload(staged)
+            return ApiResponse(
+                success=False,
+                error={"message": "잘못된 메타데이터 형식입니다. 유효한 JSON 문자열이어야 합니다."}
+            )
+        
+        result = await document_service.update_document(
+            document_id=document_id,
+            staged=staged,
+            original_filename=filename,
+            description=fields.get("description"),
+            metadata=doc_metadata
+        )
+        
+        return ApiResponse(
+            success=True,
+            data=result,
+            meta={"document_id": document_id}
+        )
+        
+    except (FileTooLargeError, MalformedUploadError):
+        raise
+        
+    except DocumentNotFoundError as e:
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "DocumentNotFoundError",
+                "message": str(e),
+                "status_code": 404
+            }
+        )
+        
+    except InvalidFileFormatError as e:
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "InvalidFileFormatError",
+                "message": str(e),
+                "status_code": 400
+            }
+        )
         
     except Exception as e:
-        logger.error(f"문서 업로드 중 오류: {e}")
+        logger.error(f"문서 갱신 중 오류: {e}")
         return ApiResponse(
             success=False,
             error={
                 "type": "InternalServerError",
-                "message": f"문서 업로드 중 오류 발생: {str(e)}",
+                "message": f"문서 갱신 중 오류 발생: {str(e)}",
                 "status_code": 500
             }
         )
 
 @router.get("/", response_model=ApiResponse[List[DocumentInfo]])
 async def get_documents(
+    limit: int = Query(50, ge=1, le=500, description="페이지 크기"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    sort: str = Query("created_at", description="정렬 기준 (created_at, updated_at, filename, chunks_count, size_bytes)"),
+    order: str = Query("desc", description="정렬 순서 (asc, desc)"),
+    filename: Optional[str] = Query(None, description="파일명 접두사 필터"),
+    created_after: Optional[datetime] = Query(None, description="이 시간 이후 생성된 문서만"),
+    created_before: Optional[datetime] = Query(None, description="이 시간 이전 생성된 문서만"),
     document_service: DocumentService = Depends(get_document_service)
 ):
     """
-    시스템에 등록된 모든 문서 목록을 조회합니다.
+    시스템에 등록된 문서 목록을 페이지 단위로 조회합니다.
+    
+    다음 페이지는 응답 meta의 `next_cursor`를 `cursor`로 전달하여 조회합니다.
     """
     try:
-        documents = await document_service.get_all_documents()
+        documents, next_cursor = await document_service.get_all_documents(
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            filename=filename,
+            created_after=created_after,
+            created_before=created_before
+        )
         
         return ApiResponse(
             success=True,
             data=documents,
-            meta={"total": len(documents)}
+            meta={"count": len(documents), "limit": limit, "next_cursor": next_cursor}
+        )
+        
+    except ValueError as e:
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "ValidationError",
+                "message": str(e),
+                "status_code": 400
+            }
         )
         
     except Exception as e:
@@ -169,4 +342,63 @@ async def delete_document(
                 "message": f"문서 삭제 중 오류 발생: {str(e)}",
                 "status_code": 500
             }
-        )
\ No newline at end of file
+        )
+
+@router.post("/delete", response_model=ApiResponse[Dict[str, Any]])
+async def delete_documents_by_filter(
+    request: DeleteDocumentsByFilterRequest,
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    메타데이터 필터와 일치하는 청크와 문서를 일괄 삭제합니다.
+    
+    - **filter**: Chroma where 형식의 메타데이터 필터 (예: `{"filename": "report.pdf"}`)
+    """
+    try:
+        result = await document_service.delete_documents_by_filter(request.filter)
+        
+        return ApiResponse(
+            success=True,
+            data=result,
+            meta={"filter": request.filter}
+        )
+        
+    except Exception as e:
+        logger.error(f"문서 일괄 삭제 중 오류: {e}")
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "InternalServerError",
+                "message": f"문서 일괄 삭제 중 오류 발생: {str(e)}",
+                "status_code": 500
+            }
+        )
+
+@router.post("/vacuum", response_model=ApiResponse[Dict[str, Any]])
+async def vacuum_vector_store(
+    document_service: DocumentService = Depends(get_document_service)
+):
+    """
+    Vector Store의 SQLite 파일을 VACUUM하여 삭제된 데이터가 차지하던 공간을 회수합니다.
+    
+    HNSW 인덱스는 재구성하지 않으므로 검색 성능은 달라지지 않으며, 회수한 용량을 반환합니다.
+    SQLite 잠금 등으로 실패하면 vacuumed=false와 원인(error)을 반환합니다.
+    """
+    try:
+        report = await document_service.vacuum_vector_store()
+        
+        return ApiResponse(
+            success=True,
+            data=report
+        )
+        
+    except Exception as e:
+        logger.error(f"Vector Store VACUUM 중 오류: {e}")
+        return ApiResponse(
+            success=False,
+            error={
+                "type": "InternalServerError",
+                "message": f"Vector Store VACUUM 중 오류 발생: {str(e)}",
+                "status_code": 500
+            }
+        )
@@ -30,11 +30,99 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME", "text-embedding-3-small")
     LLM_MODEL_NAME: str = os.getenv("LLM_MODEL_NAME", "gpt-4o")
     
+    # 쿼리 임베딩 캐시 설정
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+    QUERY_EMBEDDING_CACHE_TTL: int = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "86400"))  # 초, 0이면 만료 없음
+    QUERY_EMBEDDING_CACHE_PATH: str = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "")  # 비어 있으면 디스크 계층 비활성화
+    DOCUMENT_EMBEDDING_CACHE_SIZE: int = int(os.getenv("DOCUMENT_EMBEDDING_CACHE_SIZE", "2000"))  # 메모리에 유지할 청크 임베딩 수
+    DOCUMENT_EMBEDDING_CACHE_PATH: str = os.getenv("DOCUMENT_EMBEDDING_CACHE_PATH", "./data/document_embeddings.db")  # 청크 해시 → 임베딩
+    
     # Vector Store 설정
     VECTOR_STORE_DIR: str = os.getenv("VECTOR_STORE_DIR", "./data/chroma_db")
     
+    # 문서 수집 설정
+    MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))  # 업로드 최대 크기 (bytes)
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 업로드 스트리밍 단위 (bytes)
+    INGESTION_JOB_DB_PATH: str = os.getenv("INGESTION_JOB_DB_PATH", "./data/ingestion_jobs.db")
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "2"))  # 동시에 처리할 수집 작업 수
+    INGESTION_PROGRESS_INTERVAL: float = float(os.getenv("INGESTION_PROGRESS_INTERVAL", "1.0"))  # 작업 진행 상황 기록 최소 간격 (초)
+    PARSER_WORKERS: int = int(os.getenv("PARSER_WORKERS", str(min(4, os.cpu_count() or 1))))  # 문서 파싱 프로세스 수 (0이면 스레드)
+    CHUNK_SIZE_TOKENS: int = int(os.getenv("CHUNK_SIZE_TOKENS", "400"))  # 문장형 문서 청크 크기 (토큰)
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))  # 문장형 문서 청크 겹침 (토큰)
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # 한 번에 임베딩할 청크 수
+    DOCUMENT_CATALOG_PATH: str = os.getenv("DOCUMENT_CATALOG_PATH", "./data/document_catalog.db")  # 문서 목록 색인 (SQLite)
+    VECTOR_STORE_VACUUM_INTERVAL: int = int(os.getenv("VECTOR_STORE_VACUUM_INTERVAL", "86400"))  # Vector Store SQLite VACUUM 주기 (초, 0이면 비활성화)
+    INGESTION_QUEUE_SIZE: int = int(os.getenv("INGESTION_QUEUE_SIZE", "2"))  # 수집 파이프라인 단계 사이에 대기할 최대 배치 수
+    
+    # 어휘(BM25) 색인 설정
+    LEXICAL_INDEX_PATH: str = os.getenv("LEXICAL_INDEX_PATH", "./data/lexical_index.json")
+    
     # 검색 설정
     RETRIEVER_K: int = int(os.getenv("RETRIEVER_K", "3"))
+    # 최소 관련도 점수 (0.0 ~ 1.0, 이보다 낮은 결과는 제외)
+    RETRIEVER_SCORE_THRESHOLD: float = float(os.getenv("RETRIEVER_SCORE_THRESHOLD", "0.0"))
+    # 최고 점수 대비 허용 점수 차이 (동적 k, 0이면 비활성화)
+    RETRIEVER_SCORE_MARGIN: float = float(os.getenv("RETRIEVER_SCORE_MARGIN", "0.2"))
+    # 하이브리드 검색 (BM25 + 벡터, Reciprocal Rank Fusion)
+    HYBRID_SEARCH_ENABLED: bool = os.getenv("HYBRID_SEARCH_ENABLED", "True").lower() == "true"
+    LEXICAL_K: int = int(os.getenv("LEXICAL_K", "5"))
+    RRF_K: int = int(os.getenv("RRF_K", "60"))
+    
+    # 문맥 구성 설정
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))  # 프롬프트 문맥 최대 토큰 수 (0이면 제한 없음)
+    CONTEXT_DUPLICATE_THRESHOLD: float = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.9"))  # 근접 중복 판단 유사도
+    
+    # 시맨틱 답변 캐시 설정 (/chat/)
+    ANSWER_CACHE_ENABLED: bool = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # 쿼리 임베딩 코사인 유사도
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # 초, 0이면 만료 없음
+    # True면 문서가 하나라도 추가/삭제된 뒤에는 이전 답변을 모두 무시
+    ANSWER_CACHE_STRICT_CORPUS_VERSION: bool = os.getenv("ANSWER_CACHE_STRICT_CORPUS_VERSION", "False").lower() == "true"
+    
+    # 동일 질의 요청 병합 설정 (/chat/, /chat/stream)
+    REQUEST_COALESCING_ENABLED: bool = os.getenv("REQUEST_COALESCING_ENABLED", "True").lower() == "true"
+    
+    # OpenAI HTTP 클라이언트 설정 (임베딩/채팅 클라이언트가 연결 풀 공유)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))  # 유휴 연결 유지 시간(초)
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "60"))  # 읽기/쓰기/풀 대기 제한 시간(초)
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+    
+    # LLM 복원력 설정
+    LLM_ATTEMPT_TIMEOUT: float = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "30"))  # 시도별 제한 시간(초), 스트리밍은 조각 간격
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))  # 이 백분위 지연을 넘으면 헤지 요청 (0이면 비활성화)
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))  # 헤지 요청 최소 대기 시간(초)
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))  # 차단기를 열 실패 횟수
+    LLM_CIRCUIT_WINDOW: float = float(os.getenv("LLM_CIRCUIT_WINDOW", "30"))  # 실패 횟수를 세는 구간(초)
+    LLM_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))  # 시험 호출까지 차단 시간(초)
+    LLM_FALLBACK_MODEL_NAME: str = os.getenv("LLM_FALLBACK_MODEL_NAME", "")  # 비어 있으면 대체 모델 미사용
+    
+    # 채팅 동시 처리 제한 설정 (LLM을 호출하는 /chat 엔드포인트)
+    CHAT_MAX_CONCURRENCY: int = int(os.getenv("CHAT_MAX_CONCURRENCY", "16"))  # 0이면 제한 없음
+    CHAT_MAX_QUEUE: int = int(os.getenv("CHAT_MAX_QUEUE", "64"))  # 슬롯을 기다릴 수 있는 최대 요청 수
+    CHAT_QUEUE_TIMEOUT: float = float(os.getenv("CHAT_QUEUE_TIMEOUT", "30"))  # 슬롯 대기 최대 시간(초)
+    
+    # OpenAI 호출 제한 설정 (계정의 모델별 분당 한도, 0이면 해당 한도 미적용)
+    LLM_RPM_LIMIT: int = int(os.getenv("LLM_RPM_LIMIT", "500"))
+    LLM_TPM_LIMIT: int = int(os.getenv("LLM_TPM_LIMIT", "30000"))
+    EMBEDDING_RPM_LIMIT: int = int(os.getenv("EMBEDDING_RPM_LIMIT", "3000"))
+    EMBEDDING_TPM_LIMIT: int = int(os.getenv("EMBEDDING_TPM_LIMIT", "1000000"))
+    RATE_LIMIT_BACKGROUND_RESERVE: float = float(os.getenv("RATE_LIMIT_BACKGROUND_RESERVE", "0.2"))  # 대화형 요청 몫으로 남길 한도 비율
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))  # 호출 제한/일시적 오류 재시도 횟수
+    
+    # 대화 세션 설정
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")  # memory | sqlite | redis
+    SESSION_SQLITE_PATH: str = os.getenv("SESSION_SQLITE_PATH", "./data/sessions.db")
+    SESSION_REDIS_URL: str = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+    SESSION_LOCK_TIMEOUT: int = int(os.getenv("SESSION_LOCK_TIMEOUT", "30"))  # 분산 세션 잠금 만료(초), 보유 중에는 자동 연장
+    SESSION_MAX_COUNT: int = int(os.getenv("SESSION_MAX_COUNT", "10000"))  # 유지할 최대 세션 수 (memory/sqlite)
+    SESSION_MAX_TURNS: int = int(os.getenv("SESSION_MAX_TURNS", "20"))  # 세션당 최대 대화 턴 수
+    SESSION_MAX_TOKENS: int = int(os.getenv("SESSION_MAX_TOKENS", "4000"))  # 세션당 대화 내역 토큰 예산
+    SESSION_TTL: int = int(os.getenv("SESSION_TTL", "3600"))  # 유휴 세션 만료 시간(초)
+    SESSION_PURGE_INTERVAL: int = int(os.getenv("SESSION_PURGE_INTERVAL", "60"))  # 만료 세션 정리 주기(초)
     
     # 유효성 검사 메서드들
     @field_validator("OPENAI_API_KEY")
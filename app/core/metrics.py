@@ -0,0 +1,82 @@
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+import threading
+
+class MetricsRegistry:
+    """프로세스 내 카운터/지연 시간/게이지 메트릭 저장소"""
+
+    def __init__(self, window_size: int = 1000):
+        self._lock = threading.Lock()
+        self._window_size = window_size
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._observations: Dict[str, Dict[str, float]] = {}
+        self._windows: Dict[str, Deque[float]] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """카운터 증가"""
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        """관측값(지연 시간 등) 기록"""
+        with self._lock:
+            stats = self._observations.get(name)
+            if stats is None:
+                stats = {"count": 0, "sum": 0.0, "max": 0.0}
+                self._observations[name] = stats
+                self._windows[name] = deque(maxlen=self._window_size)
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+            self._windows[name].append(value)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        """최근 관측값 기준 백분위수 (관측값이 없으면 None)"""
+        with self._lock:
+            window = self._windows.get(name)
+            if not window:
+                return None
+            values = sorted(window)
+        index = min(int(len(values) * q / 100), len(values) - 1)
+        return values[index]
+
+    def sample_count(self, name: str) -> int:
+        """백분위수 계산에 사용되는 최근 관측값 수"""
+        with self._lock:
+            window = self._windows.get(name)
+            return len(window) if window else 0
+
+    def register_gauge(self, name: str, callback: Callable[[], Any]) -> None:
+        """스냅샷 시점에 값을 계산하는 게이지 등록"""
+        with self._lock:
+            self._gauges[name] = callback
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 메트릭 스냅샷 반환"""
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {name: dict(stats) for name, stats in self._observations.items()}
+            gauges = dict(self._gauges)
+
+        for name, stats in observations.items():
+            stats["avg"] = stats["sum"] / stats["count"] if stats["count"] else 0.0
+            stats["p50"] = self.percentile(name, 50)
+            stats["p95"] = self.percentile(name, 95)
+            stats["p99"] = self.percentile(name, 99)
+
+        gauge_values = {}
+        for name, callback in gauges.items():
+            try:
+                gauge_values[name] = callback()
+            except Exception as e:
+                gauge_values[name] = f"error: {e}"
+
+        return {
+            "counters": counters,
+            "observations": observations,
+            "gauges": gauge_values
+        }
+
+# 전역 메트릭 저장소
+metrics = MetricsRegistry()
@@ -4,8 +4,14 @@ from app.core.config import settings
 from app.services.embeddings import get_embeddings_service
 from app.services.llm import get_llm_service
 from app.services.retriever import get_retriever_service
+from app.services.lexical_index import get_lexical_index
+from app.services.answer_cache import get_answer_cache
+from app.services.coalescing import SingleFlight
+from app.services.admission import AdmissionSlot, get_chat_admission
+from app.services.rate_limiter import get_llm_rate_limiter
 from app.services.rag import RAGService
 import logging
+from typing import AsyncIterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +36,34 @@ def get_rag_service():
         embeddings=embeddings,
         llm=llm,
         retriever=retriever,
-        retriever_k=settings.RETRIEVER_K  # 직접 settings에서 값을 가져옴
+        retriever_k=settings.RETRIEVER_K,  # 직접 settings에서 값을 가져옴
+        score_threshold=settings.RETRIEVER_SCORE_THRESHOLD,
+        score_margin=settings.RETRIEVER_SCORE_MARGIN,
+        lexical_index=get_lexical_index() if settings.HYBRID_SEARCH_ENABLED else None,
+        lexical_k=settings.LEXICAL_K,
+        rrf_k=settings.RRF_K,
+        answer_cache=get_answer_cache() if settings.ANSWER_CACHE_ENABLED else None,
+        context_token_budget=settings.CONTEXT_TOKEN_BUDGET,
+        context_duplicate_threshold=settings.CONTEXT_DUPLICATE_THRESHOLD,
+        single_flight=SingleFlight(metric_prefix="chat.coalescing") if settings.REQUEST_COALESCING_ENABLED else None,
+        rate_limiter=get_llm_rate_limiter()
     )
     
-    return rag_service
\ No newline at end of file
+    return rag_service
+
+async def admit_chat_request() -> AsyncIterator[Optional[AdmissionSlot]]:
+    """채팅 요청 처리 슬롯 획득 (대기열이 가득 차면 RateLimitError → 429 + Retry-After)
+
+    스트리밍 엔드포인트는 slot.streaming을 True로 설정하고 스트림 종료 시 직접 반환합니다.
+    """
+    admission = get_chat_admission()
+    if admission is None:
+        yield None
+        return
+
+    slot = await admission.acquire()
+    try:
+        yield slot
+    finally:
+        if not slot.streaming:
+            slot.release()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 class RAGServiceError(Exception):
     """RAG 서비스 관련 기본 예외"""
     def __init__(self, message: str, status_code: int = 500):
@@ -25,8 +27,9 @@ class LLMServiceError(RAGServiceError):
 
 
 class RateLimitError(RAGServiceError):
-    """API 호출 제한에 도달했을 때 발생하는 예외"""
-    def __init__(self, message: str = "API 호출 제한에 도달했습니다"):
+    """API 호출 제한에 도달했을 때 발생하는 예외 (retry_after: 재시도까지 권장 대기 시간(초))"""
+    def __init__(self, message: str = "API 호출 제한에 도달했습니다", retry_after: Optional[float] = None):
+        self.retry_after = retry_after
         super().__init__(message, status_code=429)
 
 
@@ -40,3 +43,20 @@ class InvalidFileFormatError(RAGServiceError):
     """잘못된 파일 형식에 대한 예외"""
     def __init__(self, message: str = "지원하지 않는 파일 형식입니다"):
         super().__init__(message, status_code=400)
+
+
+class FileTooLargeError(RAGServiceError):
+    """업로드 파일이 최대 크기를 초과했을 때 발생하는 예외"""
+    def __init__(self, message: str = "업로드 파일이 최대 크기를 초과했습니다"):
+        super().__init__(message, status_code=413)
+
+class MalformedUploadError(RAGServiceError):
+    """업로드 요청 본문(multipart/form-data)이 올바르지 않을 때 발생하는 예외"""
+    def __init__(self, message: str = "업로드 요청 형식이 올바르지 않습니다"):
+        super().__init__(message, status_code=400)
+
+
+class SessionBusyError(RAGServiceError):
+    """같은 세션의 이전 요청이 끝나지 않아 세션 잠금을 얻지 못했을 때 발생하는 예외"""
+    def __init__(self, message: str = "같은 세션의 이전 요청을 처리 중입니다. 잠시 후 다시 시도하세요"):
+        super().__init__(message, status_code=409)
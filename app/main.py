@@ -7,11 +7,19 @@ from app.api import chat, documents
 from app.exceptions import RAGServiceError
 from app.models.response import ApiResponse
 from app.core.config import settings
+from app.core.metrics import metrics
 import logging
+import math
 import os
 from datetime import datetime
 import uuid
-from app.session_memory import SESSION_MEMORY, SESSION_COOKIE_NAME
+from app.session_memory import SESSION_STORE, SESSION_COOKIE_NAME
+from app.services.document_service import get_document_service
+from app.services.vector_store import get_vector_store
+from app.services.ingestion_jobs import get_ingestion_queue
+from app.services.parsing import shutdown_parser_pool
+from app.services.http_client import close_http_clients
+import asyncio
 
 # 로깅 설정
 logging.basicConfig(
@@ -56,6 +64,10 @@ app.include_router(documents.router)
 @app.exception_handler(RAGServiceError)
 async def rag_service_exception_handler(request: Request, exc: RAGServiceError):
     """RAG 서비스 예외 처리기"""
+    headers = None
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        headers = {"Retry-After": str(math.ceil(retry_after))}
     return JSONResponse(
         status_code=exc.status_code,
         content=ApiResponse(
@@ -66,7 +78,8 @@ async def rag_service_exception_handler(request: Request, exc: RAGServiceError):
                 "status_code": exc.status_code
             },
             meta={"path": str(request.url)}
-        ).model_dump()
+        ).model_dump(),
+        headers=headers
     )
 
 @app.exception_handler(Exception)
@@ -86,6 +99,27 @@ async def global_exception_handler(request: Request, exc: Exception):
         ).model_dump()
     )
 
+async def purge_expired_sessions_periodically():
+    """유휴 시간이 지난 세션을 주기적으로 제거"""
+    while True:
+        await asyncio.sleep(settings.SESSION_PURGE_INTERVAL)
+        try:
+            removed = await SESSION_STORE.purge_expired()
+        except Exception as e:
+            logger.warning(f"만료 세션 정리 중 오류: {e}")
+            continue
+        if removed:
+            logger.info(f"만료된 세션 {removed}개를 제거했습니다.")
+
+async def vacuum_vector_store_periodically():
+    """Vector Store SQLite 파일을 주기적으로 VACUUM"""
+    while True:
+        await asyncio.sleep(settings.VECTOR_STORE_VACUUM_INTERVAL)
+        try:
+            await get_document_service().vacuum_vector_store()
+        except Exception as e:
+            logger.warning(f"Vector Store VACUUM 중 오류: {e}")
+
 # 앱 시작 시 디렉토리 생성
 @app.on_event("startup")
 async def startup_event():
@@ -98,21 +132,46 @@ async def startup_event():
     documents_dir = os.path.join("data", "documents")
     os.makedirs(documents_dir, exist_ok=True)
     
+    # 검색기와 문서 서비스가 공유할 Vector Store 생성
+    app.state.vector_store = await asyncio.to_thread(get_vector_store)
+    
+    # 문서 목록 색인이 없던 기존 데이터 이전
+    try:
+        await get_document_service().rebuild_catalog_if_empty()
+    except Exception as e:
+        logger.warning(f"문서 목록 색인 재구성 중 오류: {e}")
+    
+    # 문서 수집 작업 워커 시작 (완료되지 않은 작업 복구)
+    await get_ingestion_queue().start()
+    
+    # 만료 세션 정리 작업 시작
+    app.state.session_purge_task = asyncio.create_task(purge_expired_sessions_periodically())
+    
+    # Vector Store 주기적 VACUUM 작업 시작
+    app.state.vacuum_task = None
+    if settings.VECTOR_STORE_VACUUM_INTERVAL > 0:
+        app.state.vacuum_task = asyncio.create_task(vacuum_vector_store_periodically())
+    
     logger.info(f"애플리케이션이 시작되었습니다. (버전: {settings.APP_VERSION})")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("애플리케이션을 종료합니다...")
+    app.state.session_purge_task.cancel()
+    if app.state.vacuum_task is not None:
+        app.state.vacuum_task.cancel()
+    await get_ingestion_queue().stop()
+    shutdown_parser_pool()
+    await SESSION_STORE.close()
+    await close_http_clients()
 
 @app.get("/", response_model=ApiResponse)
 async def root(request: Request, response: Response, rag_session_id: str = Cookie(default=None)):
     """메인 페이지 렌더링 및 세션 쿠키 발급"""
-    ####메모리 관련 수정#####
     # 세션 ID가 없으면 새로 발급
     if not rag_session_id:
         rag_session_id = str(uuid.uuid4())
         response.set_cookie(key=SESSION_COOKIE_NAME, value=rag_session_id, httponly=True)
-    ####################
     return templates.TemplateResponse(
         "index.html",
         {"request": request}
@@ -130,6 +189,16 @@ async def health_check():
         }
     )
 
+# 앱 메트릭 조회 엔드포인트
+@app.get("/metrics", response_model=ApiResponse)
+async def get_metrics():
+    """프로세스 내 메트릭 (카운터, 지연 시간, 게이지) 조회"""
+    return ApiResponse(
+        success=True,
+        data=metrics.snapshot(),
+        meta={"timestamp": datetime.now().isoformat()}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -22,4 +22,12 @@ class DocumentUploadRequest(BaseModel):
     
 class DeleteDocumentRequest(BaseModel):
     """문서 삭제 요청 모델"""
-    document_id: str = Field(..., description="삭제할 문서 ID")
\ No newline at end of file
+    document_id: str = Field(..., description="삭제할 문서 ID")
+
+class DeleteDocumentsByFilterRequest(BaseModel):
+    """메타데이터 필터 기반 문서 일괄 삭제 요청 모델"""
+    filter: Dict[str, Any] = Field(
+        ...,
+        description="삭제할 청크의 메타데이터 필터 (Chroma where 형식, 예: {\"filename\": \"report.pdf\"})",
+        min_length=1
+    )
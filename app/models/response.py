@@ -63,6 +63,34 @@ class DocumentInfo(BaseModel):
     created_at: datetime = Field(..., description="생성 시간")
     updated_at: Optional[datetime] = Field(None, description="최종 수정 시간")
     chunks_count: int = Field(..., description="청크 수")
+    size_bytes: Optional[int] = Field(None, description="파일 크기 (bytes)")
+    sha256: Optional[str] = Field(None, description="파일 내용 SHA-256 해시")
+
+class DocumentUpdateResult(BaseModel):
+    """문서 갱신 결과 모델"""
+    document_id: str = Field(..., description="문서 ID")
+    filename: str = Field(..., description="파일명")
+    chunks_count: int = Field(..., description="갱신 후 청크 수")
+    chunks_kept: int = Field(..., description="다시 임베딩하지 않고 유지한 청크 수")
+    chunks_added: int = Field(..., description="새로 임베딩한 청크 수")
+    chunks_removed: int = Field(..., description="삭제한 청크 수")
+    embedding_tokens_saved: int = Field(..., description="재임베딩을 생략해 절약한 토큰 수")
+    updated_at: datetime = Field(..., description="갱신 시간")
+
+class IngestionJobInfo(BaseModel):
+    """문서 수집 작업 정보 모델"""
+    job_id: str = Field(..., description="작업 ID")
+    status: str = Field(..., description="작업 상태 (queued, running, completed, failed)")
+    filename: str = Field(..., description="파일명")
+    pages_parsed: int = Field(0, description="파싱된 페이지 수")
+    chunks_total: int = Field(0, description="전체 청크 수")
+    chunks_embedded: int = Field(0, description="임베딩된 청크 수")
+    progress: Optional[float] = Field(None, description="진행률 (0.0-1.0)")
+    eta_seconds: Optional[float] = Field(None, description="예상 남은 시간(초)")
+    error: Optional[str] = Field(None, description="실패 시 오류 메시지")
+    result: Optional[DocumentInfo] = Field(None, description="완료 시 문서 정보")
+    created_at: datetime = Field(..., description="작업 생성 시간")
+    updated_at: datetime = Field(..., description="최종 갱신 시간")
 
 # BaseModel이 Generic[T] 앞에 와야 함
 class ApiResponse(BaseModel, Generic[T]):
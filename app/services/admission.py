@@ -0,0 +1,99 @@
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.exceptions import RateLimitError
+import asyncio
+import math
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 평균 처리 시간 추정용 지수 이동 평균 가중치
+HOLD_TIME_SMOOTHING = 0.2
+
+class AdmissionSlot:
+    """동시 처리 슬롯 (release는 여러 번 호출해도 한 번만 반환)"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._acquired_at = time.monotonic()
+        self._released = False
+        self.streaming = False  # True면 의존성 종료가 아닌 응답 스트림 종료 시 반환
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.monotonic() - self._acquired_at)
+
+class AdmissionController:
+    """LLM을 호출하는 요청의 동시 처리 수 제한 (대기열 포함)
+
+    동시 처리 수를 넘는 요청은 최대 max_queue개까지 순서대로 대기하며,
+    대기열이 가득 찼거나 queue_timeout 안에 슬롯을 얻지 못하면
+    Retry-After(초)를 담은 RateLimitError(429)로 바로 거절합니다.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float = 30.0,
+                 metric_prefix: str = "admission"):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.metric_prefix = metric_prefix
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self._avg_hold_time = 1.0  # 요청당 평균 처리 시간(초) 추정치
+
+        metrics.register_gauge(f"{metric_prefix}.active", lambda: self.active)
+        metrics.register_gauge(f"{metric_prefix}.queue_depth", lambda: self.waiting)
+
+    def retry_after(self) -> int:
+        """대기열이 빠지는 데 걸릴 예상 시간(초)"""
+        estimate = self._avg_hold_time * (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(estimate))
+
+    def _reject(self, reason: str, message: str) -> RateLimitError:
+        metrics.increment(f"{self.metric_prefix}.rejected")
+        metrics.increment(f"{self.metric_prefix}.rejected.{reason}")
+        return RateLimitError(message, retry_after=self.retry_after())
+
+    async def acquire(self) -> AdmissionSlot:
+        """슬롯 획득 (대기열이 가득 찼거나 대기 시간 초과 시 RateLimitError)"""
+        wait_start = time.monotonic()
+        if not self._semaphore.locked():
+            # 빈 슬롯이 있으면 대기 없이 바로 획득
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                raise self._reject("queue_full", "요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해 주세요")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout or None)
+            except asyncio.TimeoutError:
+                raise self._reject("timeout", "대기 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요")
+            finally:
+                self.waiting -= 1
+
+        metrics.observe(f"{self.metric_prefix}.wait_time", time.monotonic() - wait_start)
+        self.active += 1
+        return AdmissionSlot(self)
+
+    def _release(self, hold_time: float) -> None:
+        self.active -= 1
+        self._avg_hold_time += HOLD_TIME_SMOOTHING * (hold_time - self._avg_hold_time)
+        self._semaphore.release()
+
+@lru_cache(maxsize=1)
+def get_chat_admission() -> Optional[AdmissionController]:
+    """채팅 요청 동시 처리 제한 인스턴스 제공 (싱글톤, CHAT_MAX_CONCURRENCY=0이면 None)"""
+    if settings.CHAT_MAX_CONCURRENCY <= 0:
+        return None
+    return AdmissionController(
+        max_concurrency=settings.CHAT_MAX_CONCURRENCY,
+        max_queue=settings.CHAT_MAX_QUEUE,
+        queue_timeout=settings.CHAT_QUEUE_TIMEOUT,
+        metric_prefix="chat.admission"
+    )
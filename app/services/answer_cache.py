@@ -0,0 +1,176 @@
+from functools import lru_cache
+from collections import OrderedDict
+from dataclasses import dataclass
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.corpus import get_corpus_state
+import copy
+import itertools
+import threading
+import time
+import logging
+import numpy as np
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AnswerCacheEntry:
+    """캐시된 답변 항목"""
+    query: str
+    embedding: np.ndarray  # 정규화된 쿼리 임베딩
+    result: Dict[str, Any]
+    document_ids: FrozenSet[str]  # 답변에 사용된 문서 ID
+    corpus_version: int
+    created_at: float
+    tokens: int  # 답변 생성에 사용된 토큰 수 (적중 시 절약량)
+
+class SemanticAnswerCache:
+    """쿼리 임베딩 유사도 기반 답변 캐시
+
+    이전에 답변한 쿼리와의 코사인 유사도가 임계값 이상이면 캐시된 답변을 반환합니다.
+    답변에 사용된 문서가 갱신/삭제되면 해당 항목을 무효화합니다.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_size: int = 1000, ttl: float = 3600,
+                 strict_corpus_version: bool = False, corpus_state=None):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.strict_corpus_version = strict_corpus_version  # True면 코퍼스가 바뀐 뒤의 항목은 모두 무시
+        self.corpus_state = corpus_state or get_corpus_state()
+        self.corpus_state.subscribe(self.invalidate_documents)
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._entries: "OrderedDict[int, AnswerCacheEntry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # 조회용 임베딩 행렬 (변경 시 재구성)
+        self._matrix_keys: List[int] = []
+
+        self.lookups = 0
+        self.hits = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _is_valid(self, entry: AnswerCacheEntry) -> bool:
+        if self.ttl > 0 and time.time() - entry.created_at > self.ttl:
+            return False
+        if self.strict_corpus_version and entry.corpus_version != self.corpus_state.version:
+            return False
+        return True
+
+    def lookup(self, embedding: List[float]) -> Optional[Tuple[Dict[str, Any], float]]:
+        """가장 유사한 캐시 항목 조회, (결과 사본, 유사도) 또는 None 반환"""
+        query_vector = self._normalize(embedding)
+
+        with self._lock:
+            self.lookups += 1
+            if not self._entries:
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+
+            similarities = self._matrix @ query_vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            key = self._matrix_keys[best]
+            entry = self._entries.get(key)
+
+            if similarity < self.threshold or entry is None:
+                metrics.increment("answer_cache.misses")
+                return None
+
+            if not self._is_valid(entry):
+                self._remove(key)
+                metrics.increment("answer_cache.misses")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_tokens += entry.tokens
+            metrics.increment("answer_cache.hits")
+            metrics.increment("answer_cache.saved_tokens", entry.tokens)
+            return copy.deepcopy(entry.result), similarity
+
+    def put(self, query: str, embedding: List[float], result: Dict[str, Any],
+            corpus_version: Optional[int] = None) -> bool:
+        """답변 결과 저장, 저장 여부 반환
+
+        corpus_version은 답변에 사용한 문서를 검색하기 직전의 코퍼스 버전입니다.
+        검색 후 생성이 끝나기 전에 문서가 변경되었다면 (무효화 리스너가 이미 지나갔으므로)
+        오래된 소스로 만든 답변이 남지 않도록 저장하지 않습니다.
+        """
+        document_ids = frozenset(
+            source.get("metadata", {}).get("document_id")
+            for source in result.get("sources", [])
+            if source.get("metadata", {}).get("document_id")
+        )
+        tokens = (result.get("prompt_tokens") or 0) + (result.get("completion_tokens") or 0)
+        entry = AnswerCacheEntry(
+            query=query,
+            embedding=self._normalize(embedding),
+            result=copy.deepcopy(result),
+            document_ids=document_ids,
+            corpus_version=self.corpus_state.version if corpus_version is None else corpus_version,
+            created_at=time.time(),
+            tokens=tokens
+        )
+
+        with self._lock:
+            # 버전 확인과 저장을 무효화 리스너와 같은 잠금 안에서 수행
+            if entry.corpus_version != self.corpus_state.version:
+                metrics.increment("answer_cache.stale_puts_skipped")
+                return False
+            self._entries[next(self._ids)] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+        return True
+
+    def _remove(self, key: int) -> None:
+        """항목 제거 (잠금은 호출자가 보유)"""
+        if self._entries.pop(key, None) is not None:
+            self._matrix = None
+
+    def invalidate_documents(self, document_ids: List[str]) -> int:
+        """주어진 문서를 사용한 항목 무효화, 제거된 항목 수 반환"""
+        changed = set(document_ids)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.document_ids & changed]
+            for key in stale:
+                self._remove(key)
+
+        if stale:
+            logger.info(f"문서 변경으로 답변 캐시 항목 {len(stale)}개를 무효화했습니다.")
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "saved_tokens": self.saved_tokens
+            }
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> SemanticAnswerCache:
+    """시맨틱 답변 캐시 인스턴스 제공 (싱글톤)"""
+    cache = SemanticAnswerCache(
+        threshold=settings.ANSWER_CACHE_THRESHOLD,
+        max_size=settings.ANSWER_CACHE_SIZE,
+        ttl=settings.ANSWER_CACHE_TTL,
+        strict_corpus_version=settings.ANSWER_CACHE_STRICT_CORPUS_VERSION
+    )
+    metrics.register_gauge("answer_cache", cache.stats)
+    return cache
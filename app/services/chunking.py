@@ -0,0 +1,60 @@
+from functools import lru_cache
+from dataclasses import dataclass
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.core.config import settings
+from app.utils.tokens import count_tokens
+import os
+import logging
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ChunkingProfile:
+    """파일 형식별 청크 분할 설정 (크기/겹침은 토큰 단위)"""
+    name: str
+    chunk_size: int
+    chunk_overlap: int
+    separators: Tuple[str, ...]
+
+# 일반 문장 (PDF/TXT/HTML) - 문단 → 줄 → 문장 → 단어 순으로 분할
+PROSE_PROFILE = ChunkingProfile(
+    name="prose",
+    chunk_size=settings.CHUNK_SIZE_TOKENS,
+    chunk_overlap=settings.CHUNK_OVERLAP_TOKENS,
+    separators=("\n\n", "\n", ". ", "? ", "! ", "다. ", "。", " ", "")
+)
+
+# CSV - 로더가 행 단위 문서를 만들므로 행 경계를 유지하고 겹침 없이 분할
+TABULAR_PROFILE = ChunkingProfile(
+    name="tabular",
+    chunk_size=settings.CHUNK_SIZE_TOKENS // 2,
+    chunk_overlap=0,
+    separators=("\n", ", ", " ", "")
+)
+
+CHUNKING_PROFILES = {
+    ".pdf": PROSE_PROFILE,
+    ".txt": PROSE_PROFILE,
+    ".html": PROSE_PROFILE,
+    ".csv": TABULAR_PROFILE,
+}
+
+def get_chunking_profile(file_path: str) -> ChunkingProfile:
+    """파일 확장자에 맞는 분할 설정 반환"""
+    return CHUNKING_PROFILES.get(os.path.splitext(file_path)[1].lower(), PROSE_PROFILE)
+
+def token_length(text: str) -> int:
+    """LLM 토크나이저 기준 토큰 수 (컨텍스트 예산 계산과 같은 기준)"""
+    return count_tokens(text, settings.LLM_MODEL_NAME)
+
+@lru_cache(maxsize=None)
+def get_text_splitter(profile: ChunkingProfile) -> RecursiveCharacterTextSplitter:
+    """분할 설정별 텍스트 분할기 제공 (설정별 캐시)"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=profile.chunk_size,
+        chunk_overlap=profile.chunk_overlap,
+        length_function=token_length,
+        separators=list(profile.separators),
+        keep_separator="end"  # 문장 끝 구분자는 앞 청크에 남김
+    )
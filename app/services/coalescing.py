@@ -0,0 +1,110 @@
+from app.core.metrics import metrics
+import asyncio
+import copy
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """진행 중인 공유 요청 (결과 또는 이벤트 스트림)"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+        self.events: List[Any] = []  # 스트림 이벤트 (늦게 합류한 구독자에게 처음부터 재생)
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+
+class SingleFlight:
+    """같은 키의 동시 요청을 하나의 실행으로 합치는 single-flight 그룹
+
+    먼저 도착한 요청(리더)만 실제로 실행하고, 실행이 끝나기 전에 도착한 같은 키의
+    요청은 그 결과를 함께 기다리거나(do) 같은 이벤트 스트림을 구독합니다(stream).
+    호출자가 결과를 수정해도 서로 영향이 없도록 결과는 요청마다 복사해 반환합니다.
+    모든 요청이 취소되면 공유 실행도 취소합니다.
+    """
+
+    def __init__(self, metric_prefix: str = "coalescing"):
+        self.metric_prefix = metric_prefix
+        self._flights: Dict[Hashable, _Flight] = {}
+        metrics.register_gauge(f"{metric_prefix}.in_flight", lambda: len(self._flights))
+
+    def _join(self, key: Hashable, start: Callable[[_Flight], Awaitable[None]]) -> _Flight:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, start))
+            metrics.increment(f"{self.metric_prefix}.leaders")
+        else:
+            metrics.increment(f"{self.metric_prefix}.coalesced")
+        flight.subscribers += 1
+        return flight
+
+    async def _run(self, key: Hashable, flight: _Flight, start: Callable[[_Flight], Awaitable[None]]) -> None:
+        try:
+            await start(flight)
+        except BaseException as e:
+            flight.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            # 완료된 요청은 바로 제거 (이후 요청은 새로 실행)
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    def _leave(self, key: Hashable, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.done:
+            # 기다리는 요청이 모두 떠나면 공유 실행 취소
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.task.cancel()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """같은 키의 실행 중인 요청이 있으면 그 결과를, 없으면 func()를 실행한 결과를 반환"""
+        async def start(flight: _Flight) -> None:
+            flight.events.append(await func())
+
+        flight = self._join(key, start)
+        try:
+            async with flight.changed:
+                await flight.changed.wait_for(lambda: flight.done)
+        finally:
+            self._leave(key, flight)
+
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.events[0])
+
+    async def stream(self, key: Hashable, func: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """같은 키의 실행 중인 스트림이 있으면 구독하고, 없으면 func()의 스트림을 시작해 이벤트 전달"""
+        async def start(flight: _Flight) -> None:
+            async for event in func():
+                async with flight.changed:
+                    flight.events.append(event)
+                    flight.changed.notify_all()
+
+        flight = self._join(key, start)
+        position = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: position < len(flight.events) or flight.done)
+                    pending = flight.events[position:]
+                    finished = flight.done
+                position += len(pending)
+                for event in pending:
+                    yield copy.deepcopy(event)
+                if finished and position >= len(flight.events):
+                    break
+        finally:
+            self._leave(key, flight)
+
+        if flight.error is not None:
+            raise flight.error
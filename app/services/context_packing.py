@@ -0,0 +1,163 @@
+from dataclasses import dataclass, field
+from app.utils.tokens import count_tokens, get_encoding
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 청크 겹침으로 판단할 최소 길이 (문자)
+MIN_OVERLAP_CHARS = 32
+
+# 근접 중복 판단용 문자 shingle 길이
+SHINGLE_SIZE = 5
+
+@dataclass
+class Passage:
+    """프롬프트에 넣을 문맥 단위 (같은 문서의 겹치는 청크는 하나로 병합)"""
+    text: str
+    rank: int  # 검색 순위 (작을수록 관련도 높음)
+    document_id: Optional[str]
+    sources: List[Tuple[Any, Optional[float]]] = field(default_factory=list)  # 원본 (문서, 점수)
+
+@dataclass
+class PackedContext:
+    """문맥 구성 결과"""
+    text: str
+    docs: List[Tuple[Any, Optional[float]]]  # 문맥에 포함된 원본 (문서, 점수)
+    stats: Dict[str, int]
+
+def _overlap_length(first: str, second: str) -> int:
+    """first의 끝과 second의 시작이 겹치는 길이 (없으면 0)"""
+    if len(first) < MIN_OVERLAP_CHARS or len(second) < MIN_OVERLAP_CHARS:
+        return 0
+    probe = second[:MIN_OVERLAP_CHARS]
+    position = first.find(probe)
+    while position != -1:
+        overlap = len(first) - position
+        if second.startswith(first[position:]):
+            return overlap
+        position = first.find(probe, position + 1)
+    return 0
+
+def _try_merge(passage: Passage, other: Passage) -> bool:
+    """같은 문서의 겹치거나 포함 관계인 두 구간을 병합, 병합 여부 반환"""
+    if other.text in passage.text:
+        merged = passage.text
+    elif passage.text in other.text:
+        merged = other.text
+    elif overlap := _overlap_length(passage.text, other.text):
+        merged = passage.text + other.text[overlap:]
+    elif overlap := _overlap_length(other.text, passage.text):
+        merged = other.text + passage.text[overlap:]
+    else:
+        return False
+
+    passage.text = merged
+    passage.rank = min(passage.rank, other.rank)
+    passage.sources.extend(other.sources)
+    return True
+
+def _shingles(text: str) -> Set[str]:
+    normalized = " ".join(text.split()).lower()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+def _jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+def _truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str]) -> str:
+    """토큰 예산에 맞게 텍스트 자르기"""
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return text[:max_tokens * 2]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+def _chunk_tokens(doc: Any, model_name: Optional[str]) -> int:
+    """청크 토큰 수 (수집 시 저장된 token_count 우선 사용)"""
+    token_count = (getattr(doc, "metadata", None) or {}).get("token_count")
+    if isinstance(token_count, int):
+        return token_count
+    return count_tokens(doc.page_content, model_name)
+
+def pack_context(docs: List[Tuple[Any, Optional[float]]], token_budget: int, model_name: Optional[str] = None,
+                 duplicate_threshold: float = 0.9, separator: str = "\n\n") -> PackedContext:
+    """검색된 청크로 토큰 예산 안에서 프롬프트 문맥 구성
+
+    1. 같은 문서에서 겹치거나 포함 관계인 청크를 하나의 구간으로 병합
+    2. 문자 shingle Jaccard 유사도가 임계값 이상인 근접 중복 구간 제거
+    3. 검색 순위 순으로 정렬하여 토큰 예산을 채움 (첫 구간이 예산보다 크면 잘라서 포함)
+
+    Args:
+        docs: 검색 순위 순의 (문서, 관련도 점수) 목록
+        token_budget: 문맥 최대 토큰 수 (0 이하이면 제한 없음)
+    """
+    original_tokens = sum(_chunk_tokens(doc, model_name) for doc, _ in docs)
+
+    # 1. 같은 문서의 겹치는 청크 병합
+    passages: List[Passage] = []
+    merged_count = 0
+    for rank, (doc, score) in enumerate(docs):
+        candidate = Passage(
+            text=doc.page_content,
+            rank=rank,
+            document_id=(doc.metadata or {}).get("document_id"),
+            sources=[(doc, score)]
+        )
+        target = next(
+            (passage for passage in passages
+             if candidate.document_id and passage.document_id == candidate.document_id
+             and _try_merge(passage, candidate)),
+            None
+        )
+        if target is None:
+            passages.append(candidate)
+        else:
+            merged_count += 1
+
+    # 2. 근접 중복 제거 (순위가 높은 구간 유지)
+    passages.sort(key=lambda passage: passage.rank)
+    unique: List[Passage] = []
+    unique_shingles: List[Set[str]] = []
+    duplicates_removed = 0
+    for passage in passages:
+        shingles = _shingles(passage.text)
+        if any(_jaccard(shingles, kept) >= duplicate_threshold for kept in unique_shingles):
+            duplicates_removed += 1
+            continue
+        unique.append(passage)
+        unique_shingles.append(shingles)
+
+    # 3. 토큰 예산 채우기
+    separator_tokens = count_tokens(separator, model_name)
+    selected: List[str] = []
+    selected_docs: List[Tuple[Any, Optional[float]]] = []
+    used_tokens = 0
+    dropped_for_budget = 0
+    for passage in unique:
+        tokens = count_tokens(passage.text, model_name)
+        cost = tokens + (separator_tokens if selected else 0)
+        if token_budget > 0 and used_tokens + cost > token_budget:
+            if selected:
+                dropped_for_budget += 1
+                continue
+            # 가장 관련도 높은 구간은 잘라서라도 포함
+            passage.text = _truncate_to_tokens(passage.text, token_budget, model_name)
+            cost = count_tokens(passage.text, model_name)
+        selected.append(passage.text)
+        selected_docs.extend(passage.sources)
+        used_tokens += cost
+
+    stats = {
+        "tokens": used_tokens,
+        "tokens_before_packing": original_tokens,
+        "tokens_saved": max(0, original_tokens - used_tokens),
+        "chunks_retrieved": len(docs),
+        "passages": len(selected),
+        "chunks_merged": merged_count,
+        "duplicates_removed": duplicates_removed,
+        "dropped_for_budget": dropped_for_budget
+    }
+    return PackedContext(text=separator.join(selected), docs=selected_docs, stats=stats)
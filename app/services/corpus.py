@@ -0,0 +1,49 @@
+from functools import lru_cache
+import threading
+import logging
+from typing import Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+class CorpusState:
+    """문서 코퍼스 버전 및 변경 알림 관리
+
+    문서가 추가/갱신/삭제될 때마다 버전이 증가하며,
+    등록된 리스너(캐시 등)에 변경된 문서 ID 목록을 전달합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._listeners: List[Callable[[List[str]], None]] = []
+
+    @property
+    def version(self) -> int:
+        """현재 코퍼스 버전"""
+        return self._version
+
+    def subscribe(self, listener: Callable[[List[str]], None]) -> None:
+        """코퍼스 변경 리스너 등록"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def notify_changed(self, document_ids: Iterable[str]) -> int:
+        """문서 변경 알림, 새 코퍼스 버전 반환"""
+        document_ids = list(document_ids)
+        with self._lock:
+            self._version += 1
+            version = self._version
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(document_ids)
+            except Exception as e:
+                logger.warning(f"코퍼스 변경 리스너 실행 중 오류: {e}")
+
+        return version
+
+@lru_cache(maxsize=1)
+def get_corpus_state() -> CorpusState:
+    """코퍼스 상태 인스턴스 제공 (싱글톤)"""
+    return CorpusState()
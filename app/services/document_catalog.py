@@ -0,0 +1,241 @@
+from functools import lru_cache
+from collections import defaultdict
+from datetime import datetime
+from app.core.config import settings
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 정렬 가능한 컬럼 (각 컬럼에 (컬럼, document_id) 인덱스가 있어 키셋 페이지네이션이 O(page))
+SORTABLE_COLUMNS = ("created_at", "updated_at", "filename", "chunks_count", "size_bytes")
+
+def _to_timestamp(value: Any) -> float:
+    """datetime/ISO 문자열/숫자를 epoch 초로 변환"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return time.time()
+
+def encode_cursor(sort_value: Any, document_id: str) -> str:
+    """다음 페이지 커서 생성"""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, document_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """커서 해석, 잘못된 커서면 ValueError"""
+    try:
+        sort_value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"잘못된 커서입니다: {cursor}") from e
+    return sort_value, document_id
+
+class DocumentCatalog:
+    """문서 목록 색인 (SQLite)
+
+    문서 메타데이터, 청크 수, 파일 크기, 내용 해시를 저장하며
+    문서 처리/갱신/삭제 시 트랜잭션 단위로 기록합니다.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    description TEXT,
+                    metadata TEXT NOT NULL DEFAULT '{}',
+                    chunks_count INTEGER NOT NULL DEFAULT 0,
+                    size_bytes INTEGER NOT NULL DEFAULT 0,
+                    sha256 TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            for column in SORTABLE_COLUMNS:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_documents_{column} ON documents ({column}, document_id)"
+                )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_sha256 ON documents (sha256)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def upsert(self, document: Dict[str, Any]) -> None:
+        """문서 정보 저장 (있으면 갱신)"""
+        self.upsert_many([document])
+
+    def upsert_many(self, documents: Iterable[Dict[str, Any]]) -> None:
+        """여러 문서 정보를 한 트랜잭션으로 저장"""
+        rows = []
+        for document in documents:
+            metadata = document.get("metadata") or {}
+            created_at = _to_timestamp(document.get("created_at"))
+            # 정렬 컬럼은 NULL 없이 저장 (키셋 비교에서 NULL 행이 누락되지 않도록)
+            updated_at = _to_timestamp(document["updated_at"]) if document.get("updated_at") else created_at
+            rows.append((
+                document["document_id"],
+                document["filename"],
+                document.get("description"),
+                json.dumps(metadata, ensure_ascii=False, default=str),
+                document.get("chunks_count") or 0,
+                document.get("size_bytes") or metadata.get("size_bytes") or 0,
+                document.get("sha256") or metadata.get("sha256"),
+                created_at,
+                updated_at
+            ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (document_id, filename, description, metadata, chunks_count, "
+                "size_bytes, sha256, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def update_chunks_count(self, document_id: str, chunks_count: int) -> None:
+        """청크 수 갱신"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE documents SET chunks_count = ?, updated_at = ? WHERE document_id = ?",
+                (chunks_count, time.time(), document_id)
+            )
+
+    def delete(self, document_ids: List[str]) -> int:
+        """문서 정보 삭제, 삭제된 행 수 반환"""
+        if not document_ids:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "DELETE FROM documents WHERE document_id = ?", [(document_id,) for document_id in document_ids]
+            )
+            return cursor.rowcount
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """문서 정보 조회"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+        return self._to_info(row) if row else None
+
+    def find_by_hash(self, sha256: str, exclude_document_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """내용 해시가 같은 문서 조회"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE sha256 = ? AND document_id != ? LIMIT 1",
+                (sha256, exclude_document_id or "")
+            ).fetchone()
+        return self._to_info(row) if row else None
+
+    def list(self, limit: int = 50, cursor: Optional[str] = None, sort: str = "created_at",
+             order: str = "desc", filename: Optional[str] = None, created_after: Optional[datetime] = None,
+             created_before: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """문서 목록 조회 (키셋 페이지네이션), (문서 목록, 다음 페이지 커서) 반환
+
+        - filename: 파일명 접두사
+        - created_after / created_before: 생성 시간 범위
+        """
+        if sort not in SORTABLE_COLUMNS:
+            raise ValueError(f"정렬할 수 없는 컬럼입니다: {sort} (가능한 값: {', '.join(SORTABLE_COLUMNS)})")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"정렬 순서는 asc 또는 desc여야 합니다: {order}")
+
+        conditions = []
+        params: List[Any] = []
+        if filename:
+            conditions.append("filename >= ? AND filename < ?")
+            params.extend([filename, filename + "\uffff"])
+        if created_after:
+            conditions.append("created_at >= ?")
+            params.append(created_after.timestamp())
+        if created_before:
+            conditions.append("created_at < ?")
+            params.append(created_before.timestamp())
+        if cursor:
+            sort_value, last_document_id = decode_cursor(cursor)
+            comparison = "<" if order == "desc" else ">"
+            conditions.append(f"({sort}, document_id) {comparison} (?, ?)")
+            params.extend([sort_value, last_document_id])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = order.upper()
+        sql = (
+            f"SELECT * FROM documents {where} "
+            f"ORDER BY {sort} {direction}, document_id {direction} LIMIT ?"
+        )
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort], rows[-1]["document_id"])
+        return [self._to_info(row) for row in rows], next_cursor
+
+    def _to_info(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "document_id": row["document_id"],
+            "filename": row["filename"],
+            "description": row["description"],
+            "metadata": json.loads(row["metadata"] or "{}"),
+            "chunks_count": row["chunks_count"],
+            "size_bytes": row["size_bytes"],
+            "sha256": row["sha256"],
+            "created_at": datetime.fromtimestamp(row["created_at"]),
+            "updated_at": datetime.fromtimestamp(row["updated_at"])
+        }
+
+    def rebuild_from_vector_store(self, vector_store) -> None:
+        """Vector Store 청크 메타데이터로 목록 재구성 (목록 색인이 없던 기존 데이터용)"""
+        data = vector_store.get(include=["metadatas"])
+        chunk_counts: Dict[str, int] = defaultdict(int)
+        first_metadata: Dict[str, Dict[str, Any]] = {}
+        for metadata in data.get("metadatas") or []:
+            document_id = (metadata or {}).get("document_id")
+            if not document_id:
+                continue
+            chunk_counts[document_id] += 1
+            first_metadata.setdefault(document_id, metadata)
+
+        self.upsert_many(
+            {
+                "document_id": document_id,
+                "filename": metadata.get("filename") or document_id,
+                "description": metadata.get("description"),
+                "metadata": {
+                    key: value for key, value in metadata.items()
+                    if key not in ("page", "chunk_hash", "token_count")
+                },
+                "chunks_count": chunk_counts[document_id],
+                "created_at": metadata.get("created_at"),
+                "updated_at": metadata.get("updated_at")
+            }
+            for document_id, metadata in first_metadata.items()
+        )
+        if first_metadata:
+            logger.info(f"Vector Store에서 문서 {len(first_metadata)}개로 문서 목록을 재구성했습니다.")
+
+@lru_cache(maxsize=1)
+def get_document_catalog() -> DocumentCatalog:
+    """문서 목록 색인 인스턴스 제공 (싱글톤)"""
+    return DocumentCatalog(db_path=settings.DOCUMENT_CATALOG_PATH)
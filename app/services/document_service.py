@@ -1,24 +1,152 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from functools import lru_cache
 from langchain_community.document_loaders import TextLoader, PyPDFLoader, CSVLoader, UnstructuredHTMLLoader
 from langchain_community.vectorstores import Chroma
 from app.services.embeddings import get_embeddings_service
+from app.services.vector_store import get_vector_store
+from app.services.lexical_index import get_lexical_index
+from app.services.corpus import get_corpus_state
+from app.services.parsing import iter_document_pages
+from app.services.chunking import ChunkingProfile, PROSE_PROFILE, get_chunking_profile, get_text_splitter, token_length
+from app.services.document_catalog import get_document_catalog
 from app.core.config import settings
-from app.exceptions import DocumentProcessingError, InvalidFileFormatError
+from app.core.metrics import metrics
+from app.utils.tokens import count_tokens
+from app.exceptions import DocumentNotFoundError, DocumentProcessingError, FileTooLargeError, InvalidFileFormatError
+import asyncio
+import hashlib
+import json
 import os
+import sqlite3
+import time
 import uuid
 import shutil
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple, AsyncIterator
+
+# 지원하는 문서 형식
+SUPPORTED_FORMATS = ['.pdf', '.txt', '.csv', '.html']
+
+# 진행 상황 콜백 (예: {"pages_parsed": 10}, {"chunks_embedded": 64})
+ProgressCallback = Callable[[Dict[str, int]], None]
 
 logger = logging.getLogger(__name__)
 
+def sanitize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Vector Store에 저장 가능한 형태로 메타데이터 변환
+    
+    Chroma는 str/int/float/bool 값만 허용하므로 None은 제외하고
+    리스트/딕셔너리 등은 JSON 문자열로 저장합니다.
+    """
+    sanitized = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            sanitized[key] = value
+        else:
+            sanitized[key] = json.dumps(value, ensure_ascii=False, default=str)
+    return sanitized
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(chunk_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+def content_hash(text: str) -> str:
+    """청크 내용의 SHA-256 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def make_chunk_id(document_id: str, chunk_hash: str) -> str:
+    """문서 ID와 청크 해시로 결정적인 청크 ID 생성 (재수집 시 같은 ID로 upsert)"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document_id}:{chunk_hash}"))
+
+# 문서별 잠금 (같은 문서에 대한 처리/갱신/삭제가 겹치지 않도록 직렬화)
+_document_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _get_document_lock(document_id: str) -> asyncio.Lock:
+    lock = _document_locks.get(document_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _document_locks[document_id] = lock
+    return lock
+
+# 파일 내용 해시별 잠금 (같은 내용의 업로드가 동시에 들어와도 중복 확인과 수집을 한 번에 하나씩 처리)
+_content_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _get_content_lock(sha256: str) -> asyncio.Lock:
+    lock = _content_locks.get(sha256)
+    if lock is None:
+        lock = asyncio.Lock()
+        _content_locks[sha256] = lock
+    return lock
+
+class _VectorStoreGate:
+    """Vector Store 쓰기와 VACUUM의 상호 배제 (쓰기끼리는 동시에, VACUUM은 쓰기가 없을 때 단독으로 실행)"""
+    
+    def __init__(self):
+        self._changed = asyncio.Condition()
+        self._writers = 0
+        self._maintenance = False  # VACUUM 중이거나 진행 중인 쓰기가 끝나기를 기다리는 중
+    
+    @asynccontextmanager
+    async def write(self):
+        async with self._changed:
+            # VACUUM이 대기 중이면 새 쓰기는 VACUUM 뒤로 (VACUUM이 계속 밀리지 않도록)
+            await self._changed.wait_for(lambda: not self._maintenance)
+            self._writers += 1
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._writers -= 1
+                self._changed.notify_all()
+    
+    @asynccontextmanager
+    async def exclusive(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: not self._maintenance)
+            self._maintenance = True
+            try:
+                await self._changed.wait_for(lambda: self._writers == 0)
+            except BaseException:
+                self._maintenance = False
+                self._changed.notify_all()
+                raise
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._maintenance = False
+                self._changed.notify_all()
+
+_vector_store_gate = _VectorStoreGate()
+
+@asynccontextmanager
+async def _document_write(document_id: str):
+    """문서 처리/갱신/삭제 구간 (VACUUM과 겹치지 않고, 같은 문서끼리는 직렬화)"""
+    async with _vector_store_gate.write():
+        async with _get_document_lock(document_id):
+            yield
+
 class DocumentService:
     """문서 관리 서비스 클래스"""
     
-    def __init__(self, embeddings=None):
+    def __init__(self, embeddings=None, lexical_index=None, catalog=None, vector_store=None):
         self.embeddings = embeddings or get_embeddings_service()
+        self.vector_store = vector_store or get_vector_store()
+        self.lexical_index = lexical_index or (get_lexical_index() if settings.HYBRID_SEARCH_ENABLED else None)
+        self.catalog = catalog or get_document_catalog()
         self.vector_store_dir = settings.VECTOR_STORE_DIR
+        self.embedding_batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.pipeline_queue_size = settings.INGESTION_QUEUE_SIZE
+        self.max_upload_size = settings.MAX_UPLOAD_SIZE
+        self.upload_chunk_size = settings.UPLOAD_CHUNK_SIZE
         
         # 벡터 스토어 디렉토리 생성
         os.makedirs(self.vector_store_dir, exist_ok=True)
@@ -26,6 +154,107 @@ class DocumentService:
         # 문서 저장 디렉토리 생성
         self.documents_dir = os.path.join("data", "documents")
         os.makedirs(self.documents_dir, exist_ok=True)
+        
+        # 갱신용 업로드 임시 저장 디렉토리 (문서 디렉토리와 같은 파일 시스템이므로 이동만으로 교체)
+        self.incoming_dir = os.path.join(self.documents_dir, ".incoming")
+        os.makedirs(self.incoming_dir, exist_ok=True)
+    
+    @staticmethod
+    def validate_file_format(filename: str) -> None:
+        """지원하는 파일 형식인지 확인"""
+        if os.path.splitext(filename)[1].lower() not in SUPPORTED_FORMATS:
+            raise InvalidFileFormatError(
+                f"지원하지 않는 파일 형식입니다. 지원되는 형식: {', '.join(SUPPORTED_FORMATS)}"
+            )
+    
+    async def save_upload(self, upload, original_filename: str) -> Dict[str, Any]:
+        """업로드 파일을 문서 저장 위치로 스트리밍 저장
+        
+        upload는 read(size)를 제공하는 객체(StreamingMultipartForm 등)입니다.
+        파일 전체를 메모리에 올리지 않고 청크 단위로 읽어 최종 위치에 바로 기록하며,
+        기록하는 동안 SHA-256 해시를 계산합니다. 최대 크기를 넘으면 즉시 중단합니다.
+        
+        Returns:
+            document_id, file_path, sha256, size_bytes
+        """
+        self.validate_file_format(original_filename)
+        
+        document_id = str(uuid.uuid4())
+        document_dir = os.path.join(self.documents_dir, document_id)
+        os.makedirs(document_dir, exist_ok=True)
+        target_file_path = os.path.join(document_dir, os.path.basename(original_filename))
+        
+        try:
+            file_hash, size = await self._stream_upload(upload, target_file_path)
+        except Exception:
+            shutil.rmtree(document_dir, ignore_errors=True)
+            raise
+        
+        return {
+            "document_id": document_id,
+            "file_path": target_file_path,
+            "sha256": file_hash,
+            "size_bytes": size
+        }
+    
+    async def stage_upload(self, upload, original_filename: str) -> Dict[str, Any]:
+        """문서 갱신용 업로드 파일을 임시 위치로 스트리밍 저장 (update_document에 전달)
+        
+        Returns:
+            file_path, sha256, size_bytes
+        """
+        self.validate_file_format(original_filename)
+        
+        # 파싱 형식 판별을 위해 확장자 유지
+        extension = os.path.splitext(original_filename)[1].lower()
+        staged_path = os.path.join(self.incoming_dir, f"{uuid.uuid4().hex}{extension}")
+        file_hash, size = await self._stream_upload(upload, staged_path)
+        
+        return {
+            "file_path": staged_path,
+            "sha256": file_hash,
+            "size_bytes": size
+        }
+    
+    @staticmethod
+    def discard_upload(saved: Dict[str, Any]) -> None:
+        """저장했지만 사용하지 않을 업로드 파일 삭제 (save_upload는 문서 디렉토리째 삭제)"""
+        if saved.get("document_id"):
+            shutil.rmtree(os.path.dirname(saved["file_path"]), ignore_errors=True)
+        elif os.path.exists(saved["file_path"]):
+            os.unlink(saved["file_path"])
+    
+    async def _stream_upload(self, upload, target_file_path: str) -> Tuple[str, int]:
+        """업로드 파일을 청크 단위로 기록하며 SHA-256 계산, (해시, 크기) 반환"""
+        sha256 = hashlib.sha256()
+        size = 0
+        start_time = time.perf_counter()
+        
+        try:
+            with open(target_file_path, "wb") as target_file:
+                while True:
+                    chunk = await upload.read(self.upload_chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_upload_size:
+                        raise FileTooLargeError(
+                            f"업로드 파일이 최대 크기({self.max_upload_size} bytes)를 초과했습니다."
+                        )
+                    sha256.update(chunk)
+                    await asyncio.to_thread(target_file.write, chunk)
+        except Exception:
+            if os.path.exists(target_file_path):
+                os.unlink(target_file_path)
+            raise
+        
+        elapsed = time.perf_counter() - start_time
+        metrics.increment("upload.bytes", size)
+        if elapsed > 0:
+            metrics.observe("upload.bytes_per_second", size / elapsed)
+        logger.info(f"업로드 저장 완료: {target_file_path} ({size} bytes, {elapsed:.2f}초)")
+        
+        return sha256.hexdigest(), size
     
     def load_document(self, file_path: str) -> List[Any]:
         """다양한 형식의 문서를 로드하는 함수"""
@@ -48,45 +277,64 @@ class DocumentService:
             return loader.load()
             
         else:
-            supported_formats = ['.pdf', '.txt', '.csv', '.html']
             raise InvalidFileFormatError(
-                f"지원하지 않는 파일 형식입니다. 지원되는 형식: {', '.join(supported_formats)}"
+                f"지원하지 않는 파일 형식입니다. 지원되는 형식: {', '.join(SUPPORTED_FORMATS)}"
             )
     
-    def split_documents(self, documents: List[Any], chunk_size: int = 1000, chunk_overlap: int = 200) -> List[Any]:
-        """문서를 청크로 분할하는 함수"""
-        logger.info(f"문서를 청크로 분할 중 (chunk_size={chunk_size}, chunk_overlap={chunk_overlap})")
-        
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+    def split_documents(self, documents: List[Any], profile: ChunkingProfile = PROSE_PROFILE) -> List[Any]:
+        """문서를 토큰 단위 청크로 분할하는 함수 (각 청크 메타데이터에 token_count 저장)"""
+        logger.info(
+            f"문서를 청크로 분할 중 (profile={profile.name}, chunk_size={profile.chunk_size}, "
+            f"chunk_overlap={profile.chunk_overlap} tokens)"
         )
         
-        chunks = text_splitter.split_documents(documents)
+        chunks = get_text_splitter(profile).split_documents(documents)
+        for chunk in chunks:
+            chunk.metadata["token_count"] = token_length(chunk.page_content)
+        
         logger.info(f"총 {len(documents)}개의 문서가 {len(chunks)}개의 청크로 분할되었습니다.")
         return chunks
     
     async def process_document(self, file_path: str, original_filename: str, description: Optional[str] = None, 
-                              metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """문서 처리 및 벡터 스토어에 추가"""
-        try:
+                              metadata: Optional[Dict[str, Any]] = None,
+                              progress: Optional[ProgressCallback] = None,
+                              document_id: Optional[str] = None) -> Dict[str, Any]:
+        """문서 처리 및 벡터 스토어에 추가
+        
+        블로킹 작업(파싱, 분할, 임베딩/저장)은 스레드에서 실행하며,
+        progress 콜백으로 파싱된 페이지 수와 임베딩된 청크 수를 알립니다.
+        document_id를 지정하면 file_path가 이미 문서 저장 위치에 있는 것으로 보고 복사하지 않습니다.
+        같은 문서의 갱신/삭제와 겹치지 않도록 문서별 잠금을 잡고 처리합니다.
+        """
+        copy_file = document_id is None
+        if copy_file:
             # 문서 ID 생성
             document_id = str(uuid.uuid4())
+        
+        async with _document_write(document_id):
+            return await self._process_document(file_path, original_filename, description, metadata,
+                                                progress, document_id, copy_file)
+    
+    async def _process_document(self, file_path: str, original_filename: str, description: Optional[str],
+                                metadata: Optional[Dict[str, Any]], progress: Optional[ProgressCallback],
+                                document_id: str, copy_file: bool) -> Dict[str, Any]:
+        report = progress or (lambda update: None)
+        
+        try:
+            if copy_file:
+                # 문서 저장 경로 생성
+                document_dir = os.path.join(self.documents_dir, document_id)
+                os.makedirs(document_dir, exist_ok=True)
+                
+                # 파일 복사
+                target_file_path = os.path.join(document_dir, original_filename)
+                await asyncio.to_thread(shutil.copy2, file_path, target_file_path)
+            else:
+                # save_upload로 저장된 파일 사용
+                document_dir = os.path.join(self.documents_dir, document_id)
+                target_file_path = file_path
             
-            # 문서 저장 경로 생성
-            document_dir = os.path.join(self.documents_dir, document_id)
-            os.makedirs(document_dir, exist_ok=True)
-            
-            # 파일 복사
-            target_file_path = os.path.join(document_dir, original_filename)
-            shutil.copy2(file_path, target_file_path)
-            
-            # 문서 로드
-            documents = self.load_document(target_file_path)
-            
-            # 문서에 메타데이터 추가
+            # 문서에 추가할 메타데이터
             doc_metadata = metadata or {}
             doc_metadata.update({
                 "document_id": document_id,
@@ -96,31 +344,50 @@ class DocumentService:
                 "created_at": datetime.now().isoformat()
             })
             
-            for doc in documents:
-                doc.metadata.update(doc_metadata)
+            # 파일 내용 해시 (업로드 시 계산된 값이 있으면 재사용)
+            if not doc_metadata.get("sha256"):
+                doc_metadata["sha256"] = await asyncio.to_thread(hash_file, target_file_path)
             
-            # 문서 분할
-            chunks = self.split_documents(documents)
+            vector_store = self.vector_store
             
-            # Vector Store 생성/로드
-            vector_store = Chroma(
-                persist_directory=self.vector_store_dir,
-                embedding_function=self.embeddings
-            )
+            # 같은 내용의 문서가 이미 있으면 다시 임베딩하지 않고 기존 문서 정보 반환
+            # (같은 내용을 동시에 수집하지 않도록 색인에 기록할 때까지 내용 해시별 잠금 유지)
+            async with _get_content_lock(doc_metadata["sha256"]):
+                duplicate = await asyncio.to_thread(
+                    self.catalog.find_by_hash, doc_metadata["sha256"], exclude_document_id=document_id
+                )
+                if duplicate is not None:
+                    await asyncio.to_thread(shutil.rmtree, document_dir, True)
+                    logger.info(f"중복 문서 업로드: {original_filename} → 기존 문서 {duplicate['document_id']}")
+                    metrics.increment("ingestion.duplicate_documents")
+                    return duplicate
+                
+                # 파싱 → 분할 → 임베딩 → 저장 파이프라인 실행
+                chunks_count = await self._run_ingestion_pipeline(target_file_path, doc_metadata, vector_store, report)
+                await asyncio.to_thread(vector_store.persist)
+                if self.lexical_index is not None:
+                    await asyncio.to_thread(self.lexical_index.save)
+                logger.info(f"문서 처리 완료: {original_filename} (청크 {chunks_count}개)")
+                
+                # 문서 목록 색인에 기록
+                document_info = {
+                    "document_id": document_id,
+                    "filename": original_filename,
+                    "description": description,
+                    "metadata": doc_metadata,
+                    "created_at": datetime.now(),
+                    "updated_at": datetime.now(),
+                    "chunks_count": chunks_count,
+                    "size_bytes": doc_metadata.get("size_bytes") or os.path.getsize(target_file_path),
+                    "sha256": doc_metadata["sha256"]
+                }
+                await asyncio.to_thread(self.catalog.upsert, document_info)
             
-            # 청크 추가
-            vector_store.add_documents(chunks)
-            vector_store.persist()
+            # 코퍼스 변경 알림 (답변 캐시 무효화 등)
+            get_corpus_state().notify_changed([document_id])
             
             # 응답 생성
-            return {
-                "document_id": document_id,
-                "filename": original_filename,
-                "description": description,
-                "metadata": doc_metadata,
-                "created_at": datetime.now(),
-                "chunks_count": len(chunks)
-            }
+            return document_info
             
         except Exception as e:
             # 오류 발생 시 생성된 디렉토리 정리
@@ -130,6 +397,15 @@ class DocumentService:
             except Exception as cleanup_error:
                 logger.error(f"문서 디렉토리 정리 중 오류: {cleanup_error}")
             
+            # 일부 배치만 저장된 경우 저장된 청크 제거
+            try:
+                if 'vector_store' in locals():
+                    await asyncio.to_thread(vector_store._collection.delete, where={"document_id": document_id})
+                if self.lexical_index is not None and document_id:
+                    await asyncio.to_thread(self.lexical_index.remove_document, document_id)
+            except Exception as cleanup_error:
+                logger.error(f"부분 저장된 청크 정리 중 오류: {cleanup_error}")
+            
             # 적절한 예외 발생
             if isinstance(e, InvalidFileFormatError):
                 raise
@@ -137,68 +413,537 @@ class DocumentService:
                 logger.error(f"문서 처리 중 오류: {e}")
                 raise DocumentProcessingError(f"문서 처리 중 오류 발생: {str(e)}")
     
-    async def get_all_documents(self) -> List[Dict[str, Any]]:
-        """모든 문서 목록 조회"""
-        documents = []
+    async def _iter_unique_chunks(self, file_path: str,
+                                  doc_metadata: Dict[str, Any]) -> AsyncIterator[Tuple[int, List[Any]]]:
+        """파싱된 페이지 묶음마다 (페이지 수, 청크 목록) 반환
+        
+        청크 메타데이터에 문서 메타데이터와 chunk_hash를 추가하고, 문서 내 중복 청크는 제외합니다.
+        """
+        seen_hashes = set()
+        profile = get_chunking_profile(file_path)
+        async for pages in iter_document_pages(file_path):
+            for doc in pages:
+                doc.metadata.update(doc_metadata)
+            chunks = []
+            for chunk in await asyncio.to_thread(self.split_documents, pages, profile):
+                chunk_hash = content_hash(chunk.page_content)
+                if chunk_hash in seen_hashes:
+                    continue
+                seen_hashes.add(chunk_hash)
+                chunk.metadata["chunk_hash"] = chunk_hash
+                chunks.append(chunk)
+            yield len(pages), chunks
+    
+    async def _run_ingestion_pipeline(self, file_path: str, doc_metadata: Dict[str, Any], vector_store: Chroma,
+                                      report: ProgressCallback) -> int:
+        """파싱 → 분할 → 임베딩 → 저장 단계를 크기 제한 큐로 연결해 실행, 저장된 청크 수 반환
         
+        각 단계는 별도 태스크로 동시에 실행되므로 N번째 배치를 임베딩하는 동안
+        N+1번째 배치를 파싱/분할하고 N-1번째 배치를 저장합니다.
+        큐 크기가 제한되어 있어 메모리 사용량은 문서 크기와 관계없이 일정합니다.
+        """
+        document_id = doc_metadata["document_id"]
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        counts = {"pages_parsed": 0, "chunks_total": 0, "chunks_embedded": 0}
+        
+        async def parse_and_split() -> None:
+            buffer = []
+            async for page_count, chunks in self._iter_unique_chunks(file_path, doc_metadata):
+                buffer.extend(chunks)
+                counts["pages_parsed"] += page_count
+                report({"pages_parsed": counts["pages_parsed"]})
+                while len(buffer) >= self.embedding_batch_size:
+                    batch, buffer = buffer[:self.embedding_batch_size], buffer[self.embedding_batch_size:]
+                    counts["chunks_total"] += len(batch)
+                    report({"chunks_total": counts["chunks_total"]})
+                    await embed_queue.put(batch)
+            if buffer:
+                counts["chunks_total"] += len(buffer)
+                report({"chunks_total": counts["chunks_total"]})
+                await embed_queue.put(buffer)
+            await embed_queue.put(None)
+        
+        async def embed() -> None:
+            while (batch := await embed_queue.get()) is not None:
+                vectors = await self.embeddings.aembed_documents([chunk.page_content for chunk in batch])
+                await write_queue.put((batch, vectors))
+            await write_queue.put(None)
+        
+        async def write() -> None:
+            while (item := await write_queue.get()) is not None:
+                batch, vectors = item
+                # BM25 색인과 공유하는 결정적 청크 ID
+                ids = [make_chunk_id(document_id, chunk.metadata["chunk_hash"]) for chunk in batch]
+                metadatas = [sanitize_metadata(chunk.metadata) for chunk in batch]
+                texts = [chunk.page_content for chunk in batch]
+                await asyncio.to_thread(
+                    vector_store._collection.upsert,
+                    ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas
+                )
+                if self.lexical_index is not None:
+                    await asyncio.to_thread(self.lexical_index.add_chunks, ids, texts, metadatas, False)
+                counts["chunks_embedded"] += len(batch)
+                report({"chunks_embedded": counts["chunks_embedded"]})
+        
+        tasks = [asyncio.create_task(stage()) for stage in (parse_and_split, embed, write)]
         try:
-            # 문서 디렉토리 순회
-            for doc_id in os.listdir(self.documents_dir):
-                doc_path = os.path.join(self.documents_dir, doc_id)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # 한 단계가 실패하면 나머지 단계도 중단 (큐 대기 상태로 남지 않도록)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        return counts["chunks_embedded"]
+    
+    async def update_document(self, document_id: str, staged: Dict[str, Any], original_filename: str,
+                              description: Optional[str] = None,
+                              metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """문서 갱신 (변경된 청크만 다시 임베딩)
+        
+        staged는 stage_upload로 저장한 새 파일 정보이며, 성공하면 문서 디렉토리로 이동하고
+        실패하면 삭제합니다.
+        새 파일을 파싱해 기존 청크와 chunk_hash를 비교하고, 새로 생기거나 바뀐 청크만 임베딩합니다.
+        사라진 청크는 삭제하고 유지되는 청크는 메타데이터만 갱신합니다.
+        새 청크를 모두 기록한 뒤 사라진 청크를 지우므로 갱신 중에도 문서 내용이 비지 않습니다.
+        임베딩을 모두 계산한 뒤 원본 파일, BM25 색인, 문서 목록을 갱신하고 Vector Store는 마지막에 반영하며,
+        도중에 실패하면 이미 반영한 단계를 이전 상태로 되돌립니다.
+        """
+        document_dir = os.path.join(self.documents_dir, document_id)
+        vector_store = self.vector_store
+        incoming_path = staged["file_path"]
+        file_hash, size = staged["sha256"], staged["size_bytes"]
+        
+        async with _document_write(document_id):
+            try:
+                existing = await asyncio.to_thread(
+                    vector_store._collection.get, where={"document_id": document_id}, include=["metadatas"]
+                )
+            except Exception:
+                self.discard_upload(staged)
+                raise
+            existing_ids = existing.get("ids") or []
+            existing_metadatas = [metadata or {} for metadata in existing.get("metadatas") or []]
+            if not existing_ids and not os.path.exists(document_dir):
+                self.discard_upload(staged)
+                raise DocumentNotFoundError(f"문서 ID {document_id}를 찾을 수 없습니다.")
+            os.makedirs(document_dir, exist_ok=True)
+            
+            # 실패하면 역순으로 실행할 복구 작업 (Vector Store는 마지막에 반영하고 스스로 복구)
+            undo: List[Callable[[], None]] = []
+            try:
+                previous = existing_metadatas[0] if existing_metadatas else {}
+                target_file_path = os.path.join(document_dir, os.path.basename(original_filename))
+                doc_metadata = dict(metadata or {})
+                doc_metadata.update({
+                    "document_id": document_id,
+                    "filename": original_filename,
+                    "description": description if description is not None else previous.get("description"),
+                    "source": target_file_path,
+                    "created_at": previous.get("created_at") or datetime.now().isoformat(),
+                    "updated_at": datetime.now().isoformat(),
+                    "sha256": file_hash,
+                    "size_bytes": size
+                })
+                
+                # 새 청크 목록과 기존 청크 해시 비교
+                new_chunks = []
+                async for _, chunks in self._iter_unique_chunks(incoming_path, doc_metadata):
+                    new_chunks.extend(chunks)
+                new_hashes = {chunk.metadata["chunk_hash"] for chunk in new_chunks}
+                existing_by_hash = {
+                    metadata["chunk_hash"]: chunk_id
+                    for chunk_id, metadata in zip(existing_ids, existing_metadatas)
+                    if metadata.get("chunk_hash")
+                }
+                kept = [chunk for chunk in new_chunks if chunk.metadata["chunk_hash"] in existing_by_hash]
+                added = [chunk for chunk in new_chunks if chunk.metadata["chunk_hash"] not in existing_by_hash]
+                removed_ids = [
+                    chunk_id for chunk_id, metadata in zip(existing_ids, existing_metadatas)
+                    if metadata.get("chunk_hash") not in new_hashes
+                ]
+                
+                # 새로 생기거나 바뀐 청크만 임베딩
+                added_ids = [make_chunk_id(document_id, chunk.metadata["chunk_hash"]) for chunk in added]
+                added_vectors = []
+                for start in range(0, len(added), self.embedding_batch_size):
+                    batch = added[start:start + self.embedding_batch_size]
+                    added_vectors.extend(await self.embeddings.aembed_documents([chunk.page_content for chunk in batch]))
+                
+                kept_ids = [existing_by_hash[chunk.metadata["chunk_hash"]] for chunk in kept]
+                previous_by_id = dict(zip(existing_ids, existing_metadatas))
+                kept_previous = [previous_by_id[chunk_id] for chunk_id in kept_ids]
                 
-                # 디렉토리인 경우만 처리
-                if os.path.isdir(doc_path):
+                # 원본 파일 교체 (기존 파일은 갱신이 끝날 때까지 보관)
+                backups = await asyncio.to_thread(
+                    self._swap_document_file, document_dir, incoming_path, target_file_path
+                )
+                undo.append(lambda: self._restore_document_files(target_file_path, backups))
+                
+                # BM25 색인 교체 (잠금 안에서 한 번에 교체)
+                if self.lexical_index is not None:
+                    previous_chunks = [
+                        (chunk_id, chunk) for chunk_id in existing_ids
+                        if (chunk := self.lexical_index.get_chunk(chunk_id)) is not None
+                    ]
+                    await asyncio.to_thread(
+                        self.lexical_index.replace_document,
+                        document_id,
+                        kept_ids + added_ids,
+                        [chunk.page_content for chunk in kept + added],
+                        [sanitize_metadata(chunk.metadata) for chunk in kept + added]
+                    )
+                    undo.append(lambda: self.lexical_index.replace_document(
+                        document_id,
+                        [chunk_id for chunk_id, _ in previous_chunks],
+                        [chunk["text"] for _, chunk in previous_chunks],
+                        [chunk["metadata"] for _, chunk in previous_chunks]
+                    ))
+                
+                # 문서 목록 색인 갱신
+                previous_info = await asyncio.to_thread(self.catalog.get, document_id)
+                await asyncio.to_thread(self.catalog.upsert, {
+                    "document_id": document_id,
+                    "filename": original_filename,
+                    "description": doc_metadata["description"],
+                    "metadata": doc_metadata,
+                    "created_at": doc_metadata["created_at"],
+                    "updated_at": doc_metadata["updated_at"],
+                    "chunks_count": len(new_chunks),
+                    "size_bytes": size,
+                    "sha256": file_hash
+                })
+                if previous_info is not None:
+                    undo.append(lambda: self.catalog.upsert(previous_info))
+                else:
+                    undo.append(lambda: self.catalog.delete([document_id]))
+                
+                # Vector Store 반영 (실패하면 이전 청크 구성으로 되돌린 뒤 예외 발생)
+                await asyncio.to_thread(
+                    self._apply_document_update, vector_store, added_ids, added, added_vectors,
+                    kept_ids, kept, kept_previous, removed_ids
+                )
+                
+                await asyncio.to_thread(self._discard_backups, backups)
+                
+            except Exception as e:
+                # 이미 반영한 파일/BM25 색인/문서 목록을 이전 상태로 복구
+                for restore in reversed(undo):
                     try:
-                        # 디렉토리 내 첫 번째 파일 정보 추출
-                        files = os.listdir(doc_path)
-                        if files:
-                            filename = files[0]
-                            file_path = os.path.join(doc_path, filename)
-                            
-                            # 파일 생성 시간 및 수정 시간 가져오기
-                            stat = os.stat(file_path)
-                            created_at = datetime.fromtimestamp(stat.st_ctime)
-                            updated_at = datetime.fromtimestamp(stat.st_mtime)
-                            
-                            # 문서 정보 생성
-                            documents.append({
-                                "document_id": doc_id,
-                                "filename": filename,
-                                "description": None,  # 메타데이터 파일 필요
-                                "metadata": {"source": file_path},
-                                "created_at": created_at,
-                                "updated_at": updated_at,
-                                "chunks_count": 0  # 실제 계산 필요
-                            })
-                    except Exception as e:
-                        logger.warning(f"문서 {doc_id} 정보 추출 중 오류: {e}")
+                        await asyncio.to_thread(restore)
+                    except Exception as restore_error:
+                        logger.error(f"문서 갱신 복구 중 오류: {restore_error}")
+                if os.path.exists(incoming_path):
+                    os.unlink(incoming_path)
+                if isinstance(e, (InvalidFileFormatError, FileTooLargeError)):
+                    raise
+                logger.error(f"문서 갱신 중 오류: {e}")
+                raise DocumentProcessingError(f"문서 갱신 중 오류 발생: {str(e)}")
+        
+        # 다시 임베딩하지 않은 청크의 토큰 수
+        tokens_saved = await asyncio.to_thread(
+            lambda: sum(count_tokens(chunk.page_content, settings.EMBEDDING_MODEL_NAME) for chunk in kept)
+        )
+        metrics.increment("ingestion.embedding_tokens_saved", tokens_saved)
+        get_corpus_state().notify_changed([document_id])
+        logger.info(
+            f"문서 갱신 완료: {document_id} (유지 {len(kept)}, 추가 {len(added)}, 삭제 {len(removed_ids)}, "
+            f"절약 토큰 {tokens_saved})"
+        )
+        
+        return {
+            "document_id": document_id,
+            "filename": original_filename,
+            "chunks_count": len(new_chunks),
+            "chunks_kept": len(kept),
+            "chunks_added": len(added),
+            "chunks_removed": len(removed_ids),
+            "embedding_tokens_saved": tokens_saved,
+            "updated_at": datetime.now()
+        }
+    
+    def _apply_document_update(self, vector_store: Chroma, added_ids: List[str], added: List[Any],
+                               added_vectors: List[List[float]], kept_ids: List[str], kept: List[Any],
+                               kept_previous: List[Dict[str, Any]], removed_ids: List[str]) -> None:
+        """갱신 결과를 Vector Store에 반영 (추가 → 메타데이터 갱신 → 삭제 순)
+        
+        삭제가 마지막이므로 도중에 실패하면 추가한 청크를 지우고 유지 청크의 메타데이터를
+        kept_previous로 되돌려 이전 청크 구성으로 복구한 뒤 예외를 다시 발생시킵니다.
+        """
+        collection = vector_store._collection
+        try:
+            for start in range(0, len(added_ids), self.embedding_batch_size):
+                end = start + self.embedding_batch_size
+                collection.upsert(
+                    ids=added_ids[start:end],
+                    embeddings=added_vectors[start:end],
+                    documents=[chunk.page_content for chunk in added[start:end]],
+                    metadatas=[sanitize_metadata(chunk.metadata) for chunk in added[start:end]]
+                )
+            if kept_ids:
+                collection.update(ids=kept_ids, metadatas=[sanitize_metadata(chunk.metadata) for chunk in kept])
+            if removed_ids:
+                collection.delete(ids=removed_ids)
+        except Exception:
+            try:
+                if added_ids:
+                    collection.delete(ids=added_ids)
+                if kept_ids:
+                    collection.update(ids=kept_ids, metadatas=kept_previous)
+            except Exception as restore_error:
+                logger.error(f"Vector Store 갱신 복구 중 오류: {restore_error}")
+            raise
+    
+    @staticmethod
+    def _swap_document_file(document_dir: str, incoming_path: str, target_file_path: str) -> List[Tuple[str, str]]:
+        """문서 디렉토리의 기존 파일을 보관용 이름으로 옮기고 새 파일로 교체, (보관 경로, 원래 경로) 목록 반환"""
+        backups = []
+        try:
+            for name in os.listdir(document_dir):
+                if name.endswith(".previous"):
+                    continue
+                path = os.path.join(document_dir, name)
+                os.replace(path, f"{path}.previous")
+                backups.append((f"{path}.previous", path))
+            os.replace(incoming_path, target_file_path)
+        except Exception:
+            for backup_path, path in reversed(backups):
+                os.replace(backup_path, path)
+            raise
+        return backups
+    
+    @staticmethod
+    def _restore_document_files(target_file_path: str, backups: List[Tuple[str, str]]) -> None:
+        """_swap_document_file로 교체한 파일을 이전 상태로 복구"""
+        if os.path.exists(target_file_path):
+            os.unlink(target_file_path)
+        for backup_path, path in backups:
+            os.replace(backup_path, path)
+    
+    @staticmethod
+    def _discard_backups(backups: List[Tuple[str, str]]) -> None:
+        """갱신이 끝난 뒤 보관해 둔 이전 파일 삭제"""
+        for backup_path, _ in backups:
+            try:
+                os.unlink(backup_path)
+            except OSError as e:
+                logger.warning(f"이전 문서 파일 삭제 실패: {backup_path} ({e})")
+    
+    async def get_all_documents(self, limit: int = 50, cursor: Optional[str] = None, sort: str = "created_at",
+                                order: str = "desc", filename: Optional[str] = None,
+                                created_after: Optional[datetime] = None,
+                                created_before: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """문서 목록 조회 (문서 목록 색인 기반 키셋 페이지네이션)
         
+        Returns:
+            (문서 목록, 다음 페이지 커서 - 마지막 페이지면 None)
+        """
+        try:
+            return await asyncio.to_thread(
+                self.catalog.list,
+                limit=limit,
+                cursor=cursor,
+                sort=sort,
+                order=order,
+                filename=filename,
+                created_after=created_after,
+                created_before=created_before
+            )
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"문서 목록 조회 중 오류: {e}")
             raise DocumentProcessingError(f"문서 목록 조회 중 오류 발생: {str(e)}")
+    
+    async def rebuild_catalog_if_empty(self) -> None:
+        """문서 목록 색인이 비어 있으면 Vector Store 청크 메타데이터로 재구성 (기존 데이터 이전용)"""
+        if len(self.catalog):
+            return
+        await asyncio.to_thread(self.catalog.rebuild_from_vector_store, self.vector_store)
+    
+    async def _delete_where(self, vector_store: Chroma, where: Dict[str, Any]) -> Tuple[int, List[str]]:
+        """메타데이터 필터와 일치하는 청크를 Vector Store와 BM25 색인에서 제거
         
-        return documents
+        Returns:
+            (제거된 청크 수, 청크가 속한 문서 ID 목록)
+        """
+        data = await asyncio.to_thread(vector_store._collection.get, where=where, include=["metadatas"])
+        chunk_ids = data.get("ids") or []
+        document_ids = sorted({
+            metadata["document_id"]
+            for metadata in data.get("metadatas") or []
+            if metadata and metadata.get("document_id")
+        })
+        
+        if chunk_ids:
+            await asyncio.to_thread(vector_store._collection.delete, ids=chunk_ids)
+        
+        if self.lexical_index is not None and document_ids:
+            await asyncio.to_thread(self.lexical_index.remove_documents, document_ids)
+        
+        return len(chunk_ids), document_ids
     
     async def delete_document(self, document_id: str) -> bool:
-        """문서 삭제"""
+        """문서 삭제 (원본 파일, Vector Store 청크, BM25 색인, 처리/갱신 중이면 끝난 뒤 삭제)"""
+        async with _document_write(document_id):
+            return await self._delete_document(document_id)
+    
+    async def _delete_document(self, document_id: str) -> bool:
         document_dir = os.path.join(self.documents_dir, document_id)
         
-        # 문서 존재 여부 확인
-        if not os.path.exists(document_dir):
-            logger.warning(f"삭제할 문서를 찾을 수 없음: {document_id}")
-            return False
-        
         try:
+            # Vector Store/BM25 색인에서 문서 청크 제거
+            removed_chunks, _ = await self._delete_where(self.vector_store, {"document_id": document_id})
+            
+            # 문서 목록 색인에서 제거
+            removed_entries = await asyncio.to_thread(self.catalog.delete, [document_id])
+            
+            # 문서 존재 여부 확인
+            if not os.path.exists(document_dir) and not removed_chunks and not removed_entries:
+                logger.warning(f"삭제할 문서를 찾을 수 없음: {document_id}")
+                return False
+            
             # 문서 디렉토리 삭제
-            shutil.rmtree(document_dir)
-            logger.info(f"문서 삭제 완료: {document_id}")
+            if os.path.exists(document_dir):
+                await asyncio.to_thread(shutil.rmtree, document_dir)
+            logger.info(f"문서 삭제 완료: {document_id} (청크 {removed_chunks}개)")
             
-            # Vector Store 재생성 (삭제된 문서 반영)
-            # 실제 구현에서는 더 효율적인 방법 고려 필요
-            # ex: Chroma의 delete_collection 사용
+            # 코퍼스 변경 알림 (답변 캐시 무효화 등)
+            get_corpus_state().notify_changed([document_id])
             
             return True
             
         except Exception as e:
             logger.error(f"문서 삭제 중 오류: {e}")
-            raise DocumentProcessingError(f"문서 삭제 중 오류 발생: {str(e)}")
\ No newline at end of file
+            raise DocumentProcessingError(f"문서 삭제 중 오류 발생: {str(e)}")
+    
+    async def delete_documents_by_filter(self, where: Dict[str, Any]) -> Dict[str, Any]:
+        """메타데이터 필터(Chroma where 형식)와 일치하는 청크 및 해당 문서 일괄 삭제
+        
+        일치하는 문서 ID를 먼저 확인하고 문서별 잠금을 ID 순서대로 모두 잡은 뒤 삭제하므로,
+        처리/갱신 중인 문서는 끝날 때까지 기다립니다. 잠근 문서의 청크만 삭제합니다.
+        """
+        if not where:
+            raise DocumentProcessingError("삭제 필터가 비어 있습니다.")
+        
+        async with _vector_store_gate.write():
+            try:
+                matched = await asyncio.to_thread(
+                    self.vector_store._collection.get, where=where, include=["metadatas"]
+                )
+            except Exception as e:
+                logger.error(f"문서 일괄 삭제 중 오류: {e}")
+                raise DocumentProcessingError(f"문서 일괄 삭제 중 오류 발생: {str(e)}")
+            document_ids = sorted({
+                metadata["document_id"]
+                for metadata in matched.get("metadatas") or []
+                if metadata and metadata.get("document_id")
+            })
+            if not document_ids:
+                return {"document_ids": [], "chunks_deleted": 0}
+            
+            # 교착 상태를 피하도록 항상 같은 순서로 잠금
+            async with AsyncExitStack() as stack:
+                for document_id in document_ids:
+                    await stack.enter_async_context(_get_document_lock(document_id))
+                locked_where = {"$and": [where, {"document_id": {"$in": document_ids}}]}
+                return await self._delete_documents_by_filter(where, locked_where)
+    
+    async def _delete_documents_by_filter(self, where: Dict[str, Any],
+                                          locked_where: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            vector_store = self.vector_store
+            removed_chunks, document_ids = await self._delete_where(vector_store, locked_where)
+            
+            # 청크가 모두 삭제된 문서는 원본 파일과 목록 항목 정리, 일부만 삭제된 문서는 청크 수 갱신
+            for document_id in document_ids:
+                remaining = await asyncio.to_thread(
+                    vector_store._collection.get, where={"document_id": document_id}, include=[]
+                )
+                remaining_count = len(remaining.get("ids") or [])
+                if remaining_count:
+                    await asyncio.to_thread(self.catalog.update_chunks_count, document_id, remaining_count)
+                    continue
+                await asyncio.to_thread(self.catalog.delete, [document_id])
+                document_dir = os.path.join(self.documents_dir, document_id)
+                if os.path.exists(document_dir):
+                    await asyncio.to_thread(shutil.rmtree, document_dir)
+            
+            if document_ids:
+                get_corpus_state().notify_changed(document_ids)
+            logger.info(f"필터 {where}로 문서 {len(document_ids)}개, 청크 {removed_chunks}개 삭제")
+            
+            return {"document_ids": document_ids, "chunks_deleted": removed_chunks}
+            
+        except Exception as e:
+            logger.error(f"문서 일괄 삭제 중 오류: {e}")
+            raise DocumentProcessingError(f"문서 일괄 삭제 중 오류 발생: {str(e)}")
+    
+    def _vector_store_size(self) -> int:
+        """Vector Store 디렉토리 크기 (bytes)"""
+        total = 0
+        for root, _, files in os.walk(self.vector_store_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+    
+    def _vacuum_sqlite(self) -> None:
+        """Chroma SQLite 파일의 삭제된 페이지 회수
+        
+        WAL 모드에서는 VACUUM 결과가 WAL에 기록되므로 뒤이어 체크포인트해야 파일 크기가 줄어듭니다.
+        """
+        sqlite_path = os.path.join(self.vector_store_dir, "chroma.sqlite3")
+        if not os.path.exists(sqlite_path):
+            return
+        conn = sqlite3.connect(sqlite_path, timeout=30)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+    
+    async def vacuum_vector_store(self) -> Dict[str, Any]:
+        """Vector Store의 SQLite 파일에서 삭제된 페이지를 회수하고 회수한 용량 반환
+        
+        메타데이터/문서 원문이 담긴 chroma.sqlite3만 VACUUM하며 HNSW 인덱스 파일은 재구성하지 않으므로
+        검색 성능은 달라지지 않습니다. 진행 중인 문서 처리/갱신/삭제가 끝난 뒤 쓰기 없이 실행하지만
+        검색(읽기)은 막지 않으며, SQLite 잠금 등으로 실패하면 보고서의 error에 원인을 담아 반환합니다.
+        """
+        start_time = time.perf_counter()
+        error = None
+        
+        async with _vector_store_gate.exclusive():
+            size_before = await asyncio.to_thread(self._vector_store_size)
+            try:
+                await asyncio.to_thread(self._vacuum_sqlite)
+            except sqlite3.OperationalError as e:
+                error = str(e)
+                metrics.increment("vector_store.vacuum_errors")
+                logger.warning(f"Vector Store VACUUM 실패: {e}")
+            size_after = await asyncio.to_thread(self._vector_store_size)
+        
+        report = {
+            "vacuumed": error is None,
+            "error": error,
+            "size_before_bytes": size_before,
+            "size_after_bytes": size_after,
+            "freed_bytes": max(0, size_before - size_after),
+            "duration_seconds": time.perf_counter() - start_time
+        }
+        if error is not None:
+            return report
+        metrics.increment("vector_store.vacuums")
+        metrics.increment("vector_store.vacuum_freed_bytes", report["freed_bytes"])
+        logger.info(f"Vector Store VACUUM 완료: {report['freed_bytes']} bytes 회수")
+        return report
+
+@lru_cache(maxsize=1)
+def get_document_service() -> DocumentService:
+    """문서 관리 서비스 인스턴스 제공 (싱글톤, 검색기와 Vector Store 공유)"""
+    return DocumentService()
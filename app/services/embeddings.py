@@ -1,21 +1,308 @@
 from functools import lru_cache
+from collections import OrderedDict
+from array import array
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.http_client import get_async_http_client, get_http_client
+from app.services.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RateLimiter, get_embedding_rate_limiter
+from app.utils.tokens import count_tokens
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+def normalize_query(text: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드/공백/대소문자/끝 문장부호)"""
+    text = unicodedata.normalize("NFKC", text)
+    text = re.sub(r"\s+", " ", text).strip().lower()
+    return text.rstrip("?!.。？！ ")
+
+class EmbeddingCache:
+    """임베딩 LRU/TTL 캐시 (선택적으로 SQLite 디스크 계층 사용)
+
+    쿼리 임베딩 캐시와 문서 청크 임베딩 캐시(내용 해시 기반)에 함께 사용합니다.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 86400, disk_path: Optional[str] = None,
+                 table: str = "query_embeddings", metric_prefix: str = "embedding_cache"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.table = table
+        self.metric_prefix = metric_prefix
+        self._lock = threading.Lock()  # 메모리 계층과 통계
+        self._disk_lock = threading.Lock()  # SQLite 연결 (메모리 조회가 디스크 I/O를 기다리지 않도록 분리)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (저장 시각, 벡터)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # 재시작 후에도 유지되는 디스크 계층
+        self._disk = None
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._disk.commit()
+
+    @staticmethod
+    def make_key(model: str, query: str) -> str:
+        """모델명과 정규화된 쿼리로 캐시 키 생성"""
+        return hashlib.sha256(f"{model}:{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_document_key(model: str, text: str) -> str:
+        """모델명과 청크 원문(정규화 없음)으로 캐시 키 생성"""
+        return hashlib.sha256(f"{model}:{text}".encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """캐시 조회 (메모리 → 디스크 순)"""
+        vector = self.get_memory(key)
+        return vector if vector is not None else self.get_disk(key)
+
+    async def aget(self, key: str) -> Optional[List[float]]:
+        """캐시 조회 (메모리는 바로, 디스크는 별도 스레드에서 조회)"""
+        vector = self.get_memory(key)
+        if vector is not None:
+            return vector
+        if self._disk is None:
+            return self.get_disk(key)  # 미스 집계만 수행
+        return await asyncio.to_thread(self.get_disk, key)
+
+    def get_memory(self, key: str) -> Optional[List[float]]:
+        """메모리 계층 조회 (없어도 미스로 집계하지 않음)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, vector = entry
+            if self._is_expired(created_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        metrics.increment(f"{self.metric_prefix}.hits")
+        return vector
+
+    def get_disk(self, key: str) -> Optional[List[float]]:
+        """디스크 계층 조회 후 메모리에 적재 (디스크 계층이 없거나 없으면 미스로 집계)"""
+        if self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    f"SELECT embedding, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and not self._is_expired(row[1]):
+                vector = array("d", row[0]).tolist()
+                with self._lock:
+                    self._store(key, vector, row[1])
+                    self.disk_hits += 1
+                metrics.increment(f"{self.metric_prefix}.disk_hits")
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        metrics.increment(f"{self.metric_prefix}.misses")
+        return None
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """캐시 저장"""
+        created_at = time.time()
+        with self._lock:
+            self._store(key, vector, created_at)
+        self._write_disk(key, vector, created_at)
+
+    async def aput(self, key: str, vector: List[float]) -> None:
+        """캐시 저장 (디스크 기록은 별도 스레드에서 실행)"""
+        created_at = time.time()
+        with self._lock:
+            self._store(key, vector, created_at)
+        if self._disk is not None:
+            await asyncio.to_thread(self._write_disk, key, vector, created_at)
+
+    def _write_disk(self, key: str, vector: List[float], created_at: float) -> None:
+        if self._disk is None:
+            return
+        with self._disk_lock:
+            self._disk.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, embedding, created_at) VALUES (?, ?, ?)",
+                (key, array("d", vector).tobytes(), created_at)
+            )
+            self._disk.commit()
+
+    def _store(self, key: str, vector: List[float], created_at: float) -> None:
+        """메모리 계층 저장 및 LRU 제거 (잠금은 호출자가 보유)"""
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+class RateLimitedEmbeddings(Embeddings):
+    """임베딩 호출을 RPM/TPM 스케줄러에 맞춰 실행하는 래퍼
+
+    쿼리 임베딩은 대화형 요청으로, 문서 청크 임베딩은 수집용 백그라운드 요청으로 처리합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, rate_limiter: RateLimiter, model: str):
+        self.embeddings = embeddings
+        self.rate_limiter = rate_limiter
+        self.model = model
+
+    def _estimate_tokens(self, texts: List[str]) -> int:
+        return sum(count_tokens(text, self.model) for text in texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.rate_limiter.run_sync(
+            lambda: self.embeddings.embed_documents(texts), self._estimate_tokens(texts), PRIORITY_BACKGROUND
+        )
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        tokens = await asyncio.to_thread(self._estimate_tokens, texts)
+        return await self.rate_limiter.run(
+            lambda: self.embeddings.aembed_documents(texts), tokens, PRIORITY_BACKGROUND
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.rate_limiter.run_sync(
+            lambda: self.embeddings.embed_query(text), self._estimate_tokens([text]), PRIORITY_INTERACTIVE
+        )
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.rate_limiter.run(
+            lambda: self.embeddings.aembed_query(text), self._estimate_tokens([text]), PRIORITY_INTERACTIVE
+        )
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 캐시를 적용한 임베딩 래퍼
+
+    쿼리는 정규화된 쿼리 기준으로, 문서 청크는 내용 해시 기준으로 캐시하므로
+    여러 문서에 같은 청크가 있어도 OpenAI에는 한 번만 요청합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str,
+                 document_cache: Optional[EmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.document_cache = document_cache
+        self.model = model
+
+    def _split_cached(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[str], List[str]]:
+        """문서 캐시 조회, (결과 목록, 캐시 키 목록, 임베딩이 필요한 고유 텍스트 목록) 반환"""
+        keys = [self.document_cache.make_document_key(self.model, text) for text in texts]
+        vectors = [self.document_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        return vectors, keys, missing
+
+    def _merge_embedded(self, texts: List[str], vectors: List[Optional[List[float]]], keys: List[str],
+                        missing: List[str], embedded: List[List[float]]) -> List[List[float]]:
+        """새로 임베딩한 결과를 캐시에 저장하고 입력 순서대로 병합"""
+        by_text = dict(zip(missing, embedded))
+        key_by_text = dict(zip(texts, keys))
+        for text in missing:
+            self.document_cache.put(key_by_text[text], by_text[text])
+        reused = len(texts) - len(missing)
+        if reused:
+            metrics.increment("embedding_cache.document_chunks_reused", reused)
+        return [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_cache is None:
+            return self.embeddings.embed_documents(texts)
+        vectors, keys, missing = self._split_cached(texts)
+        embedded = self.embeddings.embed_documents(missing) if missing else []
+        return self._merge_embedded(texts, vectors, keys, missing, embedded)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_cache is None:
+            return await self.embeddings.aembed_documents(texts)
+        vectors, keys, missing = await asyncio.to_thread(self._split_cached, texts)
+        embedded = await self.embeddings.aembed_documents(missing) if missing else []
+        return await asyncio.to_thread(self._merge_embedded, texts, vectors, keys, missing, embedded)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache.make_key(self.model, text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache.make_key(self.model, text)
+        vector = await self.cache.aget(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await self.cache.aput(key, vector)
+        return vector
+
 @lru_cache(maxsize=1)
 def get_embeddings_service():
-    """OpenAI 임베딩 서비스 인스턴스 제공 (싱글톤)"""
+    """OpenAI 임베딩 서비스 인스턴스 제공 (싱글톤, 쿼리 임베딩 캐시 적용)"""
     logger.info(f"임베딩 모델 '{settings.EMBEDDING_MODEL_NAME}'을(를) 로드하는 중...")
-    
+
+    rate_limiter = get_embedding_rate_limiter()
+
     # OpenAI 임베딩 모델 초기화
     embeddings = OpenAIEmbeddings(
         model=settings.EMBEDDING_MODEL_NAME,
         openai_api_key=settings.OPENAI_API_KEY,
         dimensions=1536,  # text-embedding-3-small 모델의 기본 차원 크기
+        # 호출 제한 스케줄러가 있으면 재시도는 스케줄러가 담당 (백오프 중 다른 요청도 함께 대기)
+        max_retries=0 if rate_limiter is not None else 2,
+        # 채팅 클라이언트와 연결 풀 공유 (keep-alive로 핸드셰이크 재사용)
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
+    # RPM/TPM 호출 제한 적용 (캐시 적중 시에는 한도를 사용하지 않도록 캐시 안쪽에 위치)
+    if rate_limiter is not None:
+        embeddings = RateLimitedEmbeddings(embeddings, rate_limiter, model=settings.EMBEDDING_MODEL_NAME)
+
+    # 쿼리 임베딩 캐시 적용
+    cache = EmbeddingCache(
+        max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+        ttl=settings.QUERY_EMBEDDING_CACHE_TTL,
+        disk_path=settings.QUERY_EMBEDDING_CACHE_PATH or None
     )
-    
+    metrics.register_gauge("embedding_cache", cache.stats)
+
+    # 문서 청크 임베딩 캐시 (내용 해시 → 임베딩, 만료 없음)
+    document_cache = EmbeddingCache(
+        max_size=settings.DOCUMENT_EMBEDDING_CACHE_SIZE,
+        ttl=0,
+        disk_path=settings.DOCUMENT_EMBEDDING_CACHE_PATH or None,
+        table="document_embeddings",
+        metric_prefix="document_embedding_cache"
+    )
+    metrics.register_gauge("document_embedding_cache", document_cache.stats)
+
     logger.info("임베딩 모델 로드 완료!")
-    return embeddings
\ No newline at end of file
+    return CachedEmbeddings(embeddings, cache, model=settings.EMBEDDING_MODEL_NAME, document_cache=document_cache)
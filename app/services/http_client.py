@@ -0,0 +1,81 @@
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+import httpx
+import logging
+from typing import Any, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+def _client_options() -> Dict[str, Any]:
+    """공유 HTTP 클라이언트 공통 설정 (연결 풀, keep-alive, 제한 시간)"""
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        "http2": settings.HTTP2_ENABLED,
+    }
+
+def _create_client(client_class):
+    options = _client_options()
+    try:
+        return client_class(**options)
+    except ImportError:
+        # HTTP/2에는 h2 패키지가 필요 (httpx[http2])
+        logger.warning("h2 패키지를 찾을 수 없어 HTTP/1.1을 사용합니다.")
+        options["http2"] = False
+        return client_class(**options)
+
+def pool_stats(client: Union[httpx.Client, httpx.AsyncClient]) -> Dict[str, Any]:
+    """연결 풀 사용 현황 (연결 수, 사용 중/유휴 연결 수, 처리 중/연결 대기 중인 요청 수)
+
+    httpx는 풀 상태를 공개하지 않으므로 내부 httpcore 풀(httpcore 1.x, requirements.txt에 고정)에서 읽습니다.
+    내부 구조가 바뀌어 읽을 수 없으면 빈 값을 반환합니다.
+    """
+    try:
+        pool = client._transport._pool
+        connections = list(pool.connections)
+        requests = list(pool._requests)
+        active = sum(1 for connection in connections if not connection.is_idle())
+        queued = sum(1 for request in requests if request.is_queued())
+    except Exception as e:
+        logger.debug(f"HTTP 연결 풀 상태를 읽을 수 없습니다: {e!r}")
+        return {}
+    in_flight = len(requests) - queued
+    max_connections = settings.HTTP_MAX_CONNECTIONS
+    return {
+        "connections": len(connections),
+        "active_connections": active,
+        "idle_connections": len(connections) - active,
+        "requests_in_flight": in_flight,  # HTTP/2는 연결 하나로 여러 요청 처리
+        "requests_waiting": queued,  # 연결 풀이 가득 차 연결을 기다리는 요청
+        "max_connections": max_connections,
+        # 열린 연결 수가 아닌 처리 중인 요청 기준 (keep-alive로 남은 유휴 연결 제외)
+        "utilization": in_flight / max_connections if max_connections else None
+    }
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """임베딩/채팅 클라이언트가 공유하는 동기 HTTP 클라이언트 (싱글톤)"""
+    client = _create_client(httpx.Client)
+    metrics.register_gauge("http_client.sync", lambda: pool_stats(client))
+    return client
+
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """임베딩/채팅 클라이언트가 공유하는 비동기 HTTP 클라이언트 (싱글톤)"""
+    client = _create_client(httpx.AsyncClient)
+    metrics.register_gauge("http_client.async", lambda: pool_stats(client))
+    return client
+
+async def close_http_clients() -> None:
+    """공유 HTTP 클라이언트 종료"""
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+        get_async_http_client.cache_clear()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
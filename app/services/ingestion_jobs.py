@@ -0,0 +1,272 @@
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.document_service import DocumentService, get_document_service
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# 진행 상황으로 갱신 가능한 컬럼
+_PROGRESS_FIELDS = ("pages_parsed", "chunks_total", "chunks_embedded")
+
+class IngestionJobQueue:
+    """문서 수집(파싱 → 분할 → 임베딩) 백그라운드 작업 큐
+
+    작업 상태는 SQLite 작업 테이블에 저장되어 재시작 후에도 유지되며,
+    재시작 시 완료되지 않은 작업을 다시 큐에 넣습니다.
+    동시에 실행되는 작업 수는 워커 수로 제한합니다.
+    작업 테이블 조회/쓰기는 이벤트 루프를 막지 않도록 스레드에서 실행하고,
+    진행 상황은 작업당 progress_interval초에 한 번만 기록합니다.
+    """
+
+    def __init__(self, document_service: DocumentService, db_path: str, workers: int = 2,
+                 progress_interval: float = 1.0):
+        self.document_service = document_service
+        self.db_path = db_path
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._db_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                document_id TEXT,
+                description TEXT,
+                metadata TEXT,
+                pages_parsed INTEGER NOT NULL DEFAULT 0,
+                chunks_total INTEGER NOT NULL DEFAULT 0,
+                chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._db_lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _update_sync(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE ingestion_jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+    async def _update(self, job_id: str, **fields) -> None:
+        await asyncio.to_thread(self._update_sync, job_id, **fields)
+
+    def _fetch_row(self, job_id: str) -> Optional[sqlite3.Row]:
+        with self._db_lock:
+            return self._conn.execute("SELECT * FROM ingestion_jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+    def _requeue_unfinished(self) -> List[str]:
+        """중단된 작업을 처음부터 다시 수행하도록 초기화, 작업 ID 목록 반환"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM ingestion_jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        job_ids = [row["job_id"] for row in rows]
+        for job_id in job_ids:
+            self._update_sync(job_id, status=JOB_QUEUED, pages_parsed=0, chunks_total=0,
+                              chunks_embedded=0, started_at=None)
+        return job_ids
+
+    async def start(self) -> None:
+        """워커 시작 및 완료되지 않은 작업 복구"""
+        self._queue = asyncio.Queue()
+
+        rows = await asyncio.to_thread(self._requeue_unfinished)
+        for job_id in rows:
+            self._queue.put_nowait(job_id)
+        if rows:
+            logger.info(f"완료되지 않은 수집 작업 {len(rows)}개를 다시 큐에 넣었습니다.")
+
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        metrics.register_gauge("ingestion.queue_depth", lambda: self._queue.qsize() if self._queue else 0)
+        logger.info(f"문서 수집 워커 {self.workers}개를 시작했습니다.")
+
+    async def stop(self) -> None:
+        """워커 중지 (실행 중인 작업은 재시작 시 복구)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, file_path: str, original_filename: str, description: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None, document_id: Optional[str] = None) -> Dict[str, Any]:
+        """수집 작업 등록 후 작업 정보 반환
+        
+        document_id가 주어지면 file_path는 이미 문서 저장 위치에 스트리밍 저장된 파일입니다.
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO ingestion_jobs (job_id, status, filename, file_path, document_id, description, "
+            "metadata, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, original_filename, file_path, document_id, description,
+             json.dumps(metadata or {}, ensure_ascii=False), now, now)
+        )
+        self._queue.put_nowait(job_id)
+        metrics.increment("ingestion.jobs_submitted")
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태 조회 (진행률, 예상 남은 시간 포함)"""
+        row = await asyncio.to_thread(self._fetch_row, job_id)
+        if row is None:
+            return None
+        return self._to_info(row)
+
+    def _to_info(self, row: sqlite3.Row) -> Dict[str, Any]:
+        chunks_total = row["chunks_total"]
+        chunks_embedded = row["chunks_embedded"]
+        progress = None
+        eta_seconds = None
+
+        if row["status"] == JOB_COMPLETED:
+            progress = 1.0
+            eta_seconds = 0.0
+        elif chunks_total:
+            progress = chunks_embedded / chunks_total
+            if chunks_embedded and row["started_at"]:
+                # 지금까지의 청크 임베딩 속도로 남은 시간 추정
+                elapsed = time.time() - row["started_at"]
+                eta_seconds = elapsed / chunks_embedded * (chunks_total - chunks_embedded)
+
+        return {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "filename": row["filename"],
+            "pages_parsed": row["pages_parsed"],
+            "chunks_total": chunks_total,
+            "chunks_embedded": chunks_embedded,
+            "progress": progress,
+            "eta_seconds": eta_seconds,
+            "error": row["error"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    async def _worker(self, worker_index: int) -> None:
+        """큐에서 작업을 꺼내 순서대로 처리"""
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"수집 작업 {job_id} 처리 중 예상치 못한 오류: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        row = await asyncio.to_thread(self._fetch_row, job_id)
+        if row is None or row["status"] != JOB_QUEUED:
+            return
+
+        started_at = time.time()
+        await self._update(job_id, status=JOB_RUNNING, started_at=started_at)
+        logger.info(f"수집 작업 시작: {job_id} ({row['filename']})")
+
+        progress = _ProgressWriter(self, job_id, self.progress_interval)
+        try:
+            result = await self.document_service.process_document(
+                file_path=row["file_path"],
+                original_filename=row["filename"],
+                description=row["description"],
+                metadata=json.loads(row["metadata"] or "{}"),
+                progress=progress.report,
+                document_id=row["document_id"]
+            )
+        except Exception as e:
+            await self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=time.time(),
+                               **await progress.close())
+            metrics.increment("ingestion.jobs_failed")
+            logger.error(f"수집 작업 실패: {job_id}: {e}")
+        else:
+            await self._update(job_id, status=JOB_COMPLETED, finished_at=time.time(),
+                               result=json.dumps(result, ensure_ascii=False, default=str),
+                               **await progress.close())
+            metrics.increment("ingestion.jobs_completed")
+            metrics.observe("ingestion.job_duration", time.time() - started_at)
+            logger.info(f"수집 작업 완료: {job_id} (청크 {result['chunks_count']}개)")
+
+class _ProgressWriter:
+    """작업 진행 상황 기록 (interval초에 한 번만 기록하고 그 사이의 갱신은 합침)"""
+
+    def __init__(self, queue: IngestionJobQueue, job_id: str, interval: float):
+        self._queue = queue
+        self._job_id = job_id
+        self._interval = interval
+        self._pending: Dict[str, int] = {}
+        self._last_write = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def report(self, update: Dict[str, int]) -> None:
+        """수집 파이프라인의 진행 콜백 (이벤트 루프에서 호출, 기다리지 않음)"""
+        fields = {name: value for name, value in update.items() if name in _PROGRESS_FIELDS}
+        if not fields:
+            return
+        self._pending.update(fields)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(max(0.0, self._last_write + self._interval - time.monotonic()))
+        fields, self._pending = self._pending, {}
+        self._last_write = time.monotonic()
+        try:
+            await self._queue._update(self._job_id, **fields)
+        except Exception as e:
+            logger.warning(f"수집 작업 {self._job_id} 진행 상황 기록 실패: {e}")
+
+    async def close(self) -> Dict[str, int]:
+        """예약된 기록을 취소하고 아직 기록하지 않은 진행 상황 반환 (최종 상태와 함께 기록)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        fields, self._pending = self._pending, {}
+        return fields
+
+@lru_cache(maxsize=1)
+def get_ingestion_queue() -> IngestionJobQueue:
+    """문서 수집 작업 큐 인스턴스 제공 (싱글톤)"""
+    return IngestionJobQueue(
+        document_service=get_document_service(),
+        db_path=settings.INGESTION_JOB_DB_PATH,
+        workers=settings.INGESTION_WORKERS,
+        progress_interval=settings.INGESTION_PROGRESS_INTERVAL
+    )
@@ -0,0 +1,222 @@
+from functools import lru_cache
+from collections import Counter, defaultdict
+from app.core.config import settings
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 한글/한자/가나 연속 구간 (형태소 분석기 없이 문자 n-gram으로 토큰화)
+_CJK_RUN_PATTERN = re.compile(r"[가-힣ㄱ-ㆎ一-鿿぀-ヿ]+")
+# 영문/숫자 토큰 (제품 코드, 오류 문자열 등 "ABC-123", "v1.2" 형태 유지)
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰화
+
+    - 한글 등 CJK 문자열은 문자 bigram (한 글자 구간은 unigram)
+    - 영문/숫자는 단어 단위, 하이픈/점으로 연결된 코드는 전체 + 부분 토큰
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+
+    for run in _CJK_RUN_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    for word in _WORD_PATTERN.findall(text):
+        tokens.append(word)
+        parts = re.split(r"[-_.]", word)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+
+    return tokens
+
+class BM25Index:
+    """청크 단위 BM25 역색인 (프로세스 내, JSON 파일로 영속화)"""
+
+    def __init__(self, index_path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # 파일 기록 직렬화 (늦게 찍은 스냅샷이 마지막에 기록되도록)
+
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {chunk_id: tf}
+        self._doc_lengths: Dict[str, int] = {}  # chunk_id -> 토큰 수
+        self._doc_terms: Dict[str, List[str]] = {}  # chunk_id -> 고유 term 목록 (삭제용)
+        self._chunks: Dict[str, Dict[str, Any]] = {}  # chunk_id -> {"text", "metadata"}
+        self._document_chunks: Dict[str, List[str]] = defaultdict(list)  # document_id -> chunk_id 목록
+        self._total_length = 0
+
+        if index_path and os.path.exists(index_path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _add_chunk(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """단일 청크 색인 (잠금은 호출자가 보유)"""
+        if chunk_id in self._chunks:
+            self._remove_chunk(chunk_id)
+
+        term_counts = Counter(tokenize(text))
+        for term, tf in term_counts.items():
+            self._postings[term][chunk_id] = tf
+
+        length = sum(term_counts.values())
+        self._doc_lengths[chunk_id] = length
+        self._doc_terms[chunk_id] = list(term_counts.keys())
+        self._chunks[chunk_id] = {"text": text, "metadata": metadata}
+        self._total_length += length
+
+        document_id = metadata.get("document_id")
+        if document_id:
+            self._document_chunks[document_id].append(chunk_id)
+
+    def _remove_chunk(self, chunk_id: str) -> None:
+        """단일 청크 색인 제거 (잠금은 호출자가 보유)"""
+        for term in self._doc_terms.pop(chunk_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+
+        self._total_length -= self._doc_lengths.pop(chunk_id, 0)
+        chunk = self._chunks.pop(chunk_id, None)
+        if chunk:
+            document_id = chunk["metadata"].get("document_id")
+            chunk_ids = self._document_chunks.get(document_id)
+            if chunk_ids and chunk_id in chunk_ids:
+                chunk_ids.remove(chunk_id)
+                if not chunk_ids:
+                    del self._document_chunks[document_id]
+
+    def add_chunks(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                   persist: bool = True) -> None:
+        """청크 추가 (증분 색인)"""
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._add_chunk(chunk_id, text, metadata or {})
+        if persist:
+            self.save()
+
+    def remove_document(self, document_id: str, persist: bool = True) -> int:
+        """문서에 속한 모든 청크 제거, 제거된 청크 수 반환"""
+        return self.remove_documents([document_id], persist=persist)
+
+    def remove_documents(self, document_ids: Iterable[str], persist: bool = True) -> int:
+        """여러 문서에 속한 모든 청크 제거, 제거된 청크 수 반환"""
+        removed = 0
+        with self._lock:
+            for document_id in document_ids:
+                chunk_ids = list(self._document_chunks.get(document_id, []))
+                for chunk_id in chunk_ids:
+                    self._remove_chunk(chunk_id)
+                removed += len(chunk_ids)
+        if persist and removed:
+            self.save()
+        return removed
+
+    def replace_document(self, document_id: str, ids: List[str], texts: List[str],
+                         metadatas: List[Dict[str, Any]], persist: bool = True) -> None:
+        """문서의 청크를 한 번에 교체 (검색 중 일부만 반영된 상태가 보이지 않도록 잠금 안에서 수행)"""
+        with self._lock:
+            self.remove_document(document_id, persist=False)
+            self.add_chunks(ids, texts, metadatas, persist=False)
+        if persist:
+            self.save()
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 k개 (chunk_id, score) 반환"""
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            num_chunks = len(self._chunks)
+            if not num_chunks or not query_terms:
+                return []
+            avg_length = self._total_length / num_chunks
+
+            scores: Dict[str, float] = defaultdict(float)
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (num_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in postings.items():
+                    length_norm = 1 - self.b + self.b * self._doc_lengths[chunk_id] / avg_length
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """청크 원문과 메타데이터 조회"""
+        with self._lock:
+            return self._chunks.get(chunk_id)
+
+    def rebuild(self, ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[Dict[str, Any]]) -> None:
+        """전체 색인 재구성"""
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._doc_lengths = {}
+            self._doc_terms = {}
+            self._chunks = {}
+            self._document_chunks = defaultdict(list)
+            self._total_length = 0
+            self.add_chunks(list(ids), list(texts), list(metadatas), persist=False)
+        self.save()
+
+    def rebuild_from_vector_store(self, vector_store) -> None:
+        """Vector Store에 저장된 청크로 색인 재구성 (색인 파일이 없는 기존 데이터용)"""
+        data = vector_store.get(include=["documents", "metadatas"])
+        if not data.get("ids"):
+            return
+        self.rebuild(data["ids"], data["documents"], [metadata or {} for metadata in data["metadatas"]])
+        logger.info(f"Vector Store에서 {len(self)}개 청크로 BM25 색인을 재구성했습니다.")
+
+    def save(self) -> None:
+        """색인을 파일에 저장 (임시 파일 작성 후 교체)
+
+        잠금 안에서는 청크 목록의 얕은 복사본만 만들고 직렬화/기록은 잠금 밖에서 수행하므로
+        저장 중에도 검색이 멈추지 않습니다. (청크 항목은 추가 후 변경되지 않고 교체만 됨)
+        """
+        if not self.index_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                chunks = dict(self._chunks)
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"chunks": chunks}, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, self.index_path)
+
+    def load(self) -> None:
+        """파일에서 청크를 읽어 색인 재구성"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                chunks = json.load(f).get("chunks", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"BM25 색인 파일 로드 실패: {e}")
+            return
+
+        with self._lock:
+            for chunk_id, chunk in chunks.items():
+                self._add_chunk(chunk_id, chunk["text"], chunk.get("metadata") or {})
+        logger.info(f"BM25 색인을 '{self.index_path}'에서 로드했습니다. (청크 {len(self)}개)")
+
+@lru_cache(maxsize=1)
+def get_lexical_index() -> BM25Index:
+    """BM25 역색인 인스턴스 제공 (싱글톤)"""
+    return BM25Index(index_path=settings.LEXICAL_INDEX_PATH)
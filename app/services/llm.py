@@ -1,23 +1,55 @@
 from functools import lru_cache
 from langchain_openai import ChatOpenAI
 from app.core.config import settings
+from app.services.rate_limiter import get_llm_rate_limiter
+from app.services.http_client import get_async_http_client, get_http_client
+from app.services.llm_resilience import CircuitBreaker, ResilientChatModel
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _create_chat_model(model_name: str) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=model_name,
+        openai_api_key=settings.OPENAI_API_KEY,
+        temperature=0.2,  # 낮은 온도로 일관된 응답 생성
+        max_tokens=1000,  # 최대 토큰 수 제한
+        verbose=settings.DEBUG,  # 디버그 모드에서 상세 로그 활성화
+        timeout=settings.LLM_ATTEMPT_TIMEOUT,  # 시도별 제한 시간 (복원력 계층과 동일)
+        # 호출 제한 스케줄러가 있으면 재시도는 스케줄러가 담당
+        max_retries=0 if get_llm_rate_limiter() is not None else 2,
+        # 임베딩 클라이언트와 연결 풀 공유 (keep-alive로 핸드셰이크 재사용)
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+    )
+
 @lru_cache(maxsize=1)
 def get_llm_service():
-    """OpenAI LLM 서비스 인스턴스 제공 (싱글톤)"""
+    """OpenAI LLM 서비스 인스턴스 제공 (싱글톤, 제한 시간/헤지 요청/회로 차단기/대체 모델 적용)"""
     logger.info(f"LLM 모델 '{settings.LLM_MODEL_NAME}'을(를) 로드하는 중...")
     
     # OpenAI GPT-4o 모델 초기화
-    llm = ChatOpenAI(
-        model=settings.LLM_MODEL_NAME,
-        openai_api_key=settings.OPENAI_API_KEY,
-        temperature=0.2,  # 낮은 온도로 일관된 응답 생성
-        max_tokens=1000,  # 최대 토큰 수 제한
-        verbose=settings.DEBUG,  # 디버그 모드에서 상세 로그 활성화
+    llm = _create_chat_model(settings.LLM_MODEL_NAME)
+    
+    # 기본 모델 장애 시 사용할 대체 모델 (선택)
+    fallback_llm = None
+    if settings.LLM_FALLBACK_MODEL_NAME:
+        logger.info(f"대체 LLM 모델: '{settings.LLM_FALLBACK_MODEL_NAME}'")
+        fallback_llm = _create_chat_model(settings.LLM_FALLBACK_MODEL_NAME)
+    
+    resilient_llm = ResilientChatModel(
+        llm,
+        fallback_llm=fallback_llm,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            window=settings.LLM_CIRCUIT_WINDOW,
+            reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT
+        ),
+        rate_limiter=get_llm_rate_limiter(),
+        attempt_timeout=settings.LLM_ATTEMPT_TIMEOUT,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY
     )
     
     logger.info("LLM 모델 로드 완료!")
-    return llm
\ No newline at end of file
+    return resilient_llm
@@ -0,0 +1,291 @@
+from collections import deque
+from app.core.metrics import metrics
+from app.exceptions import LLMServiceError
+from app.services.rate_limiter import PRIORITY_INTERACTIVE, RETRYABLE_ERRORS, RateLimiter
+from app.utils.tokens import count_tokens
+import asyncio
+import openai
+import threading
+import time
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 백엔드 장애로 보는 오류 (차단기 실패로 기록하고 대체 모델로 전환, 호출 제한 429는 실패로 세지 않음)
+BACKEND_ERRORS = RETRYABLE_ERRORS + (asyncio.TimeoutError,)
+
+# 헤지 지연 시간 계산에 필요한 최소 관측 수
+MIN_HEDGE_SAMPLES = 20
+
+# 회로 차단기 상태
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """오류가 몰리면 호출을 차단하는 회로 차단기
+
+    window초 안에 failure_threshold번 실패하면 열리고(open), reset_timeout초 뒤
+    시험 호출 한 건을 허용합니다(half_open). 시험 호출이 성공하면 다시 닫힙니다.
+    """
+
+    def __init__(self, failure_threshold: int = 5, window: float = 30.0, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures: Deque[float] = deque()
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """호출 허용 여부"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == CIRCUIT_CLOSED:
+                return True
+            if self._state == CIRCUIT_OPEN and now - self._opened_at < self.reset_timeout:
+                return False
+            # 시험 호출은 한 번에 하나만 (응답 없이 끝난 시험 호출은 reset_timeout 후 다시 허용)
+            if self._trial_started_at is not None and now - self._trial_started_at < self.reset_timeout:
+                return False
+            self._state = CIRCUIT_HALF_OPEN
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CIRCUIT_CLOSED:
+                logger.info("LLM 회로 차단기가 닫혔습니다.")
+            self._state = CIRCUIT_CLOSED
+            self._failures.clear()
+            self._trial_started_at = None
+
+    def release_trial(self) -> None:
+        """성공도 실패도 아닌 결과 (요청 자체의 오류), 다른 시험 호출을 허용"""
+        with self._lock:
+            self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if self._state == CIRCUIT_HALF_OPEN or len(self._failures) >= self.failure_threshold:
+                if self._state != CIRCUIT_OPEN:
+                    logger.warning(f"LLM 회로 차단기가 열렸습니다 ({self.window:.0f}초 내 실패 {len(self._failures)}회)")
+                    metrics.increment("llm.circuit_opened")
+                self._state = CIRCUIT_OPEN
+                self._opened_at = now
+                self._trial_started_at = None
+
+class ResilientChatModel:
+    """채팅 모델 호출 복원력 계층 (ChatOpenAI의 ainvoke/astream과 같은 인터페이스)
+
+    - 시도별 제한 시간: 응답(스트리밍은 각 조각)이 attempt_timeout초 안에 오지 않으면 실패
+    - 헤지 요청: 최근 지연 시간의 hedge_percentile 백분위를 넘기면 같은 요청을 한 번 더 보내고
+      먼저 도착한 응답 사용 (호출 한도에 여유가 있을 때만)
+    - 회로 차단기: 오류가 몰리면 기본 모델 호출을 잠시 차단
+    - 대체 모델: 기본 모델이 실패하거나 차단된 동안 fallback_llm으로 응답
+    """
+
+    def __init__(self, llm, fallback_llm=None, breaker: Optional[CircuitBreaker] = None,
+                 rate_limiter: Optional[RateLimiter] = None, attempt_timeout: float = 30.0,
+                 hedge_percentile: float = 95.0, hedge_min_delay: float = 1.0, metric_prefix: str = "llm"):
+        self.llm = llm
+        self.fallback_llm = fallback_llm
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter  # 헤지 요청의 호출 한도 확인용
+        self.attempt_timeout = attempt_timeout
+        self.hedge_percentile = hedge_percentile  # 0이면 헤지 비활성화
+        self.hedge_min_delay = hedge_min_delay
+        self.metric_prefix = metric_prefix
+
+        # 토큰 수 계산에 사용하는 기본 모델 정보
+        self.model_name = getattr(llm, "model_name", None)
+        self.max_tokens = getattr(llm, "max_tokens", None)
+
+        metrics.register_gauge(f"{metric_prefix}.circuit_state", lambda: self.breaker.state)
+
+    def _hedge_delay(self, latency_metric: str) -> Optional[float]:
+        """헤지 요청을 보낼 지연 시간 (관측값이 부족하거나 비활성화면 None)"""
+        if self.hedge_percentile <= 0:
+            return None
+        name = f"{self.metric_prefix}.{latency_metric}"
+        if metrics.sample_count(name) < MIN_HEDGE_SAMPLES:
+            return None
+        return max(self.hedge_min_delay, metrics.percentile(name, self.hedge_percentile))
+
+    def _estimate_tokens(self, prompt_text: str) -> Tuple[int, int]:
+        """헤지 요청의 (프롬프트 토큰 수, 예상 토큰 수) (예상 토큰 수는 최대 출력 토큰 포함)"""
+        prompt_tokens = count_tokens(prompt_text, self.model_name)
+        return prompt_tokens, prompt_tokens + (self.max_tokens or 0)
+
+    def _reserve_hedge(self, prompt_text: str) -> Tuple[bool, Optional[Tuple[int, int]]]:
+        """헤지 요청의 호출 한도 확보 시도, (헤지 가능 여부, 확보한 (프롬프트 토큰 수, 예상 토큰 수)) 반환"""
+        if self.rate_limiter is None:
+            return True, None
+        tokens = self._estimate_tokens(prompt_text)
+        if not self.rate_limiter.try_acquire(tokens[1], PRIORITY_INTERACTIVE):
+            return False, None
+        return True, tokens
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]], latency_metric: str, prompt_text: str) -> T:
+        """attempt()를 실행하고, 지연되면 헤지 요청을 보내 먼저 성공한 결과 반환"""
+        tasks = [asyncio.create_task(attempt())]
+        hedge_tokens: Optional[Tuple[int, int]] = None
+        try:
+            delay = self._hedge_delay(latency_metric)
+            if delay is None:
+                return await tasks[0]
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return await tasks[0]
+            allowed, hedge_tokens = self._reserve_hedge(prompt_text)
+            if not allowed:
+                return await tasks[0]
+
+            metrics.increment(f"{self.metric_prefix}.hedged_requests")
+            tasks.append(asyncio.create_task(attempt()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            metrics.increment(f"{self.metric_prefix}.hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # 끝나지 않은 요청 취소 (헤지에서 졌거나 호출자가 취소된 경우)
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            if hedge_tokens is not None:
+                # 결과로 쓰이지 않은 요청(취소/실패)은 프롬프트만 처리된 것으로 보고 헤지 예약분 보정
+                # (결과로 쓰인 요청의 사용량은 호출자가 자신의 예약분으로 보정)
+                prompt_tokens, estimated_tokens = hedge_tokens
+                self.rate_limiter.settle(estimated_tokens, prompt_tokens)
+
+    async def _execute(self, call: Callable[[Any], Awaitable[T]]) -> T:
+        """차단기 상태에 따라 기본 모델(헤지 포함) 또는 대체 모델로 call 실행"""
+        if self.breaker.allow():
+            try:
+                result = await call(self.llm)
+            except BACKEND_ERRORS as e:
+                self._record_backend_error(e)
+                if self.fallback_llm is None:
+                    raise self._backend_error(e)
+                logger.warning(f"기본 LLM 호출 실패, 대체 모델로 전환: {e!r}")
+            except Exception:
+                # 요청 자체의 오류(인증, 잘못된 요청 등)는 백엔드 상태와 무관하므로 기록하지 않음
+                self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+        elif self.fallback_llm is None:
+            metrics.increment(f"{self.metric_prefix}.circuit_rejected")
+            raise LLMServiceError("LLM 서비스 오류가 계속되어 요청을 일시적으로 차단했습니다")
+
+        metrics.increment(f"{self.metric_prefix}.fallbacks")
+        try:
+            return await call(self.fallback_llm)
+        except BACKEND_ERRORS as e:
+            raise self._backend_error(e)
+
+    def _record_backend_error(self, error: BaseException) -> None:
+        """백엔드 오류를 차단기에 기록 (호출 제한 429는 한도 문제일 뿐 장애가 아니므로 실패로 세지 않음)"""
+        if isinstance(error, openai.RateLimitError):
+            self.breaker.release_trial()
+        else:
+            self.breaker.record_failure()
+
+    def _backend_error(self, error: BaseException) -> BaseException:
+        if isinstance(error, asyncio.TimeoutError):
+            return LLMServiceError(f"LLM 응답 시간이 초과되었습니다 ({self.attempt_timeout:g}초)")
+        return error
+
+    async def _invoke_once(self, llm, prompt_text: str):
+        start = time.monotonic()
+        message = await asyncio.wait_for(llm.ainvoke(prompt_text), timeout=self.attempt_timeout)
+        if llm is self.llm:
+            metrics.observe(f"{self.metric_prefix}.latency", time.monotonic() - start)
+        return message
+
+    async def ainvoke(self, prompt_text: str):
+        """답변 전체 생성"""
+        async def call(llm):
+            if llm is not self.llm:
+                return await self._invoke_once(llm, prompt_text)
+            return await self._hedged(lambda: self._invoke_once(llm, prompt_text), "latency", prompt_text)
+
+        return await self._execute(call)
+
+    async def _open_stream(self, llm, prompt_text: str) -> Tuple[AsyncIterator[Any], Optional[Any]]:
+        """스트림을 열고 첫 조각까지 수신, (스트림, 첫 조각 또는 None) 반환"""
+        start = time.monotonic()
+        stream = llm.astream(prompt_text)
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), timeout=self.attempt_timeout)
+        except StopAsyncIteration:
+            return stream, None
+        except BaseException:
+            await stream.aclose()
+            raise
+        if llm is self.llm:
+            metrics.observe(f"{self.metric_prefix}.first_token_latency", time.monotonic() - start)
+        return stream, first
+
+    async def _open_stream_hedged(self, llm, prompt_text: str) -> Tuple[AsyncIterator[Any], Optional[Any]]:
+        if llm is not self.llm:
+            return await self._open_stream(llm, prompt_text)
+
+        opened = []
+
+        async def attempt() -> Tuple[AsyncIterator[Any], Optional[Any]]:
+            result = await self._open_stream(llm, prompt_text)
+            opened.append(result[0])
+            return result
+
+        result = None
+        try:
+            result = await self._hedged(attempt, "first_token_latency", prompt_text)
+            return result
+        finally:
+            # 헤지에서 진 스트림 닫기
+            for stream in opened:
+                if result is None or stream is not result[0]:
+                    await stream.aclose()
+
+    async def astream(self, prompt_text: str) -> AsyncIterator[Any]:
+        """토큰 단위 스트리밍 (첫 조각 이전 실패만 대체 모델로 전환)"""
+        stream, first = await self._execute(lambda llm: self._open_stream_hedged(llm, prompt_text))
+        if first is None:
+            return
+        try:
+            yield first
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=self.attempt_timeout)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        except BACKEND_ERRORS as e:
+            self._record_backend_error(e)
+            raise self._backend_error(e)
+        finally:
+            await stream.aclose()
@@ -0,0 +1,137 @@
+from functools import lru_cache
+from collections import deque
+from itertools import islice
+from concurrent.futures import Executor, ProcessPoolExecutor
+from langchain_core.documents import Document
+from langchain_community.document_loaders import TextLoader, CSVLoader, UnstructuredHTMLLoader
+from app.core.config import settings
+from app.exceptions import InvalidFileFormatError
+import asyncio
+import multiprocessing
+import os
+import threading
+import logging
+from typing import AsyncIterator, Deque, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 풀 작업 하나가 파싱할 PDF 페이지 수
+PDF_PAGES_PER_TASK = 8
+
+# lazy 로더에서 한 번에 읽을 문서 수
+LAZY_LOAD_BATCH_SIZE = 256
+
+# ---- 프로세스 풀에서 실행되는 함수 (pickle 가능하도록 모듈 최상위에 정의) ----
+
+# 작업자(프로세스/스레드)별로 마지막에 연 PDF 리더
+_pdf_readers = threading.local()
+
+def _open_pdf(file_path: str):
+    """PDF 리더 반환 (같은 파일의 다음 구간은 상호 참조 테이블을 다시 읽지 않도록 재사용)"""
+    from pypdf import PdfReader
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_mtime_ns, stat.st_size)
+    cached = getattr(_pdf_readers, "cached", None)
+    if cached is None or cached[0] != key:
+        cached = (key, PdfReader(file_path))
+        _pdf_readers.cached = cached
+    return cached[1]
+
+def _count_pdf_pages(file_path: str) -> int:
+    return len(_open_pdf(file_path).pages)
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """PDF의 [start, end) 페이지 텍스트 추출"""
+    reader = _open_pdf(file_path)
+    pages = [(page_number, reader.pages[page_number].extract_text() or "") for page_number in range(start, end)]
+    if end >= len(reader.pages):
+        # 마지막 구간을 추출한 작업자는 리더를 바로 해제
+        _pdf_readers.cached = None
+    return pages
+
+def _load_with_loader(file_path: str) -> List[Tuple[str, dict]]:
+    """PDF 외 형식을 LangChain 로더로 파싱"""
+    if file_path.endswith('.txt'):
+        loader = TextLoader(file_path)
+    elif file_path.endswith('.csv'):
+        loader = CSVLoader(file_path)
+    elif file_path.endswith('.html'):
+        loader = UnstructuredHTMLLoader(file_path)
+    else:
+        raise InvalidFileFormatError(f"지원하지 않는 파일 형식입니다: {file_path}")
+    return [(doc.page_content, doc.metadata) for doc in loader.load()]
+
+def _next_batch(iterator: Iterator[Document], size: int) -> List[Document]:
+    return list(islice(iterator, size))
+
+# ---- 이벤트 루프 측 인터페이스 ----
+
+@lru_cache(maxsize=1)
+def get_parser_pool() -> Optional[Executor]:
+    """문서 파싱용 프로세스 풀 제공 (싱글톤, PARSER_WORKERS=0이면 None → 스레드에서 파싱)"""
+    if settings.PARSER_WORKERS <= 0:
+        return None
+    logger.info(f"문서 파싱 프로세스 풀 시작 (workers={settings.PARSER_WORKERS})")
+    # 이벤트 루프/스레드 상태를 복제하지 않도록 spawn 방식으로 생성
+    return ProcessPoolExecutor(
+        max_workers=settings.PARSER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+def shutdown_parser_pool() -> None:
+    """프로세스 풀 종료"""
+    if get_parser_pool.cache_info().currsize:
+        pool = get_parser_pool()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        get_parser_pool.cache_clear()
+
+async def _run(func, *args):
+    pool = get_parser_pool()
+    loop = asyncio.get_running_loop()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await loop.run_in_executor(pool, func, *args)
+
+async def iter_document_pages(file_path: str) -> AsyncIterator[List[Document]]:
+    """문서를 프로세스 풀에서 파싱하여 페이지 묶음 단위로 순서대로 반환
+
+    PDF는 페이지 구간을 나눠 여러 프로세스에서 병렬로 추출하고,
+    앞 구간이 끝나는 대로 다음 단계(분할)로 넘길 수 있도록 스트리밍합니다.
+    CSV는 lazy 로더로 행을 묶음 단위로 읽습니다.
+    메타데이터 형식은 기존 LangChain 로더와 같습니다 (source, page).
+    """
+    if file_path.endswith('.pdf'):
+        page_count = await _run(_count_pdf_pages, file_path)
+        ranges = iter(range(0, page_count, PDF_PAGES_PER_TASK))
+        # 동시에 추출 중인 구간 수를 제한해 메모리 사용량을 문서 크기와 무관하게 유지
+        max_in_flight = max(1, settings.PARSER_WORKERS) * 2
+        in_flight: Deque[asyncio.Future] = deque()
+
+        def schedule_next() -> None:
+            start = next(ranges, None)
+            if start is not None:
+                end = min(start + PDF_PAGES_PER_TASK, page_count)
+                in_flight.append(asyncio.ensure_future(_run(_extract_pdf_pages, file_path, start, end)))
+
+        for _ in range(max_in_flight):
+            schedule_next()
+        try:
+            while in_flight:
+                pages = await in_flight.popleft()
+                schedule_next()
+                yield [
+                    Document(page_content=text, metadata={"source": file_path, "page": page_number})
+                    for page_number, text in pages
+                ]
+        finally:
+            for task in in_flight:
+                task.cancel()
+    elif file_path.endswith('.csv'):
+        # 행 단위 lazy 로더를 스레드에서 묶음씩 읽기
+        rows = CSVLoader(file_path).lazy_load()
+        while batch := await asyncio.to_thread(_next_batch, rows, LAZY_LOAD_BATCH_SIZE):
+            yield batch
+    else:
+        documents = await _run(_load_with_loader, file_path)
+        yield [Document(page_content=text, metadata=metadata) for text, metadata in documents]
@@ -1,171 +1,416 @@
-from langchain.chains import RetrievalQA, ConversationalRetrievalChain
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from app.exceptions import RAGProcessingError, DocumentNotFoundError, LLMServiceError, RateLimitError
+from langchain_core.documents import Document
+from app.exceptions import RAGServiceError, RAGProcessingError, DocumentNotFoundError, LLMServiceError, RateLimitError
+from app.core.metrics import metrics
+from app.services.retriever import get_relevance_score_fn, apply_score_cutoff, reciprocal_rank_fusion
+from app.services.context_packing import PackedContext, pack_context
+from app.services.corpus import get_corpus_state
+from app.services.embeddings import normalize_query
+from app.services.rate_limiter import PRIORITY_INTERACTIVE
+from app.utils.tokens import count_tokens
 import asyncio
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import logging
 
 logger = logging.getLogger(__name__)
 
 class RAGService:
     """RAG 관련 기능을 제공하는 서비스 클래스"""
-    
-    def __init__(self, embeddings, llm, retriever, retriever_k=3, verbose=False):
+
+    def __init__(self, embeddings, llm, retriever, retriever_k=3, score_threshold=0.0, score_margin=0.0,
+                 lexical_index=None, lexical_k=5, rrf_k=60, answer_cache=None, context_token_budget=0,
+                 context_duplicate_threshold=0.9, single_flight=None, corpus_state=None, rate_limiter=None, verbose=False):
         self.embeddings = embeddings
         self.llm = llm
         self.retriever = retriever
         self.retriever_k = retriever_k
+        self.score_threshold = score_threshold  # 최소 관련도 점수
+        self.score_margin = score_margin  # 최고 점수 대비 허용 점수 차이 (동적 k)
+        self.lexical_index = lexical_index  # BM25 색인 (None이면 벡터 검색만 사용)
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        self.answer_cache = answer_cache  # 시맨틱 답변 캐시 (None이면 비활성화)
+        self.context_token_budget = context_token_budget  # 문맥 최대 토큰 수 (0이면 제한 없음)
+        self.context_duplicate_threshold = context_duplicate_threshold  # 근접 중복 판단 유사도
+        self.single_flight = single_flight  # 동일 질의 동시 요청 병합 (None이면 비활성화)
+        self.corpus_state = corpus_state or get_corpus_state()
+        self.rate_limiter = rate_limiter  # LLM RPM/TPM 호출 제한 스케줄러 (None이면 비활성화)
         self.verbose = verbose  # 디버그 출력 여부
-        
-        # 기본 QA Chain 생성
-        self.qa_chain = self._create_qa_chain()
-        
-        # 대화 Chain 생성
-        self.conversation_chain = self._create_conversation_chain()
-        
+
+        # Retriever가 감싸고 있는 Vector Store (직접 벡터 검색에 사용)
+        self.vector_store = getattr(retriever, "vectorstore", None)
+        self.relevance_score_fn = (
+            get_relevance_score_fn(self.vector_store) if self.vector_store is not None else None
+        )
+
+        # QA 프롬프트 생성
+        self.qa_prompt = self._create_qa_prompt()
+
+        # 대화용 프롬프트 생성
+        self.condense_question_prompt, self.conversation_prompt = self._create_conversation_prompts()
+
         logger.info("RAG 서비스가 성공적으로 초기화되었습니다.")
-    
-    def _create_qa_chain(self):
-        """기본 QA Chain 생성"""
+
+    def _create_qa_prompt(self) -> PromptTemplate:
+        """기본 QA 프롬프트 생성"""
         # QA 프롬프트 템플릿
         template = """다음 문맥을 사용하여 질문에 답변하세요.
-        
-        만약 문맥에서 답을 찾을 수 없다면, '제공된 문맥에서는 이 질문에 대한 정보를 찾을 수 없습니다.'라고 말하고 
+
+        만약 문맥에서 답을 찾을 수 없다면, '제공된 문맥에서는 이 질문에 대한 정보를 찾을 수 없습니다.'라고 말하고
         알고 있는 정보를 기반으로 최선의 답변을 제공하세요. 답변을 지어내지 마세요.
-        
+
         중요한 점은 답변을 마크다운 형식으로 작성해야 합니다. 제목, 목록, 코드 블록, 표, 강조 등의 마크다운 문법을 적절히 활용하세요.
-        
+
         문맥: {context}
-        
+
         질문: {question}
-        
+
         답변(마크다운 형식):"""
-        
-        PROMPT = PromptTemplate(
+
+        return PromptTemplate(
             template=template,
             input_variables=["context", "question"]
         )
-        
-        # QA Chain 생성
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",  # 모든 문서를 하나의 프롬프트로 결합
-            retriever=self.retriever,
-            return_source_documents=True,  # 소스 문서 반환
-            chain_type_kwargs={"prompt": PROMPT}
-        )
-        
-        return qa_chain
-    
-    def _create_conversation_chain(self):
-        """대화 Chain 생성"""
-        # 메모리 초기화
-        memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            output_key="answer"
-        )
-        
+
+    def _create_conversation_prompts(self) -> Tuple[PromptTemplate, PromptTemplate]:
+        """대화용 프롬프트 생성 (질문 재구성 + 답변 생성)"""
+        # 대화 내역을 반영하여 독립적인 질문으로 재구성하는 프롬프트
+        condense_template = """다음 대화 내역과 후속 질문이 주어지면, 후속 질문을 대화 내역 없이도 이해할 수 있는 독립적인 질문으로 바꾸어 작성하세요.
+
+        대화 내역:
+        {chat_history}
+
+        후속 질문: {question}
+
+        독립적인 질문:"""
+
         # 시스템 메시지 설정
         system_message = """당신은 문서 기반 질의응답을 제공하는 AI 어시스턴트입니다.
         질문에 대한 답변을 주어진 문서를 기반으로 생성하세요.
         답변은 반드시 마크다운 형식으로 제공하고, 제목, 목록, 코드 블록, 표, 강조 등의 마크다운 문법을 적절히 활용하세요.
         답변을 모르거나 문서에 없는 경우 솔직하게 모른다고 인정하세요."""
-        
-        # 대화 Chain 생성
-        conversation_chain = ConversationalRetrievalChain.from_llm(
-            llm=self.llm,
-            retriever=self.retriever,
-            memory=memory,
-            return_source_documents=True,  # 소스 문서 반환
-            verbose=self.verbose
+
+        answer_template = system_message + """
+
+        문맥: {context}
+
+        질문: {question}
+
+        답변(마크다운 형식):"""
+
+        condense_prompt = PromptTemplate(
+            template=condense_template,
+            input_variables=["chat_history", "question"]
         )
-        
-        return conversation_chain
-    
-    async def get_answer(self, query: str) -> str:
-        """쿼리에 대한 답변 생성 (기본 QA Chain 사용)"""
-        try:
-            # 비동기 래퍼
-            answer = await self.run_chain_async(query)
-            return answer
-        except Exception as e:
-            logger.error(f"답변 생성 중 오류 발생: {e}")
-            self._handle_llm_error(e)
-    
-    async def get_answer_with_sources(self, query: str) -> Dict[str, Any]:
-        """쿼리에 대한 답변과 소스 문서 정보를 반환"""
-        start_time = time.time()
-        
+        answer_prompt = PromptTemplate(
+            template=answer_template,
+            input_variables=["context", "question"]
+        )
+
+        return condense_prompt, answer_prompt
+
+    async def _retrieve(self, query: str, timings: Optional[Dict[str, float]] = None,
+                        query_embedding: Optional[List[float]] = None) -> List[Tuple[Any, Optional[float]]]:
+        """쿼리 임베딩과 벡터 검색을 비동기로 수행하여 (문서, 관련도 점수) 목록 반환
+
+        BM25 색인이 있으면 어휘 검색 결과를 Reciprocal Rank Fusion으로 결합합니다.
+        어휘 검색으로만 찾은 청크는 벡터 관련도 점수가 없으므로 점수가 None입니다.
+        """
+        if self.vector_store is None:
+            # Vector Store에 직접 접근할 수 없는 Retriever는 비동기 인터페이스 사용 (점수 없음)
+            docs = await self.retriever.ainvoke(query)
+            return [(doc, None) for doc in docs]
+
+        # 쿼리 임베딩(네트워크)과 BM25 검색(CPU)을 동시에 수행
+        lexical_results = []
+        if query_embedding is not None:
+            if self.lexical_index is not None:
+                lexical_results = await asyncio.to_thread(self._lexical_search, query, timings)
+        elif self.lexical_index is not None:
+            query_embedding, lexical_results = await asyncio.gather(
+                self.embeddings.aembed_query(query),
+                asyncio.to_thread(self._lexical_search, query, timings)
+            )
+        else:
+            query_embedding = await self.embeddings.aembed_query(query)
+
+        # 로컬 벡터 검색은 짧은 CPU 작업이므로 스레드에서 실행
+        # 같은 검색에서 거리 값을 함께 받아 관련도 점수로 변환
+        results = await asyncio.to_thread(
+            self.vector_store.similarity_search_by_vector_with_relevance_scores,
+            query_embedding,
+            k=self.retriever_k
+        )
+        scored_docs = [(doc, self.relevance_score_fn(distance)) for doc, distance in results]
+
+        scored_docs = apply_score_cutoff(
+            scored_docs,
+            max_k=self.retriever_k,
+            score_threshold=self.score_threshold,
+            score_margin=self.score_margin
+        )
+
+        if not lexical_results:
+            return scored_docs
+
+        # 벡터 결과와 BM25 결과를 RRF로 결합
+        fused = reciprocal_rank_fusion(
+            [
+                [(self._doc_key(doc), (doc, score)) for doc, score in scored_docs],
+                [(self._doc_key(doc), (doc, None)) for doc in lexical_results]
+            ],
+            k=self.retriever_k,
+            rrf_k=self.rrf_k
+        )
+        return [value for _, value in fused]
+
+    def _lexical_search(self, query: str, timings: Optional[Dict[str, float]] = None) -> List[Document]:
+        """BM25 색인 검색 (추가 지연 시간 기록)"""
+        stage_start = time.time()
+        docs = []
+        for chunk_id, _ in self.lexical_index.search(query, self.lexical_k):
+            chunk = self.lexical_index.get_chunk(chunk_id)
+            if chunk:
+                docs.append(Document(page_content=chunk["text"], metadata=chunk["metadata"]))
+
+        latency = time.time() - stage_start
+        metrics.observe("retrieval.lexical_latency", latency)
+        if timings is not None:
+            timings["lexical_retrieval"] = latency
+        return docs
+
+    @staticmethod
+    def _doc_key(doc) -> Tuple[Optional[str], str]:
+        """검색 결과 결합용 청크 식별 키 (문서 ID + 청크 내용)"""
+        return doc.metadata.get("document_id"), doc.page_content
+
+    def _estimate_call_tokens(self, prompt_text: str) -> int:
+        """호출 제한 계산용 예상 토큰 수 (프롬프트 + 최대 출력 토큰)"""
+        model_name = getattr(self.llm, "model_name", None)
+        return count_tokens(prompt_text, model_name) + (getattr(self.llm, "max_tokens", None) or 0)
+
+    async def _generate(self, prompt_text: str) -> Tuple[str, Dict[str, int]]:
+        """LLM 비동기 호출로 답변 생성"""
+        estimated_tokens = self._estimate_call_tokens(prompt_text) if self.rate_limiter else 0
         try:
-            # 1. 관련 문서 검색
-            docs = await asyncio.to_thread(self.retriever.get_relevant_documents, query)
-            
-            # 검색된 문서가 없는 경우
-            if not docs:
-                raise DocumentNotFoundError("질문과 관련된 문서를 찾을 수 없습니다")
-            
-            # 2. LLM으로 답변 생성
-            try:
-                chain_result = await asyncio.to_thread(self.qa_chain, {"query": query})
-            except Exception as llm_error:
-                self._handle_llm_error(llm_error)
-            
-            # 결과 추출
-            if isinstance(chain_result, dict):
-                if "result" in chain_result:
-                    answer = chain_result["result"]
-                elif "answer" in chain_result:
-                    answer = chain_result["answer"]
-                else:
-                    answer = str(chain_result)
+            if self.rate_limiter is None:
+                message = await self.llm.ainvoke(prompt_text)
             else:
-                answer = str(chain_result)
-            
-            # 3. 소스 문서 정보 처리
-            sources = []
-            source_documents = chain_result.get("source_documents", docs)
-            
-            for i, doc in enumerate(source_documents):
-                source_info = {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": getattr(doc, "score", 1.0 - (i * 0.1))  # 임의 점수 부여
-                }
-                sources.append(source_info)
-            
-            # 4. 처리 시간 계산
-            processing_time = time.time() - start_time
-            
-            # 5. 토큰 수 계산 (가능한 경우)
-            token_info = {}
-            try:
-                import tiktoken
-                encoding = tiktoken.encoding_for_model(self.llm.model_name)
-                
-                context_text = "\n\n".join([doc.page_content for doc in source_documents])
-                prompt_text = context_text + query
-                answer_text = answer
-                
-                prompt_tokens = len(encoding.encode(prompt_text))
-                completion_tokens = len(encoding.encode(answer_text))
-                
-                token_info = {
-                    "prompt_tokens": prompt_tokens,
-                    "completion_tokens": completion_tokens
-                }
-            except Exception as token_error:
-                logger.warning(f"토큰 수 계산 중 오류: {token_error}")
-            
+                message = await self.rate_limiter.run(
+                    lambda: self.llm.ainvoke(prompt_text), estimated_tokens, PRIORITY_INTERACTIVE
+                )
+        except Exception as llm_error:
+            self._handle_llm_error(llm_error)
+
+        # 응답에 포함된 실제 토큰 사용량 추출 (가능한 경우)
+        token_info = {}
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            token_info = {
+                "prompt_tokens": usage.get("input_tokens"),
+                "completion_tokens": usage.get("output_tokens")
+            }
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle(estimated_tokens, usage.get("total_tokens"))
+
+        return message.content, token_info
+
+    async def _stream(self, prompt_text: str) -> AsyncIterator[str]:
+        """LLM 스트리밍 호출로 토큰 단위 응답 생성"""
+        if self.rate_limiter is None:
+            stream = self.llm.astream(prompt_text)
+        else:
+            estimated_tokens = self._estimate_call_tokens(prompt_text)
+            stream = self.rate_limiter.stream(
+                lambda: self.llm.astream(prompt_text), estimated_tokens, PRIORITY_INTERACTIVE
+            )
+
+        answer_parts = []
+        received = False
+        try:
+            async for chunk in stream:
+                received = True
+                if chunk.content:
+                    answer_parts.append(chunk.content)
+                    yield chunk.content
+        except Exception as llm_error:
+            self._handle_llm_error(llm_error)
+        finally:
+            await stream.aclose()
+            if self.rate_limiter is not None and received:
+                # 스트리밍 응답에는 사용량이 없으므로 지금까지 받은 토큰으로 보정 (도중에 오류/취소되어도 보정)
+                # 첫 조각을 받기 전에 실패/취소된 시도의 예약분은 rate_limiter.stream이 반환
+                model_name = getattr(self.llm, "model_name", None)
+                actual_tokens = count_tokens(prompt_text, model_name) + count_tokens("".join(answer_parts), model_name)
+                self.rate_limiter.settle(estimated_tokens, actual_tokens)
+
+    def _pack_context(self, docs: List[Tuple[Any, Optional[float]]], timings: Dict[str, float]) -> PackedContext:
+        """검색된 문서를 토큰 예산 안에서 프롬프트 문맥으로 구성 (겹침 병합, 근접 중복 제거)"""
+        stage_start = time.time()
+        packed = pack_context(
+            docs,
+            token_budget=self.context_token_budget,
+            model_name=getattr(self.llm, "model_name", None),
+            duplicate_threshold=self.context_duplicate_threshold
+        )
+        timings["context_packing"] = time.time() - stage_start
+        metrics.increment("context.tokens_saved", packed.stats["tokens_saved"])
+        return packed
+
+    def _format_sources(self, docs: List[Tuple[Any, Optional[float]]]) -> List[Dict[str, Any]]:
+        """소스 문서 정보 처리 (Vector Store가 반환한 실제 관련도 점수 사용)"""
+        sources = []
+        for doc, score in docs:
+            source_info = {
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "score": score
+            }
+            sources.append(source_info)
+        return sources
+
+    def _count_tokens(self, prompt_text: str, answer: str) -> Dict[str, int]:
+        """tiktoken으로 토큰 수 계산 (응답에 사용량 정보가 없는 경우)"""
+        try:
+            model_name = getattr(self.llm, "model_name", None)
             return {
-                "answer": answer,
-                "sources": sources,
-                "processing_time": processing_time,
-                **token_info
+                "prompt_tokens": count_tokens(prompt_text, model_name),
+                "completion_tokens": count_tokens(answer, model_name)
             }
-        
+        except Exception as token_error:
+            logger.warning(f"토큰 수 계산 중 오류: {token_error}")
+            return {}
+
+    async def get_answer(self, query: str) -> str:
+        """쿼리에 대한 답변 생성"""
+        result = await self.get_answer_with_sources(query)
+        return result["answer"]
+
+    async def _lookup_answer_cache(self, query: str, start_time: float,
+                                   timings: Dict[str, float]) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+        """시맨틱 답변 캐시 조회, (쿼리 임베딩, 캐시된 결과 또는 None) 반환"""
+        if self.answer_cache is None:
+            return None, None
+
+        stage_start = time.time()
+        query_embedding = await self.embeddings.aembed_query(query)
+        cached = self.answer_cache.lookup(query_embedding)
+        timings["cache_lookup"] = time.time() - stage_start
+
+        if cached is None:
+            return query_embedding, None
+
+        result, similarity = cached
+        processing_time = time.time() - start_time
+        timings["total"] = processing_time
+        result.update({
+            "processing_time": processing_time,
+            "timings": timings,
+            "cache": {"hit": True, "similarity": similarity}
+        })
+        logger.info(f"답변 캐시 적중 (유사도 {similarity:.3f}): {query}")
+        return query_embedding, result
+
+    def _store_answer_cache(self, query: str, query_embedding: Optional[List[float]],
+                            result: Dict[str, Any], corpus_version: int) -> None:
+        """생성된 답변을 시맨틱 답변 캐시에 저장 (검색 이후 코퍼스가 바뀌었으면 저장하지 않음)"""
+        if self.answer_cache is None or query_embedding is None:
+            return
+        self.answer_cache.put(query, query_embedding, result, corpus_version=corpus_version)
+        result["cache"] = {"hit": False}
+
+    async def _prepare_answer(self, query: str, timings: Dict[str, float],
+                              query_embedding: Optional[List[float]] = None) -> Tuple[PackedContext, str]:
+        """단일 질의용 문서 검색 및 프롬프트 구성"""
+        # 관련 문서 검색 (요청당 한 번만 수행)
+        stage_start = time.time()
+        docs = await self._retrieve(query, timings, query_embedding)
+        timings["retrieval"] = time.time() - stage_start
+
+        # 검색된 문서가 없는 경우
+        if not docs:
+            raise DocumentNotFoundError("질문과 관련된 문서를 찾을 수 없습니다")
+
+        packed = self._pack_context(docs, timings)
+        prompt_text = self.qa_prompt.format(
+            context=packed.text,
+            question=query
+        )
+        return packed, prompt_text
+
+    def _build_result(self, answer: str, packed: PackedContext, prompt_text: str, start_time: float,
+                      timings: Dict[str, float], token_info: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """답변, 소스, 처리 시간, 토큰 정보, 문맥 구성 정보를 결과 딕셔너리로 구성"""
+        processing_time = time.time() - start_time
+        timings["total"] = processing_time
+
+        # 응답에 사용량 정보가 없는 경우 직접 토큰 수 계산
+        if not token_info:
+            token_info = self._count_tokens(prompt_text, answer)
+
+        return {
+            "answer": answer,
+            "sources": self._format_sources(packed.docs),
+            "processing_time": processing_time,
+            "timings": timings,
+            "context": packed.stats,
+            **token_info
+        }
+
+    def _coalescing_key(self, kind: str, query: str) -> Tuple[Any, ...]:
+        """동시 요청 병합 키 (정규화된 질의 + 검색/문맥 구성 설정 + 코퍼스 버전)"""
+        return (
+            kind,
+            normalize_query(query),
+            self.retriever_k,
+            self.score_threshold,
+            self.score_margin,
+            self.lexical_index is not None,
+            self.lexical_k,
+            self.rrf_k,
+            self.context_token_budget,
+            self.context_duplicate_threshold,
+            getattr(self.llm, "model_name", None),
+            self.corpus_state.version
+        )
+
+    async def get_answer_with_sources(self, query: str) -> Dict[str, Any]:
+        """쿼리에 대한 답변과 소스 문서 정보를 반환
+
+        같은 질의가 이미 처리 중이면 새로 검색/생성하지 않고 그 결과를 함께 받습니다.
+        """
+        if self.single_flight is None:
+            return await self._answer_with_sources(query)
+        return await self.single_flight.do(
+            self._coalescing_key("answer", query),
+            lambda: self._answer_with_sources(query)
+        )
+
+    async def _answer_with_sources(self, query: str) -> Dict[str, Any]:
+        start_time = time.time()
+        timings = {}
+
+        try:
+            # 0. 시맨틱 답변 캐시 조회
+            query_embedding, cached_result = await self._lookup_answer_cache(query, start_time, timings)
+            if cached_result is not None:
+                return cached_result
+
+            # 1. 관련 문서 검색 및 프롬프트 구성 (검색 시점의 코퍼스 버전 기록)
+            corpus_version = self.corpus_state.version
+            packed, prompt_text = await self._prepare_answer(query, timings, query_embedding)
+
+            # 2. 검색된 문서로 바로 답변 생성
+            stage_start = time.time()
+            answer, token_info = await self._generate(prompt_text)
+            timings["generation"] = time.time() - stage_start
+
+            # 3. 소스, 처리 시간, 토큰 정보 정리
+            result = self._build_result(answer, packed, prompt_text, start_time, timings, token_info)
+            self._store_answer_cache(query, query_embedding, result, corpus_version)
+            return result
+
         except (DocumentNotFoundError, LLMServiceError, RateLimitError):
             # 이미 적절한 예외가 발생한 경우 다시 발생
             raise
@@ -173,69 +418,166 @@ class RAGService:
             # 기타 모든 예외는 RAGProcessingError로 래핑
             logger.error(f"RAG 처리 중 예상치 못한 오류: {e}")
             raise RAGProcessingError(f"RAG 처리 중 예상치 못한 오류: {str(e)}")
-    
+
+    async def stream_answer_with_sources(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """쿼리에 대한 답변을 토큰 단위로 스트리밍하고 마지막에 소스 정보를 반환
+
+        `{"event": "token", "data": {"delta": ...}}` 이벤트를 순서대로 생성한 뒤
+        get_answer_with_sources와 같은 형태의 결과를 담은 `final` 이벤트를 생성합니다.
+        같은 질의의 스트림이 이미 진행 중이면 그 토큰 스트림을 처음부터 함께 받습니다.
+        """
+        if self.single_flight is None:
+            stream = self._stream_answer_with_sources(query)
+        else:
+            stream = self.single_flight.stream(
+                self._coalescing_key("stream", query),
+                lambda: self._stream_answer_with_sources(query)
+            )
+        try:
+            async for event in stream:
+                yield event
+        finally:
+            # 클라이언트 연결이 끊기면 즉시 구독 해제
+            await stream.aclose()
+
+    async def _stream_answer_with_sources(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        start_time = time.time()
+        timings = {}
+
+        try:
+            # 캐시 적중 시 답변 전체를 하나의 토큰 이벤트로 전달
+            query_embedding, cached_result = await self._lookup_answer_cache(query, start_time, timings)
+            if cached_result is not None:
+                yield {"event": "token", "data": {"delta": cached_result["answer"]}}
+                yield {"event": "final", "data": cached_result}
+                return
+
+            corpus_version = self.corpus_state.version
+            packed, prompt_text = await self._prepare_answer(query, timings, query_embedding)
+
+            async for event in self._stream_result(packed, prompt_text, start_time, timings):
+                if event["event"] == "final":
+                    self._store_answer_cache(query, query_embedding, event["data"], corpus_version)
+                yield event
+
+        except (DocumentNotFoundError, LLMServiceError, RateLimitError):
+            raise
+        except Exception as e:
+            logger.error(f"RAG 스트리밍 처리 중 예상치 못한 오류: {e}")
+            raise RAGProcessingError(f"RAG 처리 중 예상치 못한 오류: {str(e)}")
+
+    async def _stream_result(self, packed: PackedContext, prompt_text: str, start_time: float,
+                             timings: Dict[str, float]) -> AsyncIterator[Dict[str, Any]]:
+        """토큰 이벤트를 생성하고 첫 토큰까지의 시간(TTFT)을 기록"""
+        stage_start = time.time()
+        answer_parts = []
+
+        async for delta in self._stream(prompt_text):
+            if not answer_parts:
+                time_to_first_token = time.time() - start_time
+                timings["time_to_first_token"] = time_to_first_token
+                metrics.observe("chat.time_to_first_token", time_to_first_token)
+            answer_parts.append(delta)
+            yield {"event": "token", "data": {"delta": delta}}
+
+        timings["generation"] = time.time() - stage_start
+
+        answer = "".join(answer_parts)
+        yield {
+            "event": "final",
+            "data": self._build_result(answer, packed, prompt_text, start_time, timings)
+        }
+
+    async def _condense_question(self, query: str, formatted_history: List[Tuple[str, str]]) -> str:
+        """대화 내역을 반영하여 독립적인 질문으로 재구성"""
+        if not formatted_history:
+            return query
+
+        history_text = "\n".join(
+            [f"Human: {human}\nAssistant: {ai}" for human, ai in formatted_history]
+        )
+        prompt_text = self.condense_question_prompt.format(
+            chat_history=history_text,
+            question=query
+        )
+        standalone_question, _ = await self._generate(prompt_text)
+        return standalone_question.strip() or query
+
+    async def _prepare_conversation(self, query: str, chat_history: Optional[List[Dict[str, str]]],
+                                    timings: Dict[str, float]) -> Tuple[PackedContext, str]:
+        """대화 내역을 반영한 문서 검색 및 프롬프트 구성"""
+        # 대화 내역 변환
+        formatted_history = []
+        for entry in chat_history or []:
+            if isinstance(entry, dict) and "human" in entry and "ai" in entry:
+                formatted_history.append((entry["human"], entry["ai"]))
+
+        # 1. 대화 내역을 반영한 질문 재구성
+        stage_start = time.time()
+        standalone_question = await self._condense_question(query, formatted_history)
+        timings["condense"] = time.time() - stage_start
+
+        # 2. 관련 문서 검색
+        stage_start = time.time()
+        docs = await self._retrieve(standalone_question, timings)
+        timings["retrieval"] = time.time() - stage_start
+
+        packed = self._pack_context(docs, timings)
+        prompt_text = self.conversation_prompt.format(
+            context=packed.text,
+            question=standalone_question
+        )
+        return packed, prompt_text
+
     async def get_conversation_response(self, query: str, chat_history=None) -> Dict[str, Any]:
         """대화 내역을 고려한 답변 생성"""
         start_time = time.time()
-        
-        if chat_history is None:
-            chat_history = []
-        
+        timings = {}
+
         try:
-            # 대화 내역 변환
-            formatted_history = []
-            for entry in chat_history:
-                if isinstance(entry, dict) and "human" in entry and "ai" in entry:
-                    formatted_history.append((entry["human"], entry["ai"]))
-            
-            # 비동기적으로 대화 Chain 실행
-            result = await asyncio.to_thread(
-                self.conversation_chain,
-                {"question": query, "chat_history": formatted_history}
-            )
-            
-            # 관련 문서 추출
-            sources = []
-            source_documents = result.get("source_documents", [])
-            
-            for i, doc in enumerate(source_documents):
-                source_info = {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": getattr(doc, "score", 1.0 - (i * 0.1))  # 임의 점수 부여
-                }
-                sources.append(source_info)
-            
-            # 처리 시간 계산
-            processing_time = time.time() - start_time
-            
-            return {
-                "answer": result["answer"],
-                "sources": sources,
-                "processing_time": processing_time
-            }
-        
+            packed, prompt_text = await self._prepare_conversation(query, chat_history, timings)
+
+            # 3. 답변 생성
+            stage_start = time.time()
+            answer, token_info = await self._generate(prompt_text)
+            timings["generation"] = time.time() - stage_start
+
+            return self._build_result(answer, packed, prompt_text, start_time, timings, token_info)
+
+        except (LLMServiceError, RateLimitError):
+            raise
         except Exception as e:
             logger.error(f"대화 응답 생성 중 오류 발생: {e}")
             self._handle_llm_error(e)
             raise RAGProcessingError(f"대화 응답 생성 중 오류: {str(e)}")
-    
-    async def run_chain_async(self, query: str) -> str:
-        """QA Chain 비동기 실행 래퍼"""
+
+    async def stream_conversation_response(self, query: str, chat_history=None) -> AsyncIterator[Dict[str, Any]]:
+        """대화 내역을 고려한 답변을 토큰 단위로 스트리밍"""
+        start_time = time.time()
+        timings = {}
+
         try:
-            # 비동기적으로 Chain 실행
-            result = await asyncio.to_thread(self.qa_chain.run, query)
-            return result
+            packed, prompt_text = await self._prepare_conversation(query, chat_history, timings)
+
+            async for event in self._stream_result(packed, prompt_text, start_time, timings):
+                yield event
+
+        except (LLMServiceError, RateLimitError):
+            raise
         except Exception as e:
+            logger.error(f"대화 스트리밍 중 오류 발생: {e}")
             self._handle_llm_error(e)
-    
+
     def _handle_llm_error(self, error: Exception):
         """LLM 오류 처리"""
+        if isinstance(error, RAGServiceError):
+            # 복원력 계층에서 이미 변환한 오류 (제한 시간 초과, 회로 차단 등)
+            raise error
         error_str = str(error).lower()
-        
+
         if "rate limit" in error_str or "quota" in error_str:
             raise RateLimitError("OpenAI API 호출 제한에 도달했습니다")
         elif "invalid api key" in error_str or "authentication" in error_str:
             raise LLMServiceError("OpenAI API 키가 유효하지 않습니다")
         else:
-            raise LLMServiceError(f"LLM 처리 중 오류: {str(error)}")
\ No newline at end of file
+            raise LLMServiceError(f"LLM 처리 중 오류: {str(error)}")
@@ -0,0 +1,262 @@
+from functools import lru_cache
+from app.core.config import settings
+from app.core.metrics import metrics
+import asyncio
+import random
+import threading
+import time
+import logging
+import openai
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 요청 우선순위 (대화형 요청이 수집 임베딩보다 우선)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# 재시도할 OpenAI 오류 (호출 제한, 일시적인 연결/서버 오류)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+def is_quota_exhausted(error: BaseException) -> bool:
+    """계정 사용 한도 소진(insufficient_quota) 429 여부 (재시도해도 성공하지 않음)"""
+    if not isinstance(error, openai.RateLimitError):
+        return False
+    code = getattr(error, "code", None)
+    if code is None:
+        body = getattr(error, "body", None)
+        if isinstance(body, dict):
+            code = (body.get("error") or body).get("code")
+    return code == "insufficient_quota"
+
+class TokenBucket:
+    """분당 한도를 초당 일정 속도로 채우는 토큰 버킷"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """amount만큼 사용할 수 있을 때까지 남은 시간(초)"""
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+class RateLimiter:
+    """모델별 OpenAI 분당 요청 수(RPM)/토큰 수(TPM) 제한을 지키는 클라이언트 측 스케줄러
+
+    호출마다 예상 토큰 수만큼 두 버킷에서 차감하고, 여유가 없으면 채워질 때까지 기다립니다.
+    백그라운드 요청(수집 임베딩)은 버킷의 background_reserve 비율을 대화형 요청 몫으로 남겨 두고
+    그 이상 여유가 있을 때만 실행되므로, 대량 수집 중에도 채팅 지연이 늘지 않습니다.
+    호출 제한/일시적 오류는 지터를 적용한 지수 백오프로 재시도하며,
+    호출 제한 응답을 받으면 같은 모델의 다른 요청도 함께 잠시 멈춥니다.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, background_reserve: float = 0.2, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0, metric_prefix: str = "rate_limiter"):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.background_reserve = background_reserve
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metric_prefix = metric_prefix
+        self._lock = threading.Lock()  # 비동기 호출과 스레드의 동기 호출이 함께 사용
+        self._paused_until = 0.0
+
+    def _try_acquire(self, tokens: int, priority: int) -> float:
+        """버킷에서 차감 시도, 차감했으면 0, 아니면 다시 시도할 때까지 기다릴 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            wait = 0.0
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket is None:
+                    continue
+                bucket.refill(now)
+                # 버킷보다 큰 요청은 가득 찼을 때 실행 (영원히 기다리지 않도록)
+                amount = min(amount, bucket.capacity)
+                if priority != PRIORITY_INTERACTIVE:
+                    amount = min(amount + bucket.capacity * self.background_reserve, bucket.capacity)
+                wait = max(wait, bucket.time_until(amount))
+            if wait > 0:
+                return wait
+
+            if self.requests is not None:
+                self.requests.level -= 1
+            if self.tokens is not None:
+                self.tokens.level -= min(tokens, self.tokens.capacity)
+            return 0.0
+
+    def try_acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """기다리지 않고 한도 확보 시도 (여유가 없으면 False)"""
+        return self._try_acquire(tokens, priority) <= 0
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """호출 한 번과 예상 토큰 수만큼의 한도 확보 (필요하면 대기)"""
+        start = time.monotonic()
+        while (wait := self._try_acquire(tokens, priority)) > 0:
+            await asyncio.sleep(wait)
+        self._record_wait(time.monotonic() - start, priority)
+
+    def acquire_sync(self, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """acquire의 동기 버전 (스레드에서 실행되는 호출용)"""
+        start = time.monotonic()
+        while (wait := self._try_acquire(tokens, priority)) > 0:
+            time.sleep(wait)
+        self._record_wait(time.monotonic() - start, priority)
+
+    def _record_wait(self, waited: float, priority: int) -> None:
+        label = "interactive" if priority == PRIORITY_INTERACTIVE else "background"
+        metrics.observe(f"{self.metric_prefix}.wait_time.{label}", waited)
+        if waited > 0:
+            metrics.increment(f"{self.metric_prefix}.throttled.{label}")
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """실제 사용 토큰 수로 TPM 버킷 보정 (예상보다 적게 쓰면 반환, 많이 쓰면 추가 차감)
+
+        한도를 한 번 확보해 성공한 호출에 대해서만 호출합니다. (실패한 시도의 예약분은 release로 반환)
+        """
+        if self.tokens is None or not actual_tokens:
+            return
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated_tokens - actual_tokens)
+
+    def release(self, tokens: int) -> None:
+        """확보한 토큰 예약분을 TPM 버킷에 반환 (실패/취소되어 토큰을 쓰지 않은 호출용, 요청 수는 반환하지 않음)"""
+        if self.tokens is None:
+            return
+        with self._lock:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + min(tokens, self.tokens.capacity))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """재시도 대기 시간 (full jitter 지수 백오프, 서버가 알려준 Retry-After 이상)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            pass
+
+        if isinstance(error, openai.RateLimitError):
+            # 호출 제한에 걸리면 같은 모델의 다른 요청도 함께 대기
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        metrics.increment(f"{self.metric_prefix}.retries")
+        logger.warning(f"OpenAI 호출 재시도 {attempt + 1}/{self.max_retries} ({delay:.2f}초 후): {error}")
+        return delay
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if is_quota_exhausted(error):
+            # 사용 한도 소진은 재시도하지 않고 다른 요청도 멈추지 않음
+            metrics.increment(f"{self.metric_prefix}.quota_exhausted")
+            return False
+        return isinstance(error, RETRYABLE_ERRORS) and attempt < self.max_retries
+
+    async def run(self, func: Callable[[], Awaitable[T]], tokens: int,
+                  priority: int = PRIORITY_INTERACTIVE) -> T:
+        """한도를 확보한 뒤 func() 실행 (재시도 가능한 오류는 백오프 후 재시도)
+
+        실패/취소된 시도의 토큰 예약분은 바로 반환하므로, 호출자는 성공한 호출 한 번만 settle로 보정합니다.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens, priority)
+            try:
+                return await func()
+            except BaseException as e:
+                self.release(tokens)
+                if not isinstance(e, Exception) or not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def run_sync(self, func: Callable[[], T], tokens: int, priority: int = PRIORITY_INTERACTIVE) -> T:
+        """run의 동기 버전"""
+        attempt = 0
+        while True:
+            self.acquire_sync(tokens, priority)
+            try:
+                return func()
+            except BaseException as e:
+                self.release(tokens)
+                if not isinstance(e, Exception) or not self._should_retry(e, attempt):
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    async def stream(self, func: Callable[[], AsyncIterator[T]], tokens: int,
+                     priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[T]:
+        """한도를 확보한 뒤 func()의 스트림 전달 (첫 조각을 받기 전 오류만 재시도)
+
+        첫 조각을 받기 전에 실패/취소된 시도의 토큰 예약분은 바로 반환하므로,
+        호출자는 조각을 하나라도 받은 경우에만 settle로 보정합니다.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens, priority)
+            started = False
+            try:
+                async for item in func():
+                    started = True
+                    yield item
+                return
+            except BaseException as e:
+                if started:
+                    raise
+                self.release(tokens)
+                if not isinstance(e, Exception) or not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.refill(now)
+            return {
+                "requests_available": self.requests.level if self.requests else None,
+                "tokens_available": self.tokens.level if self.tokens else None,
+                "paused_for": max(0.0, self._paused_until - now)
+            }
+
+def _create_rate_limiter(rpm: int, tpm: int, metric_prefix: str) -> Optional[RateLimiter]:
+    if rpm <= 0 and tpm <= 0:
+        return None
+    limiter = RateLimiter(
+        rpm=rpm,
+        tpm=tpm,
+        background_reserve=settings.RATE_LIMIT_BACKGROUND_RESERVE,
+        max_retries=settings.RATE_LIMIT_MAX_RETRIES,
+        metric_prefix=metric_prefix
+    )
+    metrics.register_gauge(metric_prefix, limiter.stats)
+    return limiter
+
+@lru_cache(maxsize=1)
+def get_llm_rate_limiter() -> Optional[RateLimiter]:
+    """채팅 모델 호출 제한 스케줄러 제공 (싱글톤, 한도가 모두 0이면 None)"""
+    return _create_rate_limiter(settings.LLM_RPM_LIMIT, settings.LLM_TPM_LIMIT, "rate_limiter.llm")
+
+@lru_cache(maxsize=1)
+def get_embedding_rate_limiter() -> Optional[RateLimiter]:
+    """임베딩 모델 호출 제한 스케줄러 제공 (싱글톤, 한도가 모두 0이면 None)"""
+    return _create_rate_limiter(settings.EMBEDDING_RPM_LIMIT, settings.EMBEDDING_TPM_LIMIT, "rate_limiter.embedding")
@@ -1,44 +1,75 @@
 from functools import lru_cache
-from langchain_community.vectorstores import Chroma
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import EmbeddingsFilter
 from app.core.config import settings
-from app.services.embeddings import get_embeddings_service
-import os
+from app.services.vector_store import get_vector_store
 import logging
+from typing import Any, Callable, Dict, Hashable, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+def get_relevance_score_fn(vector_store) -> Callable[[float], float]:
+    """Vector Store의 거리 지표에 맞는 거리 → 관련도(0.0 ~ 1.0) 변환 함수 반환
+
+    OpenAI 임베딩은 정규화된 벡터이므로 모든 지표를 코사인 유사도로 변환합니다.
+    """
+    space = "l2"
+    collection = getattr(vector_store, "_collection", None)
+    if collection is not None and collection.metadata:
+        space = collection.metadata.get("hnsw:space", "l2")
+
+    if space == "l2":
+        # Chroma의 l2 거리는 제곱 거리: d = 2 - 2 * cos
+        return lambda distance: max(0.0, min(1.0, 1.0 - distance / 2))
+    # cosine / ip: d = 1 - cos
+    return lambda distance: max(0.0, min(1.0, 1.0 - distance))
+
+def apply_score_cutoff(scored_docs: List[Tuple[Any, float]], max_k: int, score_threshold: float = 0.0,
+                       score_margin: float = 0.0) -> List[Tuple[Any, float]]:
+    """관련도 점수 기반으로 결과를 걸러 k를 동적으로 결정
+
+    - score_threshold 미만의 결과는 제외
+    - score_margin > 0이면 최고 점수와의 차이가 margin을 넘는 결과도 제외
+    """
+    scored_docs = sorted(scored_docs, key=lambda item: item[1], reverse=True)
+    if not scored_docs:
+        return []
+
+    top_score = scored_docs[0][1]
+    selected = []
+    for doc, score in scored_docs[:max_k]:
+        if score < score_threshold:
+            break
+        if score_margin > 0 and top_score - score > score_margin:
+            break
+        selected.append((doc, score))
+    return selected
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Tuple[Hashable, Any]]], k: int,
+                           rrf_k: int = 60) -> List[Tuple[Hashable, Any]]:
+    """여러 순위 목록을 Reciprocal Rank Fusion으로 결합
+
+    각 목록은 (키, 값) 순위 목록이며, 같은 키는 같은 항목으로 간주합니다.
+    먼저 등장한 목록의 값을 유지하고 RRF 점수 상위 k개를 반환합니다.
+    """
+    fused_scores: Dict[Hashable, float] = {}
+    values: Dict[Hashable, Any] = {}
+
+    for ranked in ranked_lists:
+        for rank, (key, value) in enumerate(ranked):
+            fused_scores[key] = fused_scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            values.setdefault(key, value)
+
+    ordered = sorted(fused_scores, key=lambda key: fused_scores[key], reverse=True)
+    return [(key, values[key]) for key in ordered[:k]]
+
 @lru_cache(maxsize=1)
 def get_retriever_service():
     """Vector Store Retriever 서비스 인스턴스 제공 (싱글톤)"""
     logger.info("Vector Store와 Retriever를 초기화하는 중...")
     
-    # 임베딩 모델 가져오기
-    embeddings = get_embeddings_service()
-    
-    vector_store_dir = settings.VECTOR_STORE_DIR
-    
-    # 벡터 스토어 디렉토리가 없으면 생성
-    os.makedirs(vector_store_dir, exist_ok=True)
-    
-    # Chroma 벡터 스토어 초기화 또는 로드
-    try:
-        # 기존 벡터 스토어 로드 시도
-        vector_store = Chroma(
-            persist_directory=vector_store_dir,
-            embedding_function=embeddings
-        )
-        logger.info(f"기존 Vector Store를 '{vector_store_dir}'에서 로드했습니다.")
-    except Exception as e:
-        # 로드 실패 시 새로 생성
-        logger.warning(f"Vector Store 로드 실패: {e}. 새로 생성합니다.")
-        vector_store = Chroma(
-            persist_directory=vector_store_dir,
-            embedding_function=embeddings
-        )
-        vector_store.persist()
-        logger.info(f"새 Vector Store를 '{vector_store_dir}'에 생성했습니다.")
+    # 문서 서비스와 공유하는 Vector Store
+    vector_store = get_vector_store()
     
     # 기본 검색기 생성
     base_retriever = vector_store.as_retriever(
@@ -0,0 +1,50 @@
+from functools import lru_cache
+from langchain_community.vectorstores import Chroma
+from app.core.config import settings
+from app.services.embeddings import get_embeddings_service
+from app.services.lexical_index import get_lexical_index
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> Chroma:
+    """Chroma Vector Store 인스턴스 제공 (싱글톤)
+
+    검색기와 문서 서비스가 같은 클라이언트/컬렉션을 공유하므로
+    새로 추가된 문서가 바로 검색에 반영됩니다.
+    """
+    vector_store_dir = settings.VECTOR_STORE_DIR
+    
+    # 벡터 스토어 디렉토리가 없으면 생성
+    os.makedirs(vector_store_dir, exist_ok=True)
+    
+    # Chroma 벡터 스토어 초기화 또는 로드
+    try:
+        # 기존 벡터 스토어 로드 시도
+        vector_store = Chroma(
+            persist_directory=vector_store_dir,
+            embedding_function=get_embeddings_service()
+        )
+        logger.info(f"기존 Vector Store를 '{vector_store_dir}'에서 로드했습니다.")
+    except Exception as e:
+        # 로드 실패 시 새로 생성
+        logger.warning(f"Vector Store 로드 실패: {e}. 새로 생성합니다.")
+        vector_store = Chroma(
+            persist_directory=vector_store_dir,
+            embedding_function=get_embeddings_service()
+        )
+        vector_store.persist()
+        logger.info(f"새 Vector Store를 '{vector_store_dir}'에 생성했습니다.")
+    
+    # BM25 색인 파일이 없으면 기존 Vector Store 데이터로 재구성
+    if settings.HYBRID_SEARCH_ENABLED:
+        lexical_index = get_lexical_index()
+        if len(lexical_index) == 0:
+            try:
+                lexical_index.rebuild_from_vector_store(vector_store)
+            except Exception as e:
+                logger.warning(f"BM25 색인 재구성 실패: {e}")
+    
+    return vector_store
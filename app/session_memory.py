@@ -1,5 +1,575 @@
-####메모리 관련 수정#####
-# 세션별 메모리 저장 딕셔너리 (임시, 프로덕션에서는 Redis/DB 권장)
-SESSION_MEMORY = {}
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.exceptions import SessionBusyError
+from app.utils.tokens import count_tokens
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
 SESSION_COOKIE_NAME = "rag_session_id"
-#################### 
\ No newline at end of file
+
+def _make_turn(human: str, ai: str) -> Dict[str, Any]:
+    """토큰 수를 포함한 대화 턴 생성"""
+    return {"human": human, "ai": ai, "tokens": count_tokens(human) + count_tokens(ai)}
+
+def _trim_turns(turns: List[Dict[str, Any]], max_turns: int, max_tokens: int) -> List[Dict[str, Any]]:
+    """턴 수/토큰 예산에 맞게 최근 턴만 남김 (최근 턴 하나는 항상 유지)"""
+    kept = []
+    total_tokens = 0
+    for turn in reversed(turns):
+        tokens = turn.get("tokens", 0)
+        if kept and (len(kept) >= max_turns or total_tokens + tokens > max_tokens):
+            break
+        kept.append(turn)
+        total_tokens += tokens
+    kept.reverse()
+    return kept
+
+class SessionStore(ABC):
+    """세션별 대화 내역 저장소 인터페이스
+
+    - 세션별 잠금으로 같은 세션의 동시 요청을 직렬화
+    - 세션당 최대 턴 수와 토큰 예산을 넘으면 오래된 턴부터 제거
+    - 유휴 시간(TTL)을 넘은 세션 제거
+    조회/저장 지연 시간은 `session_store.*_latency` 메트릭으로 기록됩니다.
+    """
+
+    backend_name = "base"
+
+    def __init__(self, max_turns: int = 20, max_tokens: int = 4000, ttl: float = 3600):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.ttl = ttl
+
+    async def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """세션 대화 내역 조회"""
+        start = time.perf_counter()
+        turns = await self._get_turns(session_id)
+        metrics.observe("session_store.read_latency", time.perf_counter() - start)
+        return [{"human": turn["human"], "ai": turn["ai"]} for turn in turns]
+
+    async def set_history(self, session_id: str, history: List[Dict[str, str]]) -> None:
+        """세션 대화 내역 교체 (클라이언트가 전달한 내역 사용 시)"""
+        turns = [
+            _make_turn(entry["human"], entry["ai"])
+            for entry in history
+            if isinstance(entry, dict) and "human" in entry and "ai" in entry
+        ]
+        start = time.perf_counter()
+        await self._set_turns(session_id, _trim_turns(turns, self.max_turns, self.max_tokens))
+        metrics.observe("session_store.write_latency", time.perf_counter() - start)
+
+    async def append_turn(self, session_id: str, human: str, ai: str) -> None:
+        """세션에 대화 턴 추가"""
+        turn = _make_turn(human, ai)
+        start = time.perf_counter()
+        await self._append_turn(session_id, turn)
+        metrics.observe("session_store.write_latency", time.perf_counter() - start)
+
+    @abstractmethod
+    def lock(self, session_id: str):
+        """세션별 잠금 (async context manager)"""
+
+    @abstractmethod
+    async def _get_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        """저장된 턴 목록 조회"""
+
+    @abstractmethod
+    async def _set_turns(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        """턴 목록 교체"""
+
+    @abstractmethod
+    async def _append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        """턴 추가 및 한도 적용"""
+
+    async def purge_expired(self) -> int:
+        """만료 세션 일괄 제거, 제거된 세션 수 반환"""
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """저장소 통계"""
+        return {"backend": self.backend_name}
+
+    async def close(self) -> None:
+        """저장소 연결 종료"""
+
+class _LocalLocks:
+    """프로세스 내 세션별 asyncio 잠금 (사용 중이 아닌 잠금은 자동 정리)"""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    def __call__(self, session_id: str) -> "_LocalLockContext":
+        return _LocalLockContext(self, session_id)
+
+class _LocalLockContext:
+    def __init__(self, locks: _LocalLocks, session_id: str):
+        self._locks = locks
+        self._session_id = session_id
+
+    async def __aenter__(self):
+        locks = self._locks
+        lock = locks._locks.setdefault(self._session_id, asyncio.Lock())
+        locks._users[self._session_id] = locks._users.get(self._session_id, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._release_user()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._locks._locks[self._session_id].release()
+        self._release_user()
+
+    def _release_user(self):
+        locks = self._locks
+        locks._users[self._session_id] -= 1
+        if locks._users[self._session_id] == 0:
+            del locks._users[self._session_id]
+            del locks._locks[self._session_id]
+
+class _Session:
+    """단일 세션의 대화 내역"""
+
+    __slots__ = ("turns", "tokens", "size_bytes", "last_access")
+
+    def __init__(self):
+        self.turns: Deque[Dict[str, Any]] = deque()
+        self.tokens = 0
+        self.size_bytes = 0
+        self.last_access = time.time()
+
+class InMemorySessionStore(SessionStore):
+    """프로세스 메모리 세션 저장소 (단일 워커용)
+
+    최대 세션 수(LRU)를 넘으면 가장 오래 사용하지 않은 세션을 제거합니다.
+    """
+
+    backend_name = "memory"
+
+    def __init__(self, max_sessions: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._guard = threading.Lock()  # 세션 딕셔너리 보호
+        self._locks = _LocalLocks()
+        self._size_bytes = 0
+        self.evicted = 0
+
+    def lock(self, session_id: str):
+        return self._locks(session_id)
+
+    def _get_session(self, session_id: str, create: bool = True) -> Optional[_Session]:
+        """세션 조회 (만료 세션 제거, LRU 갱신)"""
+        now = time.time()
+        with self._guard:
+            session = self._sessions.get(session_id)
+            if session is not None and self.ttl > 0 and now - session.last_access > self.ttl:
+                self._drop(session_id)
+                session = None
+
+            if session is None:
+                if not create:
+                    return None
+                session = _Session()
+                self._sessions[session_id] = session
+                self._evict_overflow()
+
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _drop(self, session_id: str) -> None:
+        """세션 제거 (잠금은 호출자가 보유)"""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._size_bytes -= session.size_bytes
+            self.evicted += 1
+
+    def _evict_overflow(self) -> None:
+        """최대 세션 수를 넘는 가장 오래된 세션 제거 (잠금은 호출자가 보유)"""
+        while len(self._sessions) > self.max_sessions:
+            session_id, _ = next(iter(self._sessions.items()))
+            self._drop(session_id)
+
+    def _replace(self, session: _Session, turns: List[Dict[str, Any]]) -> None:
+        size_bytes = sum(len(turn["human"].encode("utf-8")) + len(turn["ai"].encode("utf-8")) for turn in turns)
+        with self._guard:
+            self._size_bytes += size_bytes - session.size_bytes
+        session.turns = deque(turns)
+        session.tokens = sum(turn["tokens"] for turn in turns)
+        session.size_bytes = size_bytes
+
+    async def _get_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        session = self._get_session(session_id, create=False)
+        return list(session.turns) if session is not None else []
+
+    async def _set_turns(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        self._replace(self._get_session(session_id), turns)
+
+    async def _append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        session = self._get_session(session_id)
+        turns = _trim_turns(list(session.turns) + [turn], self.max_turns, self.max_tokens)
+        self._replace(session, turns)
+
+    async def purge_expired(self) -> int:
+        if self.ttl <= 0:
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with self._guard:
+            # LRU 순서이므로 앞에서부터 만료되지 않은 세션을 만나면 중단
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_access > cutoff:
+                    break
+                self._drop(session_id)
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 저장소 통계 (메모리 사용량은 대화 텍스트 바이트 기준 근사치)"""
+        with self._guard:
+            return {
+                "backend": self.backend_name,
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evicted": self.evicted,
+                "text_bytes": self._size_bytes
+            }
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite(WAL) 세션 저장소 (같은 호스트의 여러 워커가 공유)
+
+    다른 워커가 쓰기 잠금을 잡고 있으면 busy_timeout만큼 기다릴 수 있으므로,
+    SQLite 호출은 이벤트 루프를 막지 않도록 모두 스레드에서 실행합니다.
+    턴 추가는 하나의 트랜잭션으로 처리되어 워커 간에도 원자적입니다.
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, db_path: str, max_sessions: int = 100000, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self._locks = _LocalLocks()
+        self._db_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS session_turns (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                human TEXT NOT NULL,
+                ai TEXT NOT NULL,
+                tokens INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_session_turns_session ON session_turns (session_id, seq);
+            """
+        )
+
+    def lock(self, session_id: str):
+        return self._locks(session_id)
+
+    def _select_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT seq, human, ai, tokens FROM session_turns WHERE session_id = ? ORDER BY seq",
+            (session_id,)
+        ).fetchall()
+        return [{"seq": seq, "human": human, "ai": ai, "tokens": tokens} for seq, human, ai, tokens in rows]
+
+    def _touch(self, session_id: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+            (session_id, now)
+        )
+
+    def _insert_turns(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        self._conn.executemany(
+            "INSERT INTO session_turns (session_id, human, ai, tokens) VALUES (?, ?, ?, ?)",
+            [(session_id, turn["human"], turn["ai"], turn["tokens"]) for turn in turns]
+        )
+
+    def _get_turns_sync(self, session_id: str) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None or (self.ttl > 0 and now - row[0] > self.ttl):
+                return []
+            return self._select_turns(session_id)
+
+    def _set_turns_sync(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+                self._insert_turns(session_id, turns)
+                self._touch(session_id, time.time())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _append_turn_sync(self, session_id: str, turn: Dict[str, Any]) -> None:
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert_turns(session_id, [turn])
+                turns = self._select_turns(session_id)
+                kept = _trim_turns(turns, self.max_turns, self.max_tokens)
+                if len(kept) < len(turns):
+                    self._conn.execute(
+                        "DELETE FROM session_turns WHERE session_id = ? AND seq < ?",
+                        (session_id, kept[0]["seq"])
+                    )
+                self._touch(session_id, time.time())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def _get_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get_turns_sync, session_id)
+
+    async def _set_turns(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._set_turns_sync, session_id, turns)
+
+    async def _append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._append_turn_sync, session_id, turn)
+
+    def _delete_sessions_where(self, condition: str, params: tuple) -> int:
+        """조건에 맞는 세션과 턴 삭제 (잠금은 호출자가 보유)"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                f"DELETE FROM session_turns WHERE session_id IN (SELECT session_id FROM sessions WHERE {condition})",
+                params
+            )
+            removed = self._conn.execute(f"DELETE FROM sessions WHERE {condition}", params).rowcount
+            self._conn.execute("COMMIT")
+            return removed
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _purge_expired_sync(self) -> int:
+        removed = 0
+        with self._db_lock:
+            if self.ttl > 0:
+                removed += self._delete_sessions_where("last_access < ?", (time.time() - self.ttl,))
+
+            # 최대 세션 수를 넘으면 가장 오래 사용하지 않은 세션부터 제거
+            count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            overflow = count - self.max_sessions
+            if overflow > 0:
+                removed += self._delete_sessions_where(
+                    "session_id IN (SELECT session_id FROM sessions ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+        return removed
+
+    async def purge_expired(self) -> int:
+        return await asyncio.to_thread(self._purge_expired_sync)
+
+    def stats(self) -> Dict[str, Any]:
+        # 메트릭 조회가 쓰기 대기에 막히지 않도록, 잠금을 바로 얻지 못하면 세션 수 생략
+        sessions = None
+        if self._db_lock.acquire(timeout=0.01):
+            try:
+                sessions = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            finally:
+                self._db_lock.release()
+        return {
+            "backend": self.backend_name,
+            "sessions": sessions,
+            "max_sessions": self.max_sessions,
+            "db_path": self.db_path
+        }
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._close_sync)
+
+    def _close_sync(self) -> None:
+        with self._db_lock:
+            self._conn.close()
+
+class _RedisSessionLock:
+    """Redis 기반 분산 세션 잠금 (SET NX PX + 소유자 확인 후 해제)
+
+    LLM 응답 생성이 timeout보다 길어져도 잠금이 만료되지 않도록,
+    잠금을 보유하는 동안 timeout/3마다 만료 시간을 연장합니다.
+    프로세스가 죽으면 연장이 멈추므로 잠금은 timeout 후 자동으로 풀립니다.
+    """
+
+    _RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    _RENEW_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(self, client, key: str, timeout: float):
+        self._client = client
+        self._key = key
+        self._timeout = timeout
+        self._token = uuid.uuid4().hex
+        self._watchdog: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        deadline = time.monotonic() + self._timeout
+        while not await self._client.set(self._key, self._token, nx=True, px=int(self._timeout * 1000)):
+            if time.monotonic() > deadline:
+                metrics.increment("session_store.lock_timeouts")
+                logger.warning(f"세션 잠금 대기 시간 초과: {self._key}")
+                raise SessionBusyError()
+            await asyncio.sleep(0.01)
+        self._watchdog = asyncio.create_task(self._renew_periodically())
+        return self
+
+    async def _renew(self) -> bool:
+        """잠금을 아직 보유하고 있으면 만료 시간 연장"""
+        ttl = int(self._timeout * 1000)
+        try:
+            return bool(await self._client.eval(self._RENEW_SCRIPT, 1, self._key, self._token, ttl))
+        except Exception:
+            # 스크립트를 지원하지 않는 서버에서는 소유자 확인 후 연장
+            if await self._client.get(self._key) != self._token:
+                return False
+            return bool(await self._client.pexpire(self._key, ttl))
+
+    async def _renew_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._timeout / 3)
+            try:
+                renewed = await self._renew()
+            except Exception as e:
+                logger.warning(f"세션 잠금 연장 실패: {self._key} ({e})")
+                continue
+            if not renewed:
+                logger.warning(f"세션 잠금을 잃었습니다: {self._key}")
+                metrics.increment("session_store.lock_lost")
+                return
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            await asyncio.gather(self._watchdog, return_exceptions=True)
+            self._watchdog = None
+        try:
+            await self._client.eval(self._RELEASE_SCRIPT, 1, self._key, self._token)
+        except Exception:
+            # 스크립트를 지원하지 않는 서버에서는 소유자 확인 후 삭제
+            if await self._client.get(self._key) == self._token:
+                await self._client.delete(self._key)
+
+class RedisSessionStore(SessionStore):
+    """Redis 프로토콜 세션 저장소 (여러 노드가 공유)
+
+    세션 턴은 JSON 리스트로 저장하며, 턴 추가는 MULTI 트랜잭션으로
+    RPUSH + LTRIM(최대 턴 수) + EXPIRE(TTL)를 원자적으로 수행합니다.
+    토큰 예산은 조회 시 적용합니다.
+    """
+
+    backend_name = "redis"
+
+    def __init__(self, url: Optional[str] = None, client=None, key_prefix: str = "rag:session:",
+                 lock_timeout: float = 30, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                raise RuntimeError("Redis 세션 저장소를 사용하려면 'redis' 패키지를 설치하세요.")
+            client = redis_asyncio.from_url(url, decode_responses=True)
+        self._client = client  # fakeredis 등 호환 클라이언트 주입 가능
+        self.key_prefix = key_prefix
+        self.lock_timeout = lock_timeout
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def lock(self, session_id: str):
+        return _RedisSessionLock(self._client, f"{self._key(session_id)}:lock", self.lock_timeout)
+
+    async def _get_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        items = await self._client.lrange(self._key(session_id), 0, -1)
+        turns = [json.loads(item) for item in items]
+        return _trim_turns(turns, self.max_turns, self.max_tokens)
+
+    async def _set_turns(self, session_id: str, turns: List[Dict[str, Any]]) -> None:
+        key = self._key(session_id)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if turns:
+                pipe.rpush(key, *[json.dumps(turn, ensure_ascii=False) for turn in turns])
+                if self.ttl > 0:
+                    pipe.expire(key, int(self.ttl))
+            await pipe.execute()
+
+    async def _append_turn(self, session_id: str, turn: Dict[str, Any]) -> None:
+        key = self._key(session_id)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, json.dumps(turn, ensure_ascii=False))
+            pipe.ltrim(key, -self.max_turns, -1)
+            if self.ttl > 0:
+                pipe.expire(key, int(self.ttl))
+            await pipe.execute()
+
+    async def close(self) -> None:
+        close = getattr(self._client, "aclose", None) or self._client.close
+        await close()
+
+def create_session_store() -> SessionStore:
+    """설정(SESSION_BACKEND)에 맞는 세션 저장소 생성"""
+    limits = {
+        "max_turns": settings.SESSION_MAX_TURNS,
+        "max_tokens": settings.SESSION_MAX_TOKENS,
+        "ttl": settings.SESSION_TTL
+    }
+    backend = settings.SESSION_BACKEND.lower()
+
+    if backend == "sqlite":
+        store = SQLiteSessionStore(settings.SESSION_SQLITE_PATH, max_sessions=settings.SESSION_MAX_COUNT, **limits)
+    elif backend == "redis":
+        store = RedisSessionStore(settings.SESSION_REDIS_URL, lock_timeout=settings.SESSION_LOCK_TIMEOUT, **limits)
+    else:
+        store = InMemorySessionStore(max_sessions=settings.SESSION_MAX_COUNT, **limits)
+
+    logger.info(f"세션 저장소 초기화: {store.backend_name}")
+    return store
+
+# 전역 세션 저장소
+SESSION_STORE = create_session_store()
+metrics.register_gauge("session_store", SESSION_STORE.stats)
@@ -70,17 +70,67 @@ document.addEventListener('DOMContentLoaded', () => {
         sendButton.disabled = disabled;
     }
 
-    // API 요청 함수
+    // 스트리밍 중인 AI 메시지 생성 (토큰이 도착할 때마다 내용 갱신)
+    function createStreamingMessage() {
+        const messageDiv = document.createElement('div');
+        messageDiv.className = 'message ai';
+        const markdownContent = document.createElement('div');
+        markdownContent.className = 'markdown-content';
+        messageDiv.appendChild(markdownContent);
+        chatMessages.appendChild(messageDiv);
+
+        return {
+            render(content) {
+                markdownContent.innerHTML = marked.parse(content);
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            },
+            finish(content) {
+                markdownContent.innerHTML = marked.parse(content);
+                // 코드 블록에 하이라이팅 적용
+                messageDiv.querySelectorAll('pre code').forEach((block) => {
+                    hljs.highlightBlock(block);
+                });
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            },
+            remove() {
+                if (messageDiv.parentNode) {
+                    messageDiv.parentNode.removeChild(messageDiv);
+                }
+            }
+        };
+    }
+
+    // SSE 메시지 블록 파싱 ("event: ...\ndata: ...")
+    function parseSseBlock(block) {
+        let event = 'message';
+        const dataLines = [];
+        block.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        if (dataLines.length === 0) return null;
+        return { event, data: JSON.parse(dataLines.join('\n')) };
+    }
+
+    // API 요청 함수 (스트리밍)
     async function sendMessage(message) {
         isSending = true;
         setInputDisabled(true);
-        const typingIndicator = addTypingIndicator();
+        let typingIndicator = addTypingIndicator();
+        let streamingMessage = null;
+        let partialAnswer = '';
+        let finalAnswer = null;
+        let failed = false;
 
         try {
-            const response = await fetch('/chat/conversation', {
+            const response = await fetch('/chat/conversation/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream',
                 },
                 body: JSON.stringify({
                     query: message,
@@ -88,22 +138,60 @@ document.addEventListener('DOMContentLoaded', () => {
                 })
             });
 
-            const data = await response.json();
+            if (!response.ok || !response.body) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder('utf-8');
+            let buffer = '';
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const parsed = parseSseBlock(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    if (!parsed) continue;
+
+                    if (parsed.event === 'token') {
+                        // 첫 토큰 도착 시 타이핑 인디케이터를 메시지로 교체
+                        if (!streamingMessage) {
+                            removeTypingIndicator(typingIndicator);
+                            typingIndicator = null;
+                            streamingMessage = createStreamingMessage();
+                        }
+                        partialAnswer += parsed.data.delta;
+                        streamingMessage.render(partialAnswer);
+                    } else if (parsed.event === 'final') {
+                        finalAnswer = parsed.data.data.answer;
+                    } else if (parsed.event === 'error') {
+                        failed = true;
+                    }
+                }
+            }
 
-            if (data.success) {
-                // AI 응답 추가 (마크다운으로 렌더링)
-                addMessage(data.data.answer, 'ai');
+            if (failed || finalAnswer === null) {
+                if (streamingMessage) streamingMessage.remove();
+                addMessage('죄송합니다. 오류가 발생했습니다.', 'system');
+            } else {
+                if (!streamingMessage) {
+                    streamingMessage = createStreamingMessage();
+                }
+                // 최종 응답(인용/강조 반영)으로 교체
+                streamingMessage.finish(finalAnswer);
                 // 대화 내역 업데이트
                 chatHistory.push({
                     human: message,
-                    ai: data.data.answer
+                    ai: finalAnswer
                 });
-            } else {
-                // 에러 메시지 표시
-                addMessage('죄송합니다. 오류가 발생했습니다.', 'system');
             }
         } catch (error) {
             console.error('Error:', error);
+            if (streamingMessage) streamingMessage.remove();
             addMessage('서버와의 통신 중 오류가 발생했습니다.', 'system');
         } finally {
             removeTypingIndicator(typingIndicator);
@@ -0,0 +1,155 @@
+from collections import deque
+from app.exceptions import FileTooLargeError, MalformedUploadError
+import logging
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# 파일이 아닌 폼 필드(description, metadata 등)의 최대 크기 (bytes)
+MAX_FIELD_SIZE = 1024 * 1024
+
+class StreamingMultipartForm:
+    """multipart/form-data 요청 본문을 스트리밍으로 읽는 폼
+
+    UploadFile(File(...))은 엔드포인트 실행 전에 본문 전체를 임시 파일로 받아 두므로
+    최대 크기 초과를 늦게 알게 되고 저장 위치로 한 번 더 복사해야 합니다.
+    이 폼은 요청 본문을 필요한 만큼만 읽어 파일 파트 내용을 read()로 그대로 넘기고,
+    본문이 max_body_size를 넘는 순간 FileTooLargeError로 중단합니다.
+    파일 파트보다 앞에 있는 필드는 open() 후에, 뒤에 있는 필드는 finish() 후에 fields에 담깁니다.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes], boundary: bytes, max_body_size: int,
+                 file_field: str = "file", max_field_size: int = MAX_FIELD_SIZE):
+        self._stream = stream
+        self.max_body_size = max_body_size
+        self.file_field = file_field
+        self.max_field_size = max_field_size
+        self.filename: Optional[str] = None
+        self.fields: Dict[str, str] = {}
+        self._received = 0
+        self._events: Deque[Tuple[str, Any]] = deque()
+        self._file_data = bytearray()
+        self._file_done = False
+        self._finished = False
+
+        # 현재 파트 상태
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part: Optional[str] = None  # 현재 파트의 필드 이름 (무시할 파트면 "")
+        self._is_file = False
+        self._field_data = bytearray()
+
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": lambda: self._events.append(("part_begin", None)),
+            "on_part_data": lambda data, start, end: self._events.append(("part_data", data[start:end])),
+            "on_part_end": lambda: self._events.append(("part_end", None)),
+            "on_header_field": lambda data, start, end: self._events.append(("header_field", data[start:end])),
+            "on_header_value": lambda data, start, end: self._events.append(("header_value", data[start:end])),
+            "on_header_end": lambda: self._events.append(("header_end", None)),
+            "on_headers_finished": lambda: self._events.append(("headers_finished", None)),
+            "on_end": lambda: self._events.append(("end", None)),
+        })
+
+    @classmethod
+    async def open(cls, request, max_body_size: int, file_field: str = "file") -> "StreamingMultipartForm":
+        """요청 본문을 파일 파트 시작 지점까지 읽은 폼 반환 (파일 파트가 없으면 400)"""
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise MalformedUploadError("multipart/form-data 형식의 요청이어야 합니다.")
+
+        form = cls(request.stream(), boundary, max_body_size, file_field=file_field)
+        while form.filename is None and not form._finished:
+            await form._pump()
+        if form.filename is None:
+            raise MalformedUploadError(f"업로드할 파일({file_field})이 없습니다.")
+        return form
+
+    async def read(self, size: int = -1) -> bytes:
+        """파일 파트 내용을 최대 size bytes 반환 (끝이면 b"")"""
+        while not self._file_data and not self._file_done:
+            await self._pump()
+        if size < 0 or size >= len(self._file_data):
+            size = len(self._file_data)
+        chunk = bytes(self._file_data[:size])
+        del self._file_data[:size]
+        return chunk
+
+    async def finish(self) -> Dict[str, str]:
+        """남은 본문을 끝까지 읽어 파일 파트 뒤의 필드까지 수집"""
+        while not self._finished:
+            await self._pump()
+        self._file_data.clear()
+        return self.fields
+
+    async def _pump(self) -> None:
+        """요청 본문 조각 하나를 파싱"""
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._parser.finalize()
+            self._handle_events()
+            if not self._finished:
+                raise MalformedUploadError("multipart 요청 본문이 완전하지 않습니다.")
+            return
+
+        self._received += len(chunk)
+        if self._received > self.max_body_size:
+            raise FileTooLargeError(f"업로드 파일이 최대 크기({self.max_body_size} bytes)를 초과했습니다.")
+        self._parser.write(chunk)
+        self._handle_events()
+
+    def _handle_events(self) -> None:
+        while self._events:
+            kind, data = self._events.popleft()
+            if kind == "part_begin":
+                self._headers = {}
+                self._field_data = bytearray()
+            elif kind == "header_field":
+                self._header_field += data
+            elif kind == "header_value":
+                self._header_value += data
+            elif kind == "header_end":
+                self._headers[self._header_field.lower()] = self._header_value
+                self._header_field = b""
+                self._header_value = b""
+            elif kind == "headers_finished":
+                self._begin_part()
+            elif kind == "part_data":
+                if self._is_file:
+                    self._file_data += data
+                elif self._part:
+                    self._field_data += data
+                    if len(self._field_data) > self.max_field_size:
+                        raise MalformedUploadError(f"폼 필드 '{self._part}'가 너무 큽니다.")
+            elif kind == "part_end":
+                if self._is_file:
+                    self._file_done = True
+                elif self._part:
+                    self.fields[self._part] = self._field_data.decode("utf-8")
+                self._part = None
+                self._is_file = False
+            elif kind == "end":
+                self._file_done = True
+                self._finished = True
+
+    def _begin_part(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8")
+        filename = options.get(b"filename")
+        self._is_file = filename is not None and name == self.file_field and self.filename is None
+        if self._is_file:
+            self.filename = filename.decode("utf-8")
+            self._part = name
+        elif filename is not None:
+            # 추가 파일 파트는 무시
+            logger.debug(f"처리하지 않는 파일 파트 무시: {name}")
+            self._part = ""
+        else:
+            self._part = name
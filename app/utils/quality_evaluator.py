@@ -4,6 +4,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 이 값보다 최고 관련도 점수가 낮으면 관련도가 낮은 것으로 간주
+LOW_RELEVANCE_THRESHOLD = 0.3
+
+def get_source_scores(sources: List[Dict[str, Any]]) -> List[float]:
+    """소스의 검색 관련도 점수 목록 (점수가 없는 소스는 제외)"""
+    return [source["score"] for source in sources if source.get("score") is not None]
+
 def evaluate_answer_quality(answer: str, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
     """RAG 응답의 품질과 신뢰도 평가"""
     # 1. 기본 메트릭 계산
@@ -39,9 +46,15 @@ def calculate_reliability_score(answer: str, sources: List[Dict[str, Any]], cita
     # 기본 점수
     score = 0.5
     
-    # 1. 소스 기반 점수
+    # 1. 소스 기반 점수 (소스 수 + 검색 관련도)
     if sources:
-        source_score = min(len(sources) / 5, 1.0) * 0.3
+        coverage = min(len(sources) / 5, 1.0)
+        scores = get_source_scores(sources)
+        if scores:
+            relevance = sum(scores) / len(scores)
+            source_score = (coverage * 0.5 + relevance * 0.5) * 0.3
+        else:
+            source_score = coverage * 0.3
         score += source_score
     
     # 2. 인용 기반 점수
@@ -94,6 +107,11 @@ def get_quality_flags(answer: str, sources: List[Dict[str, Any]], citation_count
     elif len(sources) < 2:
         flags.append("소스_부족")
     
+    # 검색 관련도 낮음
+    scores = get_source_scores(sources)
+    if scores and max(scores) < LOW_RELEVANCE_THRESHOLD:
+        flags.append("관련도_낮음")
+    
     # 인용 부족
     if citation_count == 0:
         flags.append("인용_없음")
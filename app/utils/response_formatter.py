@@ -91,7 +91,7 @@ def format_sources_for_display(sources: List[Dict[str, Any]]) -> List[Dict[str,
     for i, source in enumerate(sources):
         content = source.get("content", "")
         metadata = source.get("metadata", {})
-        score = source.get("score", 0.0)
+        score = source.get("score")
         
         # 텍스트 컨텍스트 추출
         context = content
@@ -132,7 +132,8 @@ def format_sources_for_display(sources: List[Dict[str, Any]]) -> List[Dict[str,
             display_metadata["저자"] = metadata["author"]
         
         # 유사도 점수 포맷팅 (0.0-1.0 범위의 백분율로 변환)
-        display_metadata["관련도"] = f"{score * 100:.1f}%"
+        if score is not None:
+            display_metadata["관련도"] = f"{score * 100:.1f}%"
         
         # 결과 추가
         formatted_source = {
@@ -149,6 +150,6 @@ def format_sources_for_display(sources: List[Dict[str, Any]]) -> List[Dict[str,
         formatted_sources.append(formatted_source)
     
     # 점수 기준으로 정렬 (높은 점수가 먼저 오도록)
-    formatted_sources.sort(key=lambda x: x["score"], reverse=True)
+    formatted_sources.sort(key=lambda x: x["score"] or 0.0, reverse=True)
     
     return formatted_sources
\ No newline at end of file
@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 모델별 인코딩을 찾을 수 없을 때 사용할 기본 인코딩
+DEFAULT_ENCODING = "cl100k_base"
+
+@lru_cache(maxsize=8)
+def get_encoding(model_name: Optional[str] = None):
+    """tiktoken 인코더 제공 (모델별 캐시, tiktoken이 없으면 None)"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken을 사용할 수 없어 토큰 수를 근사치로 계산합니다.")
+        return None
+
+    if model_name:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """텍스트의 토큰 수 계산 (인코더가 없으면 문자 수 기반 근사치)"""
+    if not text:
+        return 0
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return max(1, len(text) // 2)
+    return len(encoding.encode(text, disallowed_special=()))
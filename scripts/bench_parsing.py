@@ -0,0 +1,131 @@
+"""문서 파싱 처리량 벤치마크
+
+여러 페이지짜리 PDF를 생성한 뒤 PARSER_WORKERS 값(0=스레드, 1, N)별로
+iter_document_pages의 처리량(pages/sec)과 파싱 중 최대 이벤트 루프 지연을 측정합니다.
+비교를 위해 기존 방식(이벤트 루프에서 PyPDFLoader.load() 직접 호출)도 함께 측정합니다.
+
+사용법:
+    python scripts/bench_parsing.py [--pages 300] [--workers 0 1 4] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.core.config import settings  # noqa: E402
+from app.services import parsing  # noqa: E402
+
+LINES_PER_PAGE = 40
+
+def write_pdf(path: str, pages: int) -> None:
+    """텍스트 페이지로 이루어진 PDF 생성 (외부 패키지 없이 PDF 객체를 직접 기록)"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            f"({page + 1}-{line}: The quick brown fox jumps over the lazy dog, retrieval augmented generation.) Tj T*"
+            for line in range(LINES_PER_PAGE)
+        ]
+        content = ("BT /F1 9 Tf 12 TL 36 800 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+async def _measure(parse) -> tuple:
+    """parse()를 실행하며 (소요 시간, 페이지 수, 최대 이벤트 루프 지연) 측정"""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - start - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    pages = await parse()
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, pages, lag
+
+async def bench_workers(path: str, workers: int, repeat: int) -> None:
+    settings.PARSER_WORKERS = workers
+    parsing.shutdown_parser_pool()
+
+    async def parse():
+        count = 0
+        async for pages in parsing.iter_document_pages(path):
+            count += len(pages)
+        return count
+
+    # 프로세스 풀 시작 비용은 첫 실행에만 포함되므로 한 번 미리 실행
+    await parse()
+    results = [await _measure(parse) for _ in range(repeat)]
+    parsing.shutdown_parser_pool()
+    _report(f"PARSER_WORKERS={workers}", results)
+
+async def bench_legacy(path: str, repeat: int) -> None:
+    try:
+        from langchain_community.document_loaders import PyPDFLoader
+    except ImportError:
+        print("기존 방식(PyPDFLoader): 건너뜀 (langchain_community 필요)")
+        return
+
+    async def parse():
+        # 기존 load_document와 같이 이벤트 루프에서 동기 호출
+        return len(PyPDFLoader(path).load())
+
+    results = [await _measure(parse) for _ in range(repeat)]
+    _report("기존 방식(PyPDFLoader, 이벤트 루프)", results)
+
+def _report(label: str, results) -> None:
+    elapsed, pages, lag = min(results, key=lambda result: result[0])
+    worst_lag = max(result[2] for result in results)
+    print(f"{label:<36} {pages / elapsed:8.1f} pages/sec  ({elapsed:.2f}초, {pages}페이지)  "
+          f"최대 이벤트 루프 지연 {worst_lag * 1000:.1f} ms")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, min(4, os.cpu_count() or 1)])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.pdf")
+        write_pdf(path, args.pages)
+        print(f"{args.pages}페이지 PDF ({os.path.getsize(path) / 1024:.0f} KiB), CPU {os.cpu_count()}개")
+
+        await bench_legacy(path, args.repeat)
+        for workers in dict.fromkeys(args.workers):
+            await bench_workers(path, workers, args.repeat)
+
+if __name__ == "__main__":
+    asyncio.run(main())
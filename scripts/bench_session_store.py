@@ -0,0 +1,115 @@
+"""세션 저장소 핫패스 지연 시간 벤치마크
+
+/chat/conversation이 요청마다 수행하는 작업(잠금 → 내역 조회 → 턴 추가)을
+저장소별로 반복 실행해 p50/p95/p99 지연 시간을 출력합니다.
+SQLite는 다른 워커가 쓰기 잠금을 잡고 있는 동안 이벤트 루프가 멈추지 않는지도 측정합니다.
+
+사용법:
+    python scripts/bench_session_store.py [--iterations 2000] [--redis-url redis://localhost:6379/0]
+
+--redis-url이 없으면 fakeredis(설치된 경우)로 Redis 저장소를 측정합니다.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.session_memory import InMemorySessionStore, RedisSessionStore, SQLiteSessionStore  # noqa: E402
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(len(ordered) * q / 100), len(ordered) - 1)] * 1000
+    return f"p50 {pick(50):.3f} ms  p95 {pick(95):.3f} ms  p99 {pick(99):.3f} ms  mean {statistics.mean(ordered) * 1000:.3f} ms"
+
+async def bench_hot_path(name: str, store, iterations: int, sessions: int = 100) -> None:
+    reads, writes = [], []
+    for i in range(iterations):
+        session_id = f"bench-{i % sessions}"
+        async with store.lock(session_id):
+            start = time.perf_counter()
+            await store.get_history(session_id)
+            reads.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await store.append_turn(session_id, f"질문 {i}", f"답변 {i} " * 20)
+            writes.append(time.perf_counter() - start)
+    print(f"[{name}] read  {_percentiles(reads)}")
+    print(f"[{name}] write {_percentiles(writes)}")
+
+async def bench_sqlite_contention(store: SQLiteSessionStore, hold: float = 0.3) -> None:
+    """다른 연결이 쓰기 잠금을 hold초 보유하는 동안 턴 추가와 이벤트 루프 지연 측정"""
+    locked = threading.Event()
+
+    def hold_write_lock():
+        conn = sqlite3.connect(store.db_path, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(hold)
+        conn.execute("COMMIT")
+        conn.close()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    locked.wait()
+
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await store.append_turn("bench-contention", "질문", "답변")
+    waited = time.perf_counter() - start
+    done = True
+    await tick
+    holder.join()
+    print(f"[sqlite] 다른 워커가 {hold * 1000:.0f} ms 쓰기 잠금 보유: 턴 추가 {waited * 1000:.1f} ms, "
+          f"최대 이벤트 루프 지연 {lag * 1000:.2f} ms")
+
+def _redis_store(url):
+    if url:
+        return RedisSessionStore(url)
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return RedisSessionStore(client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    await bench_hot_path("memory", InMemorySessionStore(), args.iterations)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"))
+        await bench_hot_path("sqlite", store, args.iterations)
+        await bench_sqlite_contention(store)
+        await store.close()
+
+    redis_store = _redis_store(args.redis_url)
+    if redis_store is None:
+        print("[redis] 건너뜀 (--redis-url 또는 fakeredis 필요)")
+        return
+    name = "redis" if args.redis_url else "redis (fakeredis)"
+    await bench_hot_path(name, redis_store, args.iterations)
+    await redis_store.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
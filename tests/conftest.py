@@ -0,0 +1,4 @@
+import os
+
+# 설정 로드에 필요한 값 (테스트는 실제 OpenAI를 호출하지 않음)
+os.environ.setdefault("OPENAI_API_KEY", "test")
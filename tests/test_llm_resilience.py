@@ -0,0 +1,154 @@
+"""LLM 복원력 계층 테스트 (httpx MockTransport로 만든 가짜 OpenAI 서버 사용)"""
+import asyncio
+import itertools
+
+import openai
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("langchain_openai")
+
+from langchain_openai import ChatOpenAI
+
+from app.core.metrics import metrics
+from app.exceptions import LLMServiceError
+from app.services.llm_resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    MIN_HEDGE_SAMPLES,
+    CircuitBreaker,
+    ResilientChatModel,
+)
+from app.services.rate_limiter import RateLimiter
+
+_prefixes = itertools.count()
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-test",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+class FakeOpenAI:
+    """요청마다 (지연 시간, 상태 코드, 답변)을 순서대로 돌려주는 가짜 OpenAI 서버"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        delay, status, content = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": content, "type": "error", "code": None}})
+        return httpx.Response(200, json=_completion(content))
+
+    def chat_model(self) -> ChatOpenAI:
+        # 서비스와 같은 방식으로 공유 HTTP 클라이언트를 주입
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return ChatOpenAI(model="gpt-test", openai_api_key="test", max_retries=0, http_async_client=client)
+
+
+def _resilient(server: FakeOpenAI, **kwargs) -> ResilientChatModel:
+    kwargs.setdefault("metric_prefix", f"test_llm_{next(_prefixes)}")
+    return ResilientChatModel(server.chat_model(), **kwargs)
+
+
+def test_attempt_timeout_raises_and_records_failure():
+    server = FakeOpenAI((0.5, 200, "느린 답변"))
+    llm = _resilient(server, attempt_timeout=0.05, hedge_percentile=0,
+                     breaker=CircuitBreaker(failure_threshold=1))
+
+    with pytest.raises(LLMServiceError):
+        asyncio.run(llm.ainvoke("질문"))
+    assert llm.breaker.state == CIRCUIT_OPEN
+
+
+def test_hedged_request_returns_faster_response():
+    server = FakeOpenAI((1.0, 200, "첫 번째"), (0.0, 200, "헤지"))
+    llm = _resilient(server, attempt_timeout=5.0, hedge_percentile=95.0, hedge_min_delay=0.05)
+    for _ in range(MIN_HEDGE_SAMPLES):
+        metrics.observe(f"{llm.metric_prefix}.latency", 0.01)
+
+    message = asyncio.run(llm.ainvoke("질문"))
+
+    assert message.content == "헤지"
+    assert server.calls == 2
+    assert metrics.snapshot()["counters"][f"{llm.metric_prefix}.hedge_wins"] == 1
+
+
+def test_breaker_opens_and_uses_fallback():
+    primary = FakeOpenAI((0.0, 500, "서버 오류"))
+    fallback = FakeOpenAI((0.0, 200, "대체 답변"))
+    llm = _resilient(primary, fallback_llm=fallback.chat_model(), hedge_percentile=0,
+                     breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60.0))
+
+    for _ in range(3):
+        assert asyncio.run(llm.ainvoke("질문")).content == "대체 답변"
+
+    # 두 번 실패한 뒤 차단기가 열려 세 번째 요청은 기본 모델을 호출하지 않음
+    assert llm.breaker.state == CIRCUIT_OPEN
+    assert primary.calls == 2
+    assert fallback.calls == 3
+
+
+def test_breaker_rejects_without_fallback():
+    server = FakeOpenAI((0.0, 500, "서버 오류"))
+    llm = _resilient(server, hedge_percentile=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0))
+
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(llm.ainvoke("질문"))
+    with pytest.raises(LLMServiceError):
+        asyncio.run(llm.ainvoke("질문"))
+    assert server.calls == 1
+
+
+def test_client_error_is_neutral_for_breaker():
+    server = FakeOpenAI((0.0, 400, "잘못된 요청"))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    llm = _resilient(server, hedge_percentile=0, breaker=breaker)
+    breaker.record_failure()  # 열린 상태에서 시험 호출 대기
+
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(llm.ainvoke("질문"))
+
+    # 시험 호출이 클라이언트 오류로 끝나도 닫히지 않고, 다음 시험 호출은 허용
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_rate_limit_error_is_not_a_breaker_failure():
+    server = FakeOpenAI((0.0, 429, "호출 제한"))
+    llm = _resilient(server, hedge_percentile=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0))
+
+    for _ in range(2):
+        with pytest.raises(openai.RateLimitError):
+            asyncio.run(llm.ainvoke("질문"))
+    assert llm.breaker.state == CIRCUIT_CLOSED
+    assert server.calls == 2
+
+
+def test_hedge_reservation_is_settled_after_race(monkeypatch):
+    # tiktoken 인코딩 파일을 내려받지 않도록 토큰 수 계산을 고정
+    monkeypatch.setattr("app.services.llm_resilience.count_tokens", lambda text, model_name=None: 10)
+    server = FakeOpenAI((1.0, 200, "첫 번째"), (0.0, 200, "헤지"))
+    limiter = RateLimiter(tpm=60000)
+    llm = _resilient(server, rate_limiter=limiter, attempt_timeout=5.0, hedge_percentile=95.0, hedge_min_delay=0.05)
+    for _ in range(MIN_HEDGE_SAMPLES):
+        metrics.observe(f"{llm.metric_prefix}.latency", 0.01)
+    llm.max_tokens = 20000
+
+    assert asyncio.run(llm.ainvoke("질문")).content == "헤지"
+
+    # 헤지 예약분(프롬프트 + 최대 출력 토큰 20010)이 취소된 요청의 프롬프트 토큰(10)만 남도록 보정됨
+    assert limiter.stats()["tokens_available"] > 60000 - 1000
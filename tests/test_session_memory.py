@@ -0,0 +1,145 @@
+"""세션 저장소 테스트 (메모리, SQLite, fakeredis 백엔드)"""
+import asyncio
+
+import pytest
+
+from app.exceptions import SessionBusyError
+from app.session_memory import InMemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+@pytest.fixture(autouse=True)
+def _fixed_token_count(monkeypatch):
+    # tiktoken 인코딩 파일을 내려받지 않도록 토큰 수를 글자 수로 계산
+    monkeypatch.setattr("app.session_memory.count_tokens", lambda text, model_name=None: len(text))
+
+
+def _create_store(backend: str, tmp_path, **kwargs):
+    if backend == "memory":
+        return InMemorySessionStore(**kwargs)
+    if backend == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), **kwargs)
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisSessionStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), **kwargs)
+
+
+def _run(store, scenario):
+    async def main():
+        try:
+            return await scenario(store)
+        finally:
+            await store.close()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_append_keeps_most_recent_turns(backend, tmp_path):
+    store = _create_store(backend, tmp_path, max_turns=3, max_tokens=10000)
+
+    async def scenario(store):
+        for i in range(5):
+            await store.append_turn("s1", f"질문 {i}", f"답변 {i}")
+        return await store.get_history("s1"), await store.get_history("s2")
+
+    history, other = _run(store, scenario)
+
+    assert history == [{"human": f"질문 {i}", "ai": f"답변 {i}"} for i in range(2, 5)]
+    assert other == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_history_is_trimmed_to_token_budget(backend, tmp_path):
+    # 턴 하나가 10토큰 ("질문 0" + "답변 0 ")이므로 25토큰 예산이면 최근 두 턴만 남음
+    store = _create_store(backend, tmp_path, max_turns=10, max_tokens=25)
+
+    async def scenario(store):
+        for i in range(4):
+            await store.append_turn("s1", f"질문 {i}", f"답변 {i} ")
+        return await store.get_history("s1")
+
+    history = _run(store, scenario)
+
+    assert [turn["human"] for turn in history] == ["질문 2", "질문 3"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_set_history_replaces_turns(backend, tmp_path):
+    store = _create_store(backend, tmp_path, max_turns=2)
+
+    async def scenario(store):
+        await store.append_turn("s1", "이전 질문", "이전 답변")
+        await store.set_history("s1", [{"human": f"q{i}", "ai": f"a{i}"} for i in range(3)] + [{"human": "누락"}])
+        return await store.get_history("s1")
+
+    assert _run(store, scenario) == [{"human": "q1", "ai": "a1"}, {"human": "q2", "ai": "a2"}]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_idle_session_expires(backend, tmp_path):
+    store = _create_store(backend, tmp_path, ttl=0.05)
+
+    async def scenario(store):
+        await store.append_turn("s1", "질문", "답변")
+        await store.append_turn("s2", "질문", "답변")
+        await asyncio.sleep(0.1)
+        await store.append_turn("s2", "새 질문", "새 답변")
+        removed = await store.purge_expired()
+        return removed, await store.get_history("s1"), await store.get_history("s2")
+
+    removed, expired, active = _run(store, scenario)
+
+    assert removed == 1
+    assert expired == []
+    assert active[-1] == {"human": "새 질문", "ai": "새 답변"}
+
+
+def test_redis_session_expiry_is_refreshed_on_write(tmp_path):
+    store = _create_store("redis", tmp_path, ttl=60)
+
+    async def scenario(store):
+        await store.append_turn("s1", "질문", "답변")
+        return await store._client.ttl(store._key("s1"))
+
+    assert 0 < _run(store, scenario) <= 60
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_lock_serializes_same_session(backend, tmp_path):
+    store = _create_store(backend, tmp_path)
+    events = []
+
+    async def request(store, session_id, name):
+        async with store.lock(session_id):
+            events.append(f"{name} 시작")
+            await asyncio.sleep(0.05)
+            events.append(f"{name} 종료")
+
+    async def scenario(store):
+        await asyncio.gather(request(store, "s1", "a"), request(store, "s1", "b"), request(store, "s2", "c"))
+
+    _run(store, scenario)
+
+    same_session = [event for event in events if event[0] in "ab"]
+    assert same_session in (["a 시작", "a 종료", "b 시작", "b 종료"], ["b 시작", "b 종료", "a 시작", "a 종료"])
+    # 다른 세션은 기다리지 않음
+    assert events.index("c 시작") < events.index("b 종료")
+
+
+def test_redis_lock_timeout_raises_service_error(tmp_path):
+    store = _create_store("redis", tmp_path, lock_timeout=0.1)
+
+    async def scenario(store):
+        async with store.lock("s1"):
+            with pytest.raises(SessionBusyError) as error:
+                async with store.lock("s1"):
+                    pass
+        # 잠금을 해제하면 다시 얻을 수 있음
+        async with store.lock("s1"):
+            pass
+        return error.value
+
+    error = _run(store, scenario)
+
+    assert error.status_code == 409